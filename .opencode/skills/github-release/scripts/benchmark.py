@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the release scripts.
+
+Usage:
+    python benchmark.py changelog [--mb N ...] [--runs N]
+    python benchmark.py index [--mb N ...] [--runs N]
+    python benchmark.py range [--mb N] [--span N ...] [--runs N]
+    python benchmark.py commits [--commits N ...]
+    python benchmark.py manifests [--packages N ...] [--runs N]
+    python benchmark.py tags [--tags N ...] [--runs N]
+
+`changelog` builds synthetic changelogs of growing size and compares the
+old read/split/insert/rewrite update with the streaming insertion of
+update_changelog.py (time and peak Python memory). `index` compares the
+old line-by-line section lookup with changelog_index.py, both building the
+index and reading through an up-to-date sidecar. `range` compares one old
+section lookup per version of a FROM..TO span with release_notes.py's
+single read. `commits` times commit_notes.py on a synthetic history: the
+first run since the tag, a repeat, and a repeat after one more commit.
+`manifests` times discovery in a synthetic monorepo (pruned walk vs. an
+unpruned rglob into node_modules), serial vs. parallel reads, and the
+byte-level version sync. `tags` compares listing version tags through
+`git tag --sort=-v:refname` with version_tags.py's SemVer sort, reading
+packed-refs or through its key cache, and times the previous-version lookup. Output: JSON.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+import changelog_index
+import commit_notes
+import manifests
+import release_notes
+import update_changelog
+import version_tags
+
+
+def make_changelog(path: Path, size_mb: float) -> int:
+    """Write a Keep a Changelog file of about `size_mb` MiB; returns its release count."""
+    target = int(size_mb * 1024 * 1024)
+    parts = ["# Changelog\n\nAll notable changes to this project will be documented in this file.\n\n"]
+    size = len(parts[0])
+    release = 0
+    while size < target:
+        major, minor, patch = release // 10000, release // 100 % 100, release % 100
+        section = (f"## [{major}.{minor}.{patch}] - 2024-01-01\n\n"
+                   "### Added\n" + "".join(f"- Feature {release}.{i} with a description line\n" for i in range(8)) +
+                   "\n### Fixed\n" + "".join(f"- Fix {release}.{i} for an issue (#1{i})\n" for i in range(6)) + "\n")
+        parts.append(section)
+        size += len(section)
+        release += 1
+    # Newest release first
+    path.write_text(parts[0] + "".join(reversed(parts[1:])), encoding="utf-8")
+    return release
+
+
+def legacy_update(changelog_path: Path, new_entry: str) -> None:
+    """The old update: read, split into lines, insert, rewrite in place."""
+    with open(changelog_path) as f:
+        content = f.read()
+    lines = content.split("\n")
+    insert_index = len(lines)
+    for i, line in enumerate(lines):
+        if line.startswith("## [") or line.startswith("## Unreleased"):
+            insert_index = i + 1
+            break
+    lines.insert(insert_index, new_entry.strip())
+    with open(changelog_path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def legacy_section(changelog_path: Path, version: str) -> str:
+    """The old lookup: substring test on every line."""
+    with open(changelog_path) as f:
+        lines = f.readlines()
+    section_lines = []
+    in_section = False
+    target_header = f"## [{version}]"
+    for line in lines:
+        if target_header in line:
+            in_section = True
+            continue
+        if in_section and line.startswith("## ["):
+            break
+        if in_section:
+            section_lines.append(line)
+    return "".join(section_lines).strip()
+
+
+def timed(fn: Callable[[], object]) -> float:
+    """Wall time (ms) of a callable, without memory tracing."""
+    start = time.perf_counter()
+    fn()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def measure(fn: Callable[[], object]) -> Dict[str, float]:
+    """Wall time (ms) and peak traced Python memory (KiB) of a callable."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"ms": round(elapsed * 1000, 2), "peak_kib": round(peak / 1024, 1)}
+
+
+def bench_changelog(args: argparse.Namespace) -> Dict:
+    """Legacy vs streaming CHANGELOG insertion per file size."""
+    entry = update_changelog.UPDATE_TEMPLATE.format(
+        version="999.0.0", date="2024-01-01", repo="owner/repo", prev_version="1.0.0")
+    results = {}
+
+    for size_mb in args.mb:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.md"
+            releases = make_changelog(source, size_mb)
+            changelog = root / "CHANGELOG.md"
+            variants = {
+                "legacy": lambda: legacy_update(changelog, entry),
+                "streaming": lambda: update_changelog.update_changelog(root, "999.0.0", "owner/repo"),
+            }
+            row = {"bytes": source.stat().st_size, "releases": releases}
+            for name, fn in variants.items():
+                runs = []
+                for _ in range(args.runs):
+                    changelog.write_bytes(source.read_bytes())
+                    runs.append(measure(fn))
+                row[name] = {
+                    "best_ms": min(r["ms"] for r in runs),
+                    "peak_kib": max(r["peak_kib"] for r in runs),
+                }
+            results[f"{size_mb}MB"] = row
+
+    return {"benchmark": "changelog", "runs": args.runs, "results": results}
+
+
+def sidecar_section(changelog_path: Path, sidecar: Path, version: str) -> str:
+    with changelog_index.ChangelogIndex.load(changelog_path, sidecar) as index:
+        return index.section(version)
+
+
+def bench_index(args: argparse.Namespace) -> Dict:
+    """Legacy scan vs index build vs sidecar lookup, for the oldest release."""
+    results = {}
+
+    for size_mb in args.mb:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            changelog = root / "CHANGELOG.md"
+            sidecar = root / "index.json"
+            releases = make_changelog(changelog, size_mb)
+            oldest = "0.0.0"
+            variants = {
+                "legacy": lambda: legacy_section(changelog, oldest),
+                "build": lambda: changelog_index.ChangelogIndex.build(changelog).section(oldest),
+                "sidecar": lambda: sidecar_section(changelog, sidecar, oldest),
+            }
+            assert len({fn() for fn in variants.values()}) == 1
+            row = {"bytes": changelog.stat().st_size, "releases": releases}
+            for name, fn in variants.items():
+                runs = [measure(fn) for _ in range(args.runs)]
+                row[name] = {
+                    "best_ms": min(r["ms"] for r in runs),
+                    "peak_kib": max(r["peak_kib"] for r in runs),
+                }
+            results[f"{size_mb}MB"] = row
+
+    return {"benchmark": "index", "runs": args.runs, "results": results}
+
+
+def bench_range(args: argparse.Namespace) -> Dict:
+    """Per-version line scans vs one indexed span read, per range length."""
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        changelog = root / "CHANGELOG.md"
+        releases = make_changelog(changelog, args.mb)
+        # A git dir for the sidecar index, built before the timed runs
+        (root / ".git").mkdir()
+        with changelog_index.ChangelogIndex.load(changelog) as index:
+            versions = index.versions()
+        for span in args.span:
+            span = min(span, releases - 1)
+            in_range = versions[:span]
+            spec = f"{versions[span]}..{versions[0]}"
+            variants = {
+                "per_version": lambda: [legacy_section(changelog, v) for v in in_range],
+                "range": lambda: release_notes.range_notes(changelog, spec),
+            }
+            row = {"versions": span}
+            for name, fn in variants.items():
+                runs = [measure(fn) for _ in range(args.runs)]
+                row[name] = {
+                    "best_ms": min(r["ms"] for r in runs),
+                    "peak_kib": max(r["peak_kib"] for r in runs),
+                }
+            results[str(span)] = row
+
+    return {"benchmark": "range", "mb": args.mb, "releases": releases, "runs": args.runs, "results": results}
+
+
+GIT_IDENTITY = {"GIT_AUTHOR_NAME": "Bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+                "GIT_COMMITTER_NAME": "Bench", "GIT_COMMITTER_EMAIL": "bench@example.com"}
+
+
+def make_history(root: Path, commits: int) -> None:
+    """A repository with a v1.0.0 tag followed by `commits` conventional commits"""
+    types = ["feat", "fix", "docs", "refactor", "chore", "perf"]
+    stream = []
+    for i in range(commits + 1):
+        message = "chore: init" if i == 0 else f"{types[i % len(types)]}(mod{i % 7}): change number {i}"
+        data = message.encode("utf-8")
+        stream += [
+            "commit refs/heads/main",
+            f"mark :{i + 1}",
+            f"committer Bench <bench@example.com> {1700000000 + i} +0000",
+            f"data {len(data)}",
+            message,
+        ]
+        if i > 0:
+            stream.append(f"from :{i}")
+    env = dict(os.environ, **GIT_IDENTITY)
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=root, check=True)
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=root, check=True, env=env,
+                   input=("\n".join(stream) + "\n").encode("utf-8"))
+    subprocess.run(["git", "tag", "v1.0.0", ":/chore: init"], cwd=root, check=True)
+    subprocess.run(["git", "reset", "-q", "--hard", "main"], cwd=root, check=True)
+
+
+def bench_commits(args: argparse.Namespace) -> Dict:
+    """commit_notes.py: first run, memoized repeat, one new commit."""
+    results = {}
+
+    for commits in args.commits:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            make_history(root, commits)
+            row = {}
+            for name in ("first", "repeat", "one_new_commit"):
+                if name == "one_new_commit":
+                    subprocess.run(["git", "commit", "-q", "--allow-empty", "-m", "feat: one more"],
+                                   cwd=root, check=True, env=dict(os.environ, **GIT_IDENTITY))
+                start = time.perf_counter()
+                _, entries, read = commit_notes.collect_entries(root)
+                row[name] = {"ms": round((time.perf_counter() - start) * 1000, 2),
+                             "commits_read": read, "entries": len(entries)}
+            results[str(commits)] = row
+
+    return {"benchmark": "commits", "results": results}
+
+
+def make_monorepo(root: Path, packages: int) -> None:
+    """Root package.json plus `packages` packages, each with an installed dependency tree"""
+    (root / "package.json").write_text('{\n  "name": "root",\n  "version": "1.0.0"\n}\n')
+    for i in range(packages):
+        package = root / "packages" / f"pkg{i}"
+        package.mkdir(parents=True)
+        (package / "package.json").write_text(
+            f'{{\n  "name": "pkg{i}",\n  "version": "1.0.0",\n  "dependencies": {{"dep": "^2.0.0"}}\n}}\n')
+        (package / "src").mkdir()
+        (package / "src" / "index.js").write_text("module.exports = 1\n")
+        for j in range(10):
+            dep = package / "node_modules" / f"dep{j}"
+            dep.mkdir(parents=True)
+            (dep / "package.json").write_text(f'{{"name": "dep{j}", "version": "2.0.0"}}\n')
+
+
+def bench_manifests(args: argparse.Namespace) -> Dict:
+    """Manifest discovery, reads and version sync in a synthetic monorepo."""
+    results = {}
+
+    for packages in args.packages:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            make_monorepo(root, packages)
+            paths = manifests.find_manifests(root)
+            variants = {
+                "rglob_unpruned": lambda: list(root.rglob("package.json")),
+                "find_pruned": lambda: manifests.find_manifests(root),
+                "read_serial": lambda: [manifests.read_manifest(path) for path in paths],
+                "read_parallel": lambda: manifests.read_all(paths),
+                "sync_version": lambda: manifests.set_versions(manifests.read_all(paths), "2.0.0"),
+            }
+            row = {"manifests": len(paths)}
+            for name, fn in variants.items():
+                runs = []
+                for _ in range(args.runs):
+                    if name == "sync_version":
+                        manifests.set_versions(manifests.read_all(paths), "1.0.0")
+                    runs.append(timed(fn))
+                row[name] = {"best_ms": min(runs)}
+            results[str(packages)] = row
+
+    return {"benchmark": "manifests", "runs": args.runs, "results": results}
+
+
+def make_tags(root: Path, tags: int) -> None:
+    """A repository with `tags` packed tags: releases, prereleases and a few non-version names"""
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(["git", "commit", "-q", "--allow-empty", "-m", "init"], cwd=root, check=True,
+                   env=dict(os.environ, **GIT_IDENTITY))
+    sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, check=True,
+                         capture_output=True, text=True).stdout.strip()
+    lines = ["# pack-refs with: peeled fully-peeled sorted "]
+    for i in range(tags):
+        major, minor, patch = i // 1000, i // 20 % 50, i % 20
+        if i % 10 == 9:
+            name = f"v{major}.{minor}.{patch + 1}-rc.{i % 3}"
+        elif i % 50 == 7:
+            name = f"build-{i}"
+        else:
+            name = f"v{major}.{minor}.{patch}"
+        lines.append(f"{sha} refs/tags/{name}")
+    (root / ".git" / "packed-refs").write_text("\n".join(lines) + "\n")
+
+
+def bench_tags(args: argparse.Namespace) -> Dict:
+    """Version tag listing and previous-version lookup."""
+    results = {}
+
+    for tags in args.tags:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            make_tags(root, tags)
+            newest = str(version_tags.version_tags(root)[0][0])
+            variants = {
+                "git_tag_sort": lambda: subprocess.run(
+                    ["git", "tag", "--sort=-v:refname"], cwd=root, check=True, capture_output=True),
+                "uncached_sort": lambda: version_tags.tag_keys(root, use_cache=False),
+                "cached_sort": lambda: version_tags.version_tags(root),
+                "previous_version": lambda: version_tags.previous_version(root, newest),
+            }
+            row = {"version_tags": len(version_tags.version_tags(root))}
+            for name, fn in variants.items():
+                row[name] = {"best_ms": min(timed(fn) for _ in range(args.runs))}
+            results[str(tags)] = row
+
+    return {"benchmark": "tags", "runs": args.runs, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the release scripts")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    changelog = sub.add_parser("changelog", help="CHANGELOG insertion: rewrite vs streaming")
+    changelog.add_argument("--mb", type=float, nargs="+", default=[1, 8, 32])
+    changelog.add_argument("--runs", type=int, default=3)
+    changelog.set_defaults(func=bench_changelog)
+
+    index = sub.add_parser("index", help="CHANGELOG section lookup: line scan vs version index")
+    index.add_argument("--mb", type=float, nargs="+", default=[1, 8, 32])
+    index.add_argument("--runs", type=int, default=3)
+    index.set_defaults(func=bench_index)
+
+    span = sub.add_parser("range", help="release notes for FROM..TO: per-version scans vs one span read")
+    span.add_argument("--mb", type=float, default=1)
+    span.add_argument("--span", type=int, nargs="+", default=[5, 20, 100])
+    span.add_argument("--runs", type=int, default=3)
+    span.set_defaults(func=bench_range)
+
+    commits = sub.add_parser("commits", help="CHANGELOG sections from commits: first run vs memoized")
+    commits.add_argument("--commits", type=int, nargs="+", default=[1000, 20000])
+    commits.set_defaults(func=bench_commits)
+
+    monorepo = sub.add_parser("manifests", help="monorepo manifest discovery, reads and version sync")
+    monorepo.add_argument("--packages", type=int, nargs="+", default=[50, 500])
+    monorepo.add_argument("--runs", type=int, default=3)
+    monorepo.set_defaults(func=bench_manifests)
+
+    tag_list = sub.add_parser("tags", help="version tags: git tag --sort vs packed-refs read and SemVer sort")
+    tag_list.add_argument("--tags", type=int, nargs="+", default=[1000, 30000])
+    tag_list.add_argument("--runs", type=int, default=3)
+    tag_list.set_defaults(func=bench_tags)
+
+    args = parser.parse_args()
+    print(json.dumps(args.func(args), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,111 +1,146 @@
 #!/usr/bin/env python3
 """
-Bump version in package.json
+Bump version in package.json, and in every other package manifest of the
+repository (see manifests.py): only the version bytes change, and all
+files are replaced together
+
+Versions follow SemVer 2.0 (semver.py), prereleases included: besides
+major/minor/patch, premajor/preminor/prepatch start a prerelease of the
+next version and prerelease counts it up (1.4.0-rc.1 -> 1.4.0-rc.2).
 """
 
-import json
 import sys
 from pathlib import Path
 
+import semver
+from manifests import read_manifests, set_versions, version_drift
+from semver import BUMP_TYPES, DEFAULT_PREID, Version
+
 
-def parse_version(version: str) -> tuple[int, int, int]:
-    """Parse version string into (major, minor, patch)"""
-    parts = version.split(".")
-    if len(parts) != 3:
-        raise ValueError(f"Invalid version format: {version}")
-    return tuple(map(int, parts))
+def parse_version(version: str) -> Version:
+    """Parse a SemVer 2.0 version string (see semver.py)"""
+    return semver.parse(version)
 
 
-def bump_version(version: str, bump_type: str) -> str:
+def bump_version(version: str, bump_type: str, preid: str = DEFAULT_PREID) -> str:
     """
     Bump version based on type.
     
     Args:
-        version: Current version (e.g., "1.0.0")
-        bump_type: One of "major", "minor", "patch"
+        version: Current version (e.g., "1.0.0" or "1.1.0-rc.1")
+        bump_type: One of BUMP_TYPES: "major", "minor", "patch",
+            "premajor", "preminor", "prepatch", "prerelease"
+        preid: Prerelease identifier for the pre* types (e.g., "rc", "beta")
     
     Returns:
         New version string
     """
-    major, minor, patch = parse_version(version)
-    
-    if bump_type == "major":
-        return f"{major + 1}.0.0"
-    elif bump_type == "minor":
-        return f"{major}.{minor + 1}.0"
-    elif bump_type == "patch":
-        return f"{major}.{minor}.{patch + 1}"
-    else:
-        raise ValueError(f"Invalid bump type: {bump_type}. Use major, minor, or patch")
+    return semver.bump(version, bump_type, preid)
 
 
-def update_versions(project_root: Path, new_version: str) -> tuple[bool, list[str]]:
+def write_versions(project_root: Path, new_version: str) -> tuple[bool, list[str], list[Path]]:
     """
-    Update version in package.json.
+    Update version in every manifest of the repository (package.json,
+    pyproject.toml, Cargo.toml), patching only the version value.
     
     Returns:
-        (success, messages): tuple of success status and list of messages
+        (success, messages, changed): as update_versions, plus the paths
+        of the manifests that were rewritten
     """
     messages = []
     
-    # Update package.json
-    package_path = project_root / "package.json"
-    if not package_path.exists():
+    manifests = read_manifests(project_root)
+    if not manifests:
         messages.append("❌ package.json not found")
-        return False, messages
-    
-    with open(package_path, "r") as f:
-        package = json.load(f)
-    
-    old_version = package.get("version", "0.0.0")
-    package["version"] = new_version
-    
-    with open(package_path, "w") as f:
-        json.dump(package, f, indent=2)
-        f.write("\n")
-    
-    messages.append(f"✓ Updated package.json: {old_version} -> {new_version}")
+        return False, messages, []
+    
+    for m in manifests:
+        if m.error:
+            messages.append(f"❌ Cannot read {m.path.relative_to(project_root)}: {m.error}")
+    if any(m.error for m in manifests):
+        return False, messages, []
+    
+    try:
+        changed = set_versions(manifests, new_version, add_to=project_root / "package.json")
+    except (OSError, ValueError) as e:
+        messages.append(f"❌ Could not update manifests (none was changed): {e}")
+        return False, messages, []
+    
+    for m, old_version in changed:
+        messages.append(f"✓ Updated {m.path.relative_to(project_root)}: {old_version or '(none)'} -> {new_version}")
+    changed_paths = {m.path for m, _ in changed}
+    for m in manifests:
+        if m.path in changed_paths:
+            continue
+        if m.version is None:
+            messages.append(f"  Skipped {m.path.relative_to(project_root)} (no static version)")
+        else:
+            messages.append(f"✓ {m.path.relative_to(project_root)} already at {new_version}")
     
     messages.append(f"\n✅ Version bumped successfully to {new_version}")
-    return True, messages
+    return True, messages, [m.path for m, _ in changed]
+
+
+def update_versions(project_root: Path, new_version: str) -> tuple[bool, list[str]]:
+    """
+    Update version in every manifest of the repository (package.json,
+    pyproject.toml, Cargo.toml), patching only the version value.
+    
+    Returns:
+        (success, messages): tuple of success status and list of messages
+    """
+    success, messages, _ = write_versions(project_root, new_version)
+    return success, messages
+
+
+def get_current_version(project_root: Path) -> str:
+    """The repository's version: the root manifest's, else the most common one ("" if none)"""
+    expected, _ = version_drift(read_manifests(project_root), project_root)
+    return expected or ""
 
 
 def main():
     """Main entry point"""
-    if len(sys.argv) < 2:
-        print("Usage: bump_version.py <major|minor|patch|version> [project_root]")
+    args = sys.argv[1:]
+    preid = DEFAULT_PREID
+    if "--preid" in args:
+        i = args.index("--preid")
+        preid = args[i + 1] if i + 1 < len(args) else ""
+        del args[i:i + 2]
+    
+    if not args:
+        print("Usage: bump_version.py <type|version> [--preid ID] [project_root]")
+        print(f"\nTypes: {', '.join(BUMP_TYPES)}")
         print("\nExamples:")
         print("  bump_version.py patch")
         print("  bump_version.py minor")
+        print("  bump_version.py preminor --preid beta")
+        print("  bump_version.py prerelease")
         print("  bump_version.py 1.2.3")
         sys.exit(1)
     
-    bump_type = sys.argv[1]
-    project_root = Path(sys.argv[2]) if len(sys.argv) > 2 else Path.cwd()
+    bump_type = args[0]
+    project_root = Path(args[1]) if len(args) > 1 else Path.cwd()
     
     # Read current version
-    package_path = project_root / "package.json"
-    if not package_path.exists():
-        print("❌ package.json not found")
-        sys.exit(1)
-    
-    with open(package_path, "r") as f:
-        package = json.load(f)
-        current_version = package.get("version", "0.0.0")
+    current_version = get_current_version(project_root)
     
     if not current_version:
         print("⚠️  version not found in package.json, defaulting to 0.0.0")
         current_version = "0.0.0"
     
     # Determine new version
-    if bump_type in ["major", "minor", "patch"]:
-        new_version = bump_version(current_version, bump_type)
+    if bump_type in BUMP_TYPES:
+        try:
+            new_version = bump_version(current_version, bump_type, preid)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
     else:
         # Assume it's a specific version number
-        new_version = bump_type
-        # Validate format
+        # Validate format; the normalized form drops a leading "v" ("v1.2.3" -> "1.2.3")
         try:
-            parse_version(new_version)
+            new_version = str(parse_version(bump_type))
         except ValueError as e:
             print(f"❌ {e}")
             sys.exit(1)
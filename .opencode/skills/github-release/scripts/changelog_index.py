@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Version -> byte range index of CHANGELOG.md
+
+One regex pass over the memory-mapped changelog records, for every version
+heading, where the heading starts, where its body starts and where the
+section ends (the next `## ` heading or EOF). The index is kept as a
+binary sidecar under the git dir (.git/github-release/), keyed by the
+changelog's mtime and size, so it is only rebuilt after the file changed.
+The sidecar is a packed struct table (a header, fixed-width records and a
+version-sorted permutation) that is memory-mapped, so a lookup reads O(log n) records of it and then
+an mmap slice of the changelog.
+
+Versions are compared exactly (a leading "v" is ignored), so `1.2.1` does
+not match the `## [11.2.1]` heading.
+
+Usage:
+    changelog_index.py <version> [changelog_path]    print a section
+    changelog_index.py --list [changelog_path]       list indexed versions
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from github_api import cache_dir
+
+# Version headings: "## [1.2.0] - date", "## v1.2.0" ("## [Unreleased]" is not one)
+VERSION_HEADING_RE = re.compile(rb'^## \[?[Vv]?(\d[^\]\s]*)', re.M)
+
+# Any level-2 heading after the first line, which ends the section before
+# it; group 1 is the version of a version heading
+HEADING_RE = re.compile(rb'\n## (?:\[?[Vv]?(\d[^\]\s]*))?')
+
+# Sidecar layout: header, then `count` records in file order, then `count`
+# record numbers sorted by version (the search order)
+MAGIC = b"CLIX"
+INDEX_FORMAT = 1
+HEADER = struct.Struct("<4sIqqII")  # magic, format, mtime_ns, size, count, key width
+ORDER = struct.Struct("<I")
+
+# (version, heading start, body start, section end)
+Entry = Tuple[str, int, int, int]
+
+
+def normalize_version(version: str) -> str:
+    """Version as captured from headings: without a leading v"""
+    return version[1:] if version[:1] in ("v", "V") else version
+
+
+def headings(data) -> Iterator[Tuple[int, Optional[bytes], int]]:
+    """(start, version or None, end of match) of each level-2 heading"""
+    if data[:3] == b"## ":
+        match = VERSION_HEADING_RE.match(data)
+        yield 0, match.group(1) if match else None, match.end() if match else 3
+    for match in HEADING_RE.finditer(data):
+        yield match.start() + 1, match.group(1), match.end()
+
+
+def scan(data) -> List[Entry]:
+    """
+    Version sections of a changelog's bytes (or mmap), in file order. A
+    section ends at the next level-2 heading of any kind, or at EOF.
+    """
+    entries: List[Entry] = []
+    current = None
+    for start, version, end in headings(data):
+        if current is not None:
+            entries.append((*current, start))
+            current = None
+        if version is not None:
+            newline = data.find(b"\n", end)
+            body = len(data) if newline < 0 else newline + 1
+            current = (version.decode("utf-8", "replace"), start, body)
+    if current is not None:
+        entries.append((*current, len(data)))
+    return entries
+
+
+def pack(mtime_ns: int, size: int, entries: List[Entry]) -> bytes:
+    """Serialize entries into the sidecar layout"""
+    keys = [entry[0].encode("utf-8") for entry in entries]
+    width = max((len(key) for key in keys), default=0)
+    record = struct.Struct(f"<{width}sQQQ")
+    # Ties keep file order, so the first section wins when a version appears twice
+    order = sorted(range(len(entries)), key=keys.__getitem__)
+    parts = [HEADER.pack(MAGIC, INDEX_FORMAT, mtime_ns, size, len(entries), width)]
+    parts.extend(record.pack(key, *entry[1:]) for key, entry in zip(keys, entries))
+    parts.extend(ORDER.pack(i) for i in order)
+    return b"".join(parts)
+
+
+def index_path(changelog_path: Path) -> Optional[Path]:
+    """Sidecar location for a changelog (None outside a git repository)"""
+    directory = cache_dir(changelog_path.parent)
+    if directory is None:
+        return None
+    key = hashlib.sha1(str(changelog_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return directory / f"changelog-{key}.idx"
+
+
+class ChangelogIndex:
+    """
+    Version sections of one changelog, valid for one (mtime, size) of it,
+    read on demand from the packed index (bytes or a mapped sidecar).
+    """
+
+    def __init__(self, path: Path, data):
+        magic, fmt, self.mtime_ns, self.size, self.count, width = HEADER.unpack_from(data)
+        if magic != MAGIC or fmt != INDEX_FORMAT:
+            raise ValueError("not a changelog index")
+        self.path = path
+        self._data = data
+        self._record = struct.Struct(f"<{width}sQQQ")
+        self._order_at = HEADER.size + self.count * self._record.size
+        if len(data) != self._order_at + self.count * ORDER.size:
+            raise ValueError("truncated changelog index")
+
+    @classmethod
+    def build(cls, path: Path) -> "ChangelogIndex":
+        """Index the changelog in one pass"""
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size == 0:
+                return cls(path, pack(st.st_mtime_ns, 0, []))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls(path, pack(st.st_mtime_ns, st.st_size, scan(data)))
+
+    @classmethod
+    def load(cls, path: Path, sidecar: Optional[Path] = None) -> "ChangelogIndex":
+        """
+        The sidecar index if it matches the changelog's mtime and size,
+        else a fresh index (saved as the new sidecar). `sidecar` defaults
+        to index_path(path). Raises OSError if the changelog is unreadable.
+        """
+        path = Path(path)
+        st = os.stat(path)
+        if sidecar is None:
+            sidecar = index_path(path)
+        if sidecar is not None:
+            try:
+                with open(sidecar, "rb") as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    index = cls(path, data)
+                except (ValueError, struct.error):
+                    data.close()
+                else:
+                    if index.mtime_ns == st.st_mtime_ns and index.size == st.st_size:
+                        return index
+                    index.close()
+            except (OSError, ValueError):
+                pass
+
+        index = cls.build(path)
+        if sidecar is not None:
+            index.save(sidecar)
+        return index
+
+    def save(self, sidecar: Path) -> None:
+        """Write the index atomically; a failure only costs a rebuild later"""
+        try:
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=sidecar.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._data)
+            os.replace(tmp, sidecar)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self) -> "ChangelogIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def entry(self, i: int) -> Entry:
+        """The i-th version section in file order"""
+        key, start, body, end = self._record.unpack_from(self._data, HEADER.size + i * self._record.size)
+        return key.rstrip(b"\0").decode("utf-8"), start, body, end
+
+    def entries(self) -> List[Entry]:
+        """All version sections, in file order (newest first in Keep a Changelog)"""
+        return [self.entry(i) for i in range(self.count)]
+
+    def versions(self) -> List[str]:
+        return [entry[0] for entry in self.entries()]
+
+    def position(self, version: str) -> Optional[int]:
+        """File-order position of exactly `version`, or None (binary search)"""
+        wanted = normalize_version(version).encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(self._ordered(mid)) < wanted:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            i = self._ordered(lo)
+            if self._key(i) == wanted:
+                return i
+        return None
+
+    def find(self, version: str) -> Optional[Entry]:
+        """The section of exactly `version`, or None"""
+        i = self.position(version)
+        return None if i is None else self.entry(i)
+
+    def _ordered(self, k: int) -> int:
+        return ORDER.unpack_from(self._data, self._order_at + k * ORDER.size)[0]
+
+    def _key(self, i: int) -> bytes:
+        return self._record.unpack_from(self._data, HEADER.size + i * self._record.size)[0].rstrip(b"\0")
+
+    def read_bytes(self, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the changelog, in one mmap slice"""
+        if end <= start:
+            return b""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return data[start:end]
+
+    def read(self, start: int, end: int) -> str:
+        """Bytes [start, end) of the changelog, decoded"""
+        return self.read_bytes(start, end).decode("utf-8", "replace")
+
+    def section(self, version: str) -> str:
+        """Body of a version's section (without its heading), stripped; "" if absent"""
+        entry = self.find(version)
+        if entry is None:
+            return ""
+        return self.read(entry[2], entry[3]).replace("\r\n", "\n").strip()
+
+
+def read_section(changelog_path: Path, version: str) -> str:
+    """Section body for `version` through the (sidecar) index; "" if absent"""
+    try:
+        with ChangelogIndex.load(changelog_path) as index:
+            return index.section(version)
+    except (OSError, ValueError):
+        return ""
+
+
+def main():
+    """Main entry point"""
+    args = [arg for arg in sys.argv[1:] if arg != "--list"]
+    if not args and "--list" not in sys.argv:
+        print("Usage: changelog_index.py <version> [changelog_path] | --list [changelog_path]")
+        sys.exit(1)
+
+    listing = "--list" in sys.argv
+    paths = args if listing else args[1:]
+    changelog_path = Path(paths[0]) if paths else Path.cwd() / "CHANGELOG.md"
+
+    try:
+        index = ChangelogIndex.load(changelog_path)
+    except OSError as e:
+        print(f"❌ Cannot read {changelog_path}: {e}")
+        sys.exit(1)
+
+    with index:
+        if listing:
+            for version, start, _, end in index.entries():
+                print(f"{version}\t{start}\t{end}")
+            return
+        notes = index.section(args[0])
+    if not notes:
+        print(f"❌ No section for version {args[0]} in {changelog_path}")
+        sys.exit(1)
+    print(notes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,51 @@
 #!/usr/bin/env python3
 """
-Check version consistency in package.json
+Check version consistency across the repository's package manifests
+(package.json, pyproject.toml, Cargo.toml; see manifests.py)
 """
 
-import json
 import sys
 from pathlib import Path
+from typing import Optional
 
+from manifests import read_manifests, set_versions, version_drift
 
-def check_versions(project_root: Path, init: bool = False) -> tuple[bool, list[str]]:
+
+def check_versions(project_root: Path, init: bool = False,
+                   expected: Optional[str] = None) -> tuple[bool, list[str]]:
     """
-    Check if package.json has a version field.
+    Check that every manifest carries the same version, in one pass.
     
     Args:
         project_root: Project root directory
-        init: If True, initialize version to 0.0.0 if missing
+        init: If True, initialize version to 0.0.0 in the root package.json if missing
+        expected: Version every manifest must have (default: the root manifest's)
     
     Returns:
         (success, messages): tuple of success status and list of messages
     """
     messages = []
     
-    package_path = project_root / "package.json"
-    if not package_path.exists():
+    manifests = read_manifests(project_root)
+    if not manifests:
         messages.append("❌ package.json not found")
         return False, messages
     
-    with open(package_path, "r") as f:
-        try:
-            package = json.load(f)
-        except json.JSONDecodeError:
-            messages.append("❌ package.json is invalid JSON")
-            return False, messages
-    
-    version = package.get("version")
+    for m in manifests:
+        if m.error:
+            messages.append(f"❌ {m.path.relative_to(project_root)}: {m.error}")
+    if any(m.error for m in manifests):
+        return False, messages
     
-    if not version:
+    package_path = project_root / "package.json"
+    root_package = next((m for m in manifests if m.path == package_path), None)
+    if root_package is not None and root_package.version is None:
         if init:
-            package["version"] = "0.0.0"
-            with open(package_path, "w") as f:
-                json.dump(package, f, indent=2)
-                f.write("\n")
+            try:
+                set_versions([root_package], "0.0.0", add_to=package_path)
+            except (OSError, ValueError) as e:
+                messages.append(f"❌ Could not initialize version: {e}")
+                return False, messages
             messages.append("✅ initialized version to 0.0.0 in package.json")
             return True, messages
         else:
@@ -48,7 +53,25 @@ def check_versions(project_root: Path, init: bool = False) -> tuple[bool, list[s
             messages.append("   (use --init to add version: \"0.0.0\")")
             return False, messages
     
-    messages.append(f"✓ Found version: {version}")
+    expected, drifted = version_drift(manifests, project_root, expected)
+    if expected is None:
+        messages.append("❌ No manifest has a version")
+        return False, messages
+    
+    versioned = [m for m in manifests if m.version is not None]
+    for m in manifests:
+        if m.version is None:
+            messages.append(f"  Skipped {m.path.relative_to(project_root)} (no static version)")
+    
+    if drifted:
+        messages.append(f"❌ Version drift: {len(drifted)} of {len(versioned)} manifests differ from {expected}")
+        for m in drifted:
+            messages.append(f"   {m.path.relative_to(project_root)}: {m.version}")
+        return False, messages
+    
+    messages.append(f"✓ Found version: {expected}")
+    if len(versioned) > 1:
+        messages.append(f"✓ All {len(versioned)} manifests are at {expected}")
     return True, messages
 
 
@@ -56,14 +79,24 @@ def main():
     """Main entry point"""
     project_root = Path.cwd()
     init = "--init" in sys.argv
+    expected = None
+    
+    args = sys.argv[1:]
+    if "--expect" in args:
+        i = args.index("--expect")
+        if i + 1 >= len(args):
+            print("Usage: check_versions.py [--init] [--expect VERSION] [project_root]")
+            sys.exit(1)
+        expected = args[i + 1]
+        del args[i:i + 2]
     
     # Allow passing project root as argument (generic)
-    for arg in sys.argv[1:]:
+    for arg in args:
         if not arg.startswith("--"):
             project_root = Path(arg)
             break
             
-    success, messages = check_versions(project_root, init)
+    success, messages = check_versions(project_root, init, expected)
     
     for msg in messages:
         print(msg)
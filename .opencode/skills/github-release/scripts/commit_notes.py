@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+CHANGELOG sections from the conventional commits since the previous tag
+
+The previous tag is the one the CHANGELOG compare link starts at
+(version_tags.previous_tag): the highest version tag below the version
+being released, skipping prereleases for a final release.
+
+Commit types map to Keep a Changelog headings (SECTION_TYPES); a `security`
+scope files any commit under Security, and breaking changes (`feat!:` or a
+`BREAKING CHANGE:` footer) are marked. Other types (docs, test, chore, ci,
+...) and non-conventional commits are left out.
+
+The commits are read in one streamed `git log -z` pass. The parsed entries
+are memoized per tag in .git/github-release/commit-notes.json together with
+the last commit they cover, so regenerating a draft after one more commit
+only reads that commit. A rewritten history (the cached commit is no longer
+an ancestor of HEAD) or a moved tag starts over from the tag.
+
+Usage:
+    commit_notes.py [--since TAG | --version VERSION] [--no-cache] [project_root]
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from github_api import cache_dir
+from version_tags import previous_tag
+
+# Conventional commit type -> CHANGELOG heading
+SECTION_TYPES = {
+    "feat": "Added",
+    "perf": "Changed",
+    "refactor": "Changed",
+    "deprecate": "Deprecated",
+    "remove": "Removed",
+    "fix": "Fixed",
+    "security": "Security",
+    "sec": "Security",
+}
+
+# Heading order of a Keep a Changelog entry
+SECTION_ORDER = ("Added", "Changed", "Deprecated", "Removed", "Fixed", "Security")
+
+SECURITY_SCOPES = {"security", "sec"}
+
+# "type(scope)!: description"
+HEADER_RE = re.compile(r'^(?P<type>[A-Za-z]+)(?:\((?P<scope>[^()\r\n]*)\))?(?P<breaking>!)?:[ \t]+(?P<description>\S.*)$')
+BREAKING_FOOTER_RE = re.compile(r'^BREAKING[ -]CHANGE:', re.M)
+
+# (heading, bullet text)
+Entry = Tuple[str, str]
+
+
+def run_git(args: List[str], project_root: Path) -> Tuple[int, str]:
+    try:
+        result = subprocess.run(["git"] + args, cwd=project_root, capture_output=True, text=True)
+    except FileNotFoundError:
+        return 1, ""
+    return result.returncode, result.stdout.strip()
+
+
+def parse_commit(sha: str, message: str) -> Optional[Entry]:
+    """(heading, bullet) for a conventional commit of a listed type, else None"""
+    subject, _, body = message.strip().partition("\n")
+    match = HEADER_RE.match(subject.strip())
+    if not match:
+        return None
+    commit_type = match.group("type").lower()
+    scope = (match.group("scope") or "").strip()
+    heading = SECTION_TYPES.get(commit_type)
+    if scope.lower() in SECURITY_SCOPES:
+        # The heading already says it
+        heading, scope = "Security", ""
+    if heading is None:
+        return None
+
+    text = match.group("description").strip()
+    if scope:
+        text = f"**{scope}:** {text}"
+    if match.group("breaking") or BREAKING_FOOTER_RE.search(body):
+        text = f"**BREAKING:** {text}"
+    return heading, f"{text} ({sha[:7]})"
+
+
+def iter_z_records(stream: BinaryIO, chunk_size: int = 65536) -> Iterator[str]:
+    """
+    Yield NUL-terminated records from a binary stream as they arrive.
+
+    A copy of iter_z_records in pr-assistant/scripts/analyze_changes.py,
+    minus its read budget (skills don't import from each other); keep the
+    two in sync.
+    """
+    read = getattr(stream, "read1", stream.read)
+    pending = b""
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        complete, sep, pending = (pending + chunk).rpartition(b"\0")
+        if sep:
+            yield from complete.decode("utf-8", errors="replace").split("\0")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def scan_commits(project_root: Path, revs: List[str]) -> Tuple[List[Entry], int]:
+    """
+    One streamed `git log -z` pass over `revs` (newest first). Returns the
+    entries of the listed commit types and the number of commits read.
+    """
+    proc = subprocess.Popen(
+        ["git", "log", "-z", "--no-merges", "--format=%H%x00%B"] + revs + ["--"],
+        cwd=project_root,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    entries: List[Entry] = []
+    count = 0
+    try:
+        records = iter_z_records(proc.stdout)
+        for sha in records:
+            message = next(records, "")
+            count += 1
+            entry = parse_commit(sha.strip(), message)
+            if entry is not None:
+                entries.append(entry)
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"git log {' '.join(revs)} failed")
+    return entries, count
+
+
+class NotesCache:
+    """Per-tag entries with the commit they run up to, saved atomically."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.tags: Dict[str, Dict] = {}
+        if path is not None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.tags = json.load(f)
+            except (OSError, ValueError):
+                self.tags = {}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.tags, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def collect_entries(project_root: Path, tag: Optional[str] = None, use_cache: bool = True,
+                    version: Optional[str] = None) -> Tuple[Optional[str], List[Entry], int]:
+    """
+    Entries for the commits after `tag` (default: the previous version tag
+    before `version`, or the highest version tag without one; without any,
+    the whole history), newest first. Returns (tag, entries, commits read
+    by this call).
+    """
+    if not tag:
+        try:
+            tag = previous_tag(project_root, version)
+        except ValueError as e:
+            raise RuntimeError(str(e))
+    code, output = run_git(["rev-parse", "HEAD"] + ([f"{tag}^{{commit}}"] if tag else []),
+                           project_root)
+    if code != 0:
+        raise RuntimeError(f"Cannot resolve HEAD{f' and {tag}' if tag else ''}")
+    head, tag_sha = (output.split("\n") + [""])[:2]
+
+    directory = cache_dir(project_root) if use_cache else None
+    cache = NotesCache(directory / "commit-notes.json" if directory else None)
+    key = tag or ""
+    cached = cache.tags.get(key)
+    if not cached or cached.get("tag_sha") != tag_sha:
+        cached = None
+
+    if cached and cached["head"] == head:
+        return tag, [tuple(entry) for entry in cached["entries"]], 0
+
+    previous: List[Entry] = []
+    revs = [head] + ([f"^{tag_sha}"] if tag_sha else [])
+    if cached and run_git(["merge-base", "--is-ancestor", cached["head"], head], project_root)[0] == 0:
+        # Only the commits made since the cached draft
+        previous = [tuple(entry) for entry in cached["entries"]]
+        # Still exclude the tag: a merge can bring in commits it already released
+        revs = [head, f"^{cached['head']}"] + ([f"^{tag_sha}"] if tag_sha else [])
+
+    entries, count = scan_commits(project_root, revs)
+    entries += previous
+    cache.tags[key] = {"tag_sha": tag_sha, "head": head, "entries": entries}
+    cache.save()
+    return tag, entries, count
+
+
+def format_sections(entries: List[Entry]) -> str:
+    """Markdown sections in Keep a Changelog order, oldest commit first"""
+    by_heading: Dict[str, List[str]] = {}
+    for heading, text in reversed(entries):
+        by_heading.setdefault(heading, []).append(text)
+    return "\n\n".join(
+        f"### {heading}\n" + "\n".join(f"- {text}" for text in by_heading[heading])
+        for heading in SECTION_ORDER if heading in by_heading
+    )
+
+
+def commit_notes(project_root: Path, tag: Optional[str] = None, use_cache: bool = True,
+                 version: Optional[str] = None) -> str:
+    """CHANGELOG sections for the commits since `tag` (see collect_entries); "" if none qualify"""
+    _, entries, _ = collect_entries(project_root, tag, use_cache, version)
+    return format_sections(entries)
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    options = {"--since": None, "--version": None}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            if i + 1 >= len(args):
+                print("Usage: commit_notes.py [--since TAG | --version VERSION] [--no-cache] [project_root]")
+                sys.exit(1)
+            options[option] = args[i + 1]
+            del args[i:i + 2]
+    tag, version = options["--since"], options["--version"]
+    use_cache = "--no-cache" not in args
+    paths = [arg for arg in args if not arg.startswith("--")]
+    project_root = Path(paths[0]) if paths else Path.cwd()
+
+    try:
+        tag, entries, count = collect_entries(project_root, tag, use_cache, version)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"Commits since {tag or 'the first commit'}: {count} read, {len(entries)} listed", file=sys.stderr)
+    notes = format_sections(entries)
+    if notes:
+        print(notes)
+
+
+if __name__ == "__main__":
+    main()
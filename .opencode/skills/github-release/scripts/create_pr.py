@@ -1,11 +1,24 @@
 #!/usr/bin/env python3
 """
-Create Pull Request using GitHub CLI (gh)
+Create Pull Request using GitHub CLI (gh), or the GitHub API with --api
+
+Batch mode (`--batch specs.json [--jobs N]`) creates several PRs
+concurrently and prints one JSON report.
 """
 
+import argparse
+import json
+import random
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional
+
+from github_api import GitHubClient, GitHubError, RateLimitError, get_repo_info, open_client, rate_limit_error
 
 
 def check_gh_cli() -> bool:
@@ -21,16 +34,48 @@ def check_gh_cli() -> bool:
         return False
 
 
+def release_pr_body(version: str) -> str:
+    """Body of the release PR for a version"""
+    return f"""## Release v{version}
+
+This PR prepares the release for version {version}.
+
+### Changes
+
+See CHANGELOG.md for detailed changes.
+
+### Release Checklist
+
+- [ ] Version updated in package.json
+- [ ] CHANGELOG.md updated
+- [ ] Manual testing completed
+
+### Post-Merge Steps
+
+After merging this PR:
+
+1. Checkout main branch and pull latest changes
+2. Create GitHub Release with tag `v{version}`
+"""
+
+
 def create_pr(
     project_root: Path,
     from_branch: str,
     to_branch: str,
     title: str,
-    body: str
+    body: str,
+    client: Optional[GitHubClient] = None,
+    repo: Optional[str] = None,
+    draft: bool = False
 ) -> tuple[bool, str]:
     """
-    Create PR using gh CLI.
+    Create PR using gh CLI, or through `client` when given (in `repo`,
+    "owner/name", defaulting to the origin remote); `draft` opens it as a draft.
     """
+    if client is not None:
+        return create_pr_api(client, project_root, from_branch, to_branch, title, body, repo, draft)
+
     try:
         # Check if PR already exists
         check_proc = subprocess.run(
@@ -50,7 +95,7 @@ def create_pr(
                 "--head", from_branch,
                 "--title", title,
                 "--body", body
-            ],
+            ] + (["--draft"] if draft else []),
             cwd=project_root,
             capture_output=True,
             text=True
@@ -65,50 +110,280 @@ def create_pr(
         return False, str(e)
 
 
+def create_pr_api(
+    client: GitHubClient,
+    project_root: Path,
+    from_branch: str,
+    to_branch: str,
+    title: str,
+    body: str,
+    repo: Optional[str] = None,
+    draft: bool = False
+) -> tuple[bool, str]:
+    """
+    Create PR through the GitHub API. The existence check is a conditional
+    request, so repeating it for an unchanged PR list costs no rate limit.
+    """
+    owner, name = repo.split("/", 1) if repo else get_repo_info(project_root)
+    if not owner:
+        return False, "Could not determine GitHub repository from the origin remote"
+
+    try:
+        if client.find_pull(owner, name, from_branch, to_branch):
+            return False, "PR already exists"
+        pull = client.create_pull(owner, name, from_branch, to_branch, title, body, draft)
+        return True, pull["html_url"]
+    except (GitHubError, OSError) as e:
+        return False, str(e)
+
+
+class RateLimitScheduler:
+    """
+    Shared pacing for concurrent requests: at most `limit` run at once, and
+    a rate limit pauses every worker. Each rate limit halves the limit, and
+    each success raises it by one up to `max_workers`.
+    """
+
+    def __init__(self, max_workers: int, base_delay: float = 1.0, max_delay: float = 300.0):
+        self.max_workers = max_workers
+        self.limit = max_workers
+        self.active = 0
+        self.resume_at = 0.0
+        self.failures = 0
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Wait for the pause to end and for a free slot."""
+        with self._cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait <= 0 and self.active < self.limit:
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+    def rate_limited(self, retry_after: Optional[float], backoff: bool = False) -> float:
+        """
+        Pause all workers: Retry-After if given, else exponential backoff with
+        jitter, starting from `retry_after` when `backoff` is set (a rate limit
+        with no wait from the server) or from base_delay.
+        """
+        with self._cond:
+            self.failures += 1
+            if retry_after and not backoff:
+                delay = retry_after
+            else:
+                base = retry_after if backoff and retry_after else self.base_delay
+                delay = min(self.max_delay, base * 2 ** (self.failures - 1))
+                delay *= random.uniform(1.0, 1.5)
+            self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            self.limit = max(1, self.limit // 2)
+            return delay
+
+    def succeeded(self) -> None:
+        with self._cond:
+            self.failures = 0
+            if self.limit < self.max_workers:
+                self.limit += 1
+                self._cond.notify_all()
+
+
+def load_batch(spec_path: Path) -> list[dict]:
+    """
+    Read PR specs: a JSON list of {"head", "base", "title", "body_file"}
+    objects, with body files relative to the spec file.
+    """
+    with open(spec_path, encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError(f"{spec_path}: expected a list of PR specs")
+    for spec in specs:
+        missing = [key for key in ("head", "base", "title", "body_file")
+                   if not isinstance(spec, dict) or not isinstance(spec.get(key), str)]
+        if missing:
+            raise ValueError(f"{spec_path}: PR spec missing {', '.join(missing)}: {spec}")
+        if not isinstance(spec.get("draft", False), bool):
+            raise ValueError(f"{spec_path}: \"draft\" must be true or false: {spec}")
+    return specs
+
+
+def batch_attempt(project_root: Path, spec: dict, body: str, client: Optional[GitHubClient],
+                  repo: tuple[str, str]) -> tuple[str, str]:
+    """
+    One existence check + creation for a spec: ("created", url),
+    ("exists", message) or ("failed", error). Raises RateLimitError.
+    """
+    head, base, title = spec["head"], spec["base"], spec["title"]
+    if client is None:
+        success, message = create_pr(project_root, head, base, title, body, draft=spec.get("draft", False))
+        if success:
+            return "created", message
+        if message == "PR already exists":
+            return "exists", message
+        error = rate_limit_error(None, message)
+        if error is not None:
+            raise error
+        return "failed", message
+
+    owner, name = repo
+    try:
+        existing = client.find_pull(owner, name, head, base)
+        if existing:
+            return "exists", existing.get("html_url", "PR already exists")
+        pull = client.create_pull(owner, name, head, base, title, body, spec.get("draft", False))
+        return "created", pull["html_url"]
+    except RateLimitError:
+        raise
+    except (GitHubError, OSError) as e:
+        return "failed", str(e)
+
+
+def create_prs(
+    project_root: Path,
+    specs: list[dict],
+    base_dir: Path,
+    client: Optional[GitHubClient] = None,
+    jobs: int = 4,
+    max_attempts: int = 5
+) -> dict:
+    """
+    Create PRs for all specs concurrently (at most `jobs` at a time) and
+    return a report with one result per spec, in spec order. A failing or
+    rate-limited PR never blocks the others.
+    """
+    start = time.monotonic()
+    scheduler = RateLimitScheduler(jobs)
+    repo = get_repo_info(project_root) if client is not None else (None, None)
+
+    def run(spec: dict) -> dict:
+        result = {"head": spec["head"], "base": spec["base"], "title": spec["title"], "attempts": 0}
+        if client is not None and not repo[0]:
+            return dict(result, status="failed",
+                        error="Could not determine GitHub repository from the origin remote")
+        try:
+            body = (base_dir / spec["body_file"]).read_text(encoding="utf-8")
+        except OSError as e:
+            return dict(result, status="failed", error=str(e))
+
+        for attempt in range(1, max_attempts + 1):
+            result["attempts"] = attempt
+            try:
+                with scheduler.slot():
+                    status, message = batch_attempt(project_root, spec, body, client, repo)
+            except RateLimitError as e:
+                if attempt == max_attempts:
+                    return dict(result, status="failed", error=str(e))
+                scheduler.rate_limited(e.retry_after, e.backoff)
+                continue
+            scheduler.succeeded()
+            key = "url" if status != "failed" else "error"
+            return dict(result, status=status, **{key: message})
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(run, specs))
+
+    counts = {status: sum(r["status"] == status for r in results) for status in ("created", "exists", "failed")}
+    return {
+        **counts,
+        "elapsed_ms": round((time.monotonic() - start) * 1000),
+        "results": results,
+    }
+
+
+def batch_main(argv: list[str]) -> int:
+    """--batch mode: create PRs from a spec file and print a JSON report"""
+    parser = argparse.ArgumentParser(prog="create_pr.py --batch",
+                                     description="Create several PRs concurrently from a spec file")
+    parser.add_argument("--batch", required=True, metavar="SPECS_JSON",
+                        help='JSON list of {"head", "base", "title", "body_file"[, "draft"]}')
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent PRs (default: %(default)s)")
+    parser.add_argument("--api", action="store_true", help="use the GitHub API instead of gh")
+    parser.add_argument("--report", metavar="FILE", help="write the JSON report here instead of stdout")
+    parser.add_argument("project_root", nargs="?", type=Path, default=Path.cwd())
+    args = parser.parse_args(argv)
+
+    spec_path = Path(args.batch)
+    try:
+        specs = load_batch(spec_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid batch file: {e}", file=sys.stderr)
+        return 1
+
+    client = None
+    if args.api:
+        client = open_client(args.project_root)
+        if client is None:
+            print("❌ No GitHub token (set GITHUB_TOKEN or run gh auth login)", file=sys.stderr)
+            return 1
+        # The scheduler handles every wait, so workers pause together
+        client.max_wait = 0
+        client.max_connections = max(client.max_connections, args.jobs)
+    elif not check_gh_cli():
+        print("❌ GitHub CLI (gh) is not installed or not authenticated", file=sys.stderr)
+        return 1
+
+    try:
+        report = create_prs(args.project_root, specs, spec_path.parent, client, args.jobs)
+    finally:
+        if client is not None:
+            client.close()
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        Path(args.report).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    return 1 if report["failed"] else 0
+
+
 def main():
     """Main entry point"""
-    if len(sys.argv) < 4:
-        print("Usage: create_pr.py <from_branch> <to_branch> <version> [project_root]")
+    if "--batch" in sys.argv:
+        sys.exit(batch_main(sys.argv[1:]))
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    use_api = "--api" in sys.argv
+    if len(args) < 3:
+        print("Usage: create_pr.py <from_branch> <to_branch> <version> [project_root] [--api]")
         sys.exit(1)
     
-    from_branch = sys.argv[1]
-    to_branch = sys.argv[2]
-    version = sys.argv[3]
-    project_root = Path(sys.argv[4]) if len(sys.argv) > 4 else Path.cwd()
+    from_branch = args[0]
+    to_branch = args[1]
+    version = args[2]
+    project_root = Path(args[3]) if len(args) > 3 else Path.cwd()
     
-    # Check gh CLI
-    if not check_gh_cli():
+    client = None
+    if use_api:
+        client = open_client(project_root)
+        if client is None:
+            print("❌ No GitHub token (set GITHUB_TOKEN or run gh auth login)")
+            sys.exit(1)
+    elif not check_gh_cli():
         print("❌ GitHub CLI (gh) is not installed or not authenticated")
         sys.exit(1)
     
     # Generate PR title and body
     title = f"Release v{version}"
-    body = f"""## Release v{version}
-
-This PR prepares the release for version {version}.
-
-### Changes
-
-See CHANGELOG.md for detailed changes.
-
-### Release Checklist
-
-- [ ] Version updated in package.json
-- [ ] CHANGELOG.md updated
-- [ ] Manual testing completed
-
-### Post-Merge Steps
-
-After merging this PR:
-
-1. Checkout main branch and pull latest changes
-2. Create GitHub Release with tag `v{version}`
-"""
+    body = release_pr_body(version)
     
     print(f"Creating PR: {from_branch} → {to_branch}")
     print(f"Title: {title}")
     
-    success, message = create_pr(project_root, from_branch, to_branch, title, body)
+    try:
+        success, message = create_pr(project_root, from_branch, to_branch, title, body, client)
+    finally:
+        if client is not None:
+            client.close()
     
     if success:
         print("✅ Pull Request created successfully")
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """
-Create GitHub Release using GitHub CLI (gh)
+Create GitHub Release using GitHub CLI (gh), or the GitHub API with --api
 """
 
 import subprocess
 import sys
 from pathlib import Path
+from typing import Optional
+
+from changelog_index import read_section
+from github_api import GitHubClient, GitHubError, get_repo_info, open_client
+from release_notes import range_notes
 
 
 def check_gh_cli() -> bool:
@@ -22,48 +27,38 @@ def check_gh_cli() -> bool:
 
 
 def read_changelog_section(changelog_path: Path, version: str) -> str:
-    """Extract changelog section for specific version"""
+    """
+    Extract changelog section for specific version (exact match, through
+    the version index in changelog_index.py)
+    """
     if not changelog_path.exists():
         return ""
-    
-    with open(changelog_path) as f:
-        lines = f.readlines()
-    
-    section_lines = []
-    in_section = False
-    
-    # Try with and without v prefix in changelog headers
-    target_header = f"## [{version}]"
-    
-    for line in lines:
-        # Start of our version section
-        if target_header in line:
-            in_section = True
-            continue
-        
-        # Start of next section (stop)
-        if in_section and line.startswith("## ["):
-            break
-        
-        # Collect section content
-        if in_section:
-            section_lines.append(line)
-    
-    return "".join(section_lines).strip()
+    return read_section(changelog_path, version)
 
 
 def create_release(
     project_root: Path,
     version: str,
-    draft: bool = True
+    draft: bool = True,
+    client: Optional[GitHubClient] = None,
+    repo: Optional[str] = None,
+    since: Optional[str] = None
 ) -> tuple[bool, str]:
     """
-    Create GitHub Release.
+    Create GitHub Release using gh CLI, or through `client` when given (in
+    `repo`, "owner/name", defaulting to the origin remote). With `since`,
+    the notes merge every CHANGELOG section after that version up to this one.
     """
     
     # Generate release notes
     changelog_path = project_root / "CHANGELOG.md"
-    changelog_notes = read_changelog_section(changelog_path, version)
+    if since:
+        try:
+            _, changelog_notes = range_notes(changelog_path, f"{since}..{version}")
+        except (OSError, ValueError) as e:
+            return False, str(e)
+    else:
+        changelog_notes = read_changelog_section(changelog_path, version)
     
     tag_name = f"v{version}"
     
@@ -78,6 +73,16 @@ def create_release(
 See full changelog at CHANGELOG.md
 """
     
+    if client is not None:
+        owner, name = repo.split("/", 1) if repo else get_repo_info(project_root)
+        if not owner:
+            return False, "Could not determine GitHub repository from the origin remote"
+        try:
+            release = client.create_release(owner, name, tag_name, tag_name, notes, draft)
+            return True, release["html_url"]
+        except (GitHubError, OSError) as e:
+            return False, str(e)
+
     # Build gh release create command
     cmd = [
         "gh", "release", "create",
@@ -109,20 +114,35 @@ See full changelog at CHANGELOG.md
 def main():
     """Main entry point"""
     if len(sys.argv) < 2:
-        print("Usage: create_release.py <version> [--publish] [project_root]")
+        print("Usage: create_release.py <version> [--publish] [--api] [--since VERSION] [project_root]")
         sys.exit(1)
     
     version = sys.argv[1]
     publish = "--publish" in sys.argv
+    use_api = "--api" in sys.argv
     
+    since = None
     project_root = Path.cwd()
-    for arg in sys.argv[2:]:
+    args = sys.argv[2:]
+    if "--since" in args:
+        i = args.index("--since")
+        if i + 1 >= len(args):
+            print("❌ --since needs a version")
+            sys.exit(1)
+        since = args[i + 1]
+        del args[i:i + 2]
+    for arg in args:
         if not arg.startswith("--"):
             project_root = Path(arg)
             break
     
-    # Check gh CLI
-    if not check_gh_cli():
+    client = None
+    if use_api:
+        client = open_client(project_root)
+        if client is None:
+            print("❌ No GitHub token (set GITHUB_TOKEN or run gh auth login)")
+            sys.exit(1)
+    elif not check_gh_cli():
         print("❌ GitHub CLI (gh) is not installed or not authenticated")
         sys.exit(1)
     
@@ -130,7 +150,12 @@ def main():
     draft_str = "draft " if not publish else ""
     print(f"Creating {draft_str}release with tag: v{version}")
     
-    success, message = create_release(project_root, version, draft=not publish)
+    try:
+        success, message = create_release(project_root, version, draft=not publish, client=client,
+                                          since=since)
+    finally:
+        if client is not None:
+            client.close()
     
     if success:
         print(f"✅ Release {draft_str}created successfully")
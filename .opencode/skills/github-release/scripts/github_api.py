@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Minimal GitHub REST client for create_pr.py and create_release.py
+
+An alternative to spawning `gh` for every call: one process, pooled
+keep-alive connections (a single TLS handshake for a whole run), ETag
+conditional requests for lookups, and rate-limit header handling.
+
+- Base URL: `GITHUB_API_URL` (default https://api.github.com), so the client
+  works against GitHub Enterprise or a local stub server.
+- Token: `GITHUB_TOKEN` or `GH_TOKEN`, else `gh auth token`.
+- Conditional GETs: ETags and bodies are kept in an optional on-disk cache;
+  a `304 Not Modified` reuses the cached body and does not count against the
+  rate limit.
+- Rate limits: the latest `X-RateLimit-*` headers are kept in
+  `client.rate_limit`. On 403/429 rate-limit responses the client waits and
+  retries (up to RATE_LIMIT_MAX_RETRIES times, waiting at least
+  RATE_LIMIT_MIN_RETRY seconds) when the server asks for at most `max_wait`
+  seconds, and raises RateLimitError (with `retry_after`) otherwise. rate_limit_error() is the
+  one classifier, also used for gh's error output: a rejection without
+  Retry-After or an exhausted X-RateLimit-Remaining (as secondary rate
+  limits often are) is still a rate limit when its message says so, and
+  is retried with an exponential backoff from RATE_LIMIT_MIN_WAIT seconds.
+"""
+
+import http.client
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_API_URL = "https://api.github.com"
+USER_AGENT = "multi-agent-ff15-github-release"
+
+# First wait for a rate limit that gives no Retry-After or reset time
+RATE_LIMIT_MIN_WAIT = 60.0
+
+# Shortest wait for any rate limit (a reset already past, e.g. from clock
+# skew, would otherwise be retried at once), and retries per request
+RATE_LIMIT_MIN_RETRY = 1.0
+RATE_LIMIT_MAX_RETRIES = 5
+
+# Methods that are safe to send again after the connection dropped
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "PUT", "DELETE"))
+
+# "HTTP 403: ..." in gh's error output
+HTTP_STATUS_RE = re.compile(r'\bHTTP (\d{3})\b')
+
+
+class GitHubError(Exception):
+    """Request failed; carries the HTTP status and GitHub's message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class RateLimitError(GitHubError):
+    """
+    Primary or secondary rate limit hit; `retry_after` is in seconds. With
+    `backoff` the server gave no wait, and `retry_after` is the first step
+    of an exponential backoff.
+    """
+
+    def __init__(self, status: int, message: str, retry_after: float, backoff: bool = False):
+        super().__init__(status, message)
+        self.retry_after = retry_after
+        self.backoff = backoff
+
+
+def rate_limit_error(status: Optional[int], message: str,
+                     headers: Optional[http.client.HTTPMessage] = None) -> Optional[RateLimitError]:
+    """
+    RateLimitError for a rate-limit rejection, else None. `status` None
+    (gh's output) is read from an "HTTP nnn" in the message, defaulting to 403.
+    """
+    if status is None:
+        match = HTTP_STATUS_RE.search(message)
+        status = int(match.group(1)) if match else 403
+    if status not in (403, 429):
+        return None
+    if headers is not None:
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return RateLimitError(status, message, max(RATE_LIMIT_MIN_RETRY, float(retry_after)))
+        if headers.get("X-RateLimit-Remaining") == "0":
+            reset = headers.get("X-RateLimit-Reset", "")
+            if reset.isdigit():
+                return RateLimitError(status, message, max(RATE_LIMIT_MIN_RETRY, int(reset) - time.time()))
+            return RateLimitError(status, message, RATE_LIMIT_MIN_WAIT, backoff=True)
+    # Secondary rate limits often carry neither header, only the message
+    if status == 429 or "rate limit" in message.lower():
+        return RateLimitError(status, message, RATE_LIMIT_MIN_WAIT, backoff=True)
+    return None
+
+
+def get_token() -> Optional[str]:
+    """API token from the environment, falling back to the gh CLI's login"""
+    token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+    if token:
+        return token
+    try:
+        result = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 and result.stdout.strip() else None
+
+
+def parse_remote_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """(owner, repo) of a GitHub remote URL (https or ssh)"""
+    if url.endswith(".git"):
+        url = url[:-4]
+    if "github.com" in url:
+        parts = url.split("github.com")[-1].strip(":/").split("/")
+        if len(parts) >= 2:
+            return parts[0], parts[1]
+    return None, None
+
+
+def get_repo_info(project_root: Path) -> Tuple[Optional[str], Optional[str]]:
+    """Get GitHub repo owner and name from the origin remote"""
+    try:
+        result = subprocess.run(
+            ["git", "remote", "get-url", "origin"],
+            cwd=project_root,
+            capture_output=True,
+            text=True
+        )
+    except FileNotFoundError:
+        return None, None
+    if result.returncode != 0:
+        return None, None
+    return parse_remote_url(result.stdout.strip())
+
+
+def git_common_dir(project_root: Path) -> Optional[Path]:
+    """The repository's (common) git dir, where refs and packed-refs live"""
+    git_dir = Path(project_root) / ".git"
+    if git_dir.is_dir():
+        return git_dir
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--path-format=absolute", "--git-common-dir"],
+            cwd=project_root,
+            capture_output=True,
+            text=True
+        )
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    return Path(result.stdout.strip())
+
+
+def cache_dir(project_root: Path) -> Optional[Path]:
+    """The release scripts' cache directory under the repository's git dir"""
+    git_dir = git_common_dir(project_root)
+    return git_dir / "github-release" if git_dir else None
+
+
+def default_cache_path(project_root: Path) -> Optional[Path]:
+    """ETag cache location under the repository's git dir"""
+    directory = cache_dir(project_root)
+    return directory / "etags.json" if directory else None
+
+
+class ETagCache:
+    """URL -> (ETag, JSON body) store, loaded once and saved atomically."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.dirty = False
+        if path is not None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.entries.get(url)
+
+    def put(self, url: str, etag: str, data) -> None:
+        self.entries[url] = {"etag": etag, "data": data}
+        self.dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError:
+            pass
+
+
+def open_client(project_root: Path, base_url: Optional[str] = None) -> Optional["GitHubClient"]:
+    """Client with the user's token and the repository's ETag cache (None without a token)"""
+    token = get_token()
+    if not token:
+        return None
+    return GitHubClient(token, base_url, ETagCache(default_cache_path(project_root)))
+
+
+class GitHubClient:
+    """GitHub REST API client over a pool of keep-alive connections."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cache: Optional[ETagCache] = None,
+        max_connections: int = 8,
+        max_wait: float = 60.0,
+        timeout: float = 30.0
+    ):
+        self.token = token
+        parsed = urllib.parse.urlsplit(base_url or os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL)
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.prefix = parsed.path.rstrip("/")
+        self.cache = cache or ETagCache()
+        self.max_connections = max_connections
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.rate_limit: Dict[str, int] = {}
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    # Connection pool
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """An idle connection (reused=True) or a new one."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close pooled connections and save the ETag cache."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        self.cache.save()
+
+    def __enter__(self) -> "GitHubClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Requests
+
+    def _send(self, method: str, path: str, body: Optional[bytes],
+              headers: Dict[str, str]) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Send one request on a pooled connection. A reused connection the
+        server has closed in the meantime is replaced once, for idempotent
+        methods only: a POST may have been processed before the connection
+        dropped, and sending it again could create a second PR or release.
+        """
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and method in IDEMPOTENT_METHODS:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return response.status, response.headers, data
+
+    def _update_rate_limit(self, headers: http.client.HTTPMessage) -> None:
+        for name in ("limit", "remaining", "reset", "used"):
+            value = headers.get(f"X-RateLimit-{name.capitalize()}")
+            if value is not None and value.isdigit():
+                self.rate_limit[name] = int(value)
+
+    def request(self, method: str, path: str, payload=None, conditional: bool = False):
+        """
+        Send a request and return the decoded JSON body. With `conditional`,
+        a cached ETag is sent as If-None-Match and a 304 returns the cached body.
+        """
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "User-Agent": USER_AGENT,
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        cache_key = f"{self.host}{self.prefix}{path}"
+        cached = self.cache.get(cache_key) if conditional else None
+        if cached:
+            headers["If-None-Match"] = cached["etag"]
+
+        backoffs = retries = 0
+        while True:
+            status, response_headers, data = self._send(method, path, body, headers)
+            self._update_rate_limit(response_headers)
+            error = rate_limit_error(status, self._message(data), response_headers) if status in (403, 429) else None
+            if error is None:
+                break
+            wait = error.retry_after
+            if error.backoff:
+                wait *= 2 ** backoffs
+                backoffs += 1
+            if wait > self.max_wait or retries >= RATE_LIMIT_MAX_RETRIES:
+                error.retry_after = wait
+                raise error
+            retries += 1
+            time.sleep(wait)
+
+        if status == 304 and cached:
+            return cached["data"]
+        if status >= 400:
+            raise GitHubError(status, self._message(data))
+        result = json.loads(data) if data else None
+        etag = response_headers.get("ETag")
+        if conditional and etag:
+            self.cache.put(cache_key, etag, result)
+        return result
+
+    @staticmethod
+    def _message(data: bytes) -> str:
+        try:
+            return json.loads(data).get("message", "")
+        except (ValueError, AttributeError):
+            return data.decode("utf-8", "replace").strip()
+
+    # Endpoints
+
+    def find_pull(self, owner: str, repo: str, head: str, base: str) -> Optional[Dict]:
+        """The open PR from `head` into `base`, if any (conditional GET)."""
+        query = urllib.parse.urlencode({"head": f"{owner}:{head}", "base": base, "state": "open"})
+        pulls = self.request("GET", f"/repos/{owner}/{repo}/pulls?{query}", conditional=True)
+        return pulls[0] if pulls else None
+
+    def create_pull(self, owner: str, repo: str, head: str, base: str, title: str, body: str,
+                    draft: bool = False) -> Dict:
+        return self.request("POST", f"/repos/{owner}/{repo}/pulls", {
+            "head": head, "base": base, "title": title, "body": body, "draft": draft,
+        })
+
+    def create_release(self, owner: str, repo: str, tag: str, name: str, body: str,
+                       draft: bool = True) -> Dict:
+        return self.request("POST", f"/repos/{owner}/{repo}/releases", {
+            "tag_name": tag, "name": name, "body": body, "draft": draft,
+        })
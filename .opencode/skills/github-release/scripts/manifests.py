@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Version fields of every package manifest in a (mono)repo
+
+- Discovery: the MANIFEST_NAMES files git tracks (`git ls-files`), so
+  ignored build output and stray untracked manifests are never bumped or
+  staged; outside a git work tree, one directory walk. Either way nothing
+  under PRUNE_DIRS or hidden directories is included.
+- Reading: the manifests are read and parsed in a thread pool (up to one
+  worker per CPU).
+- Patching: only the bytes of the version value are replaced, so
+  indentation, key order, comments and line endings stay as they were.
+- Writing: every patched file is first written to a temporary file next to
+  it, and the originals are only replaced (os.replace) once all of them
+  were written, so a failure leaves every manifest untouched.
+
+Version locations:
+- package.json: the top-level "version" (not e.g. a dependency's)
+- pyproject.toml: `version` in [project] or [tool.poetry]
+- Cargo.toml: `version` in [package] or [workspace.package]
+
+A manifest without a static version (`dynamic = ["version"]`,
+`version.workspace = true`, a private package.json without one) is listed
+but left alone.
+"""
+
+import json
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_NAMES = ("package.json", "pyproject.toml", "Cargo.toml")
+
+# Directories never searched for manifests (hidden directories neither);
+# fixtures and examples carry manifests that are not released packages
+PRUNE_DIRS = {
+    "node_modules", "bower_components", "vendor", "dist", "build", "out", "target",
+    "coverage", "venv", "env", "__pycache__", "site-packages",
+    "fixtures", "__fixtures__", "testdata", "examples",
+}
+
+# TOML tables holding the version, per manifest name
+TOML_VERSION_TABLES = {
+    "pyproject.toml": (b"project", b"tool.poetry"),
+    "Cargo.toml": (b"package", b"workspace.package"),
+}
+
+# JSON strings and structural characters; everything else is skipped
+JSON_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+
+# TOML table headers and `version = "..."` lines
+TOML_LINE_RE = re.compile(
+    rb'^[ \t]*\[\[?[ \t]*([^\]\r\n]*?)[ \t]*\]\]?[ \t]*(?:#[^\r\n]*)?\r?$'
+    rb'|^[ \t]*version[ \t]*=[ \t]*(["\'])([^"\'\r\n]*)\2',
+    re.M
+)
+
+
+class Manifest:
+    """One manifest: its version and the byte span holding it."""
+
+    def __init__(self, path: Path, data: bytes = b"", span: Optional[Tuple[int, int]] = None,
+                 error: Optional[str] = None):
+        self.path = path
+        self.data = data
+        self.span = span
+        self.error = error
+
+    @property
+    def version(self) -> Optional[str]:
+        if self.span is None:
+            return None
+        return self.data[self.span[0]:self.span[1]].decode("utf-8", "replace")
+
+    def patched(self, new_version: str) -> bytes:
+        """
+        The file's bytes with only the version value replaced; a package.json
+        without one gets a "version" key first in its top-level object.
+        """
+        if self.span is None:
+            if self.path.name != "package.json":
+                raise ValueError(f"{self.path}: no version field to update")
+            return json_insert_version(self.data, new_version)
+        start, end = self.span
+        return self.data[:start] + new_version.encode("utf-8") + self.data[end:]
+
+
+def pruned(parts: Tuple[str, ...]) -> bool:
+    """Whether a path's directories include a PRUNE_DIRS or hidden one"""
+    return any(part in PRUNE_DIRS or part.startswith(".") for part in parts)
+
+
+def tracked_manifests(project_root: Path) -> Optional[List[Path]]:
+    """Manifests git tracks under project_root, or None outside a work tree"""
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--"] + [f"*{name}" for name in MANIFEST_NAMES],
+            cwd=project_root,
+            capture_output=True
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    found = []
+    for name in result.stdout.decode("utf-8", "surrogateescape").split("\0"):
+        parts = tuple(name.split("/"))
+        # "*package.json" also matches e.g. "mypackage.json"
+        if parts[-1] in MANIFEST_NAMES and not pruned(parts[:-1]):
+            path = Path(project_root, *parts)
+            if path.is_file():
+                found.append(path)
+    return found
+
+
+def walk_manifests(project_root: Path) -> List[Path]:
+    """Manifests under project_root, pruned walk"""
+    found = []
+    pending = [Path(project_root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not pruned((entry.name,)):
+                            pending.append(Path(entry.path))
+                    elif entry.name in MANIFEST_NAMES and entry.is_file():
+                        found.append(Path(entry.path))
+        except OSError:
+            continue
+    return found
+
+
+def find_manifests(project_root: Path) -> List[Path]:
+    """Manifests under project_root (root first, then sorted): tracked ones, else a walk"""
+    found = tracked_manifests(project_root)
+    if found is None:
+        found = walk_manifests(project_root)
+    root = Path(project_root)
+    return sorted(found, key=lambda path: (path.parent != root, str(path.relative_to(root))))
+
+
+def json_version_span(data: bytes) -> Optional[Tuple[int, int]]:
+    """Span of the top-level "version" string value in JSON bytes"""
+    depth = 0
+    key = None
+    expect_key = False
+    after_colon = False
+    for match in JSON_TOKEN_RE.finditer(data):
+        token = match.group()
+        if token in (b"{", b"["):
+            if after_colon and depth == 1:
+                key = None
+            depth += 1
+            expect_key = token == b"{" and depth == 1
+            after_colon = False
+        elif token in (b"}", b"]"):
+            depth -= 1
+            after_colon = False
+        elif depth != 1:
+            continue
+        elif token == b",":
+            expect_key = True
+            key = None
+        elif token == b":":
+            after_colon = True
+        elif expect_key:
+            key = token
+            expect_key = False
+        elif after_colon:
+            if key == b'"version"':
+                return match.start() + 1, match.end() - 1
+            after_colon = False
+    return None
+
+
+def json_insert_version(data: bytes, version: str) -> bytes:
+    """JSON bytes with `"version": ...` added as the first top-level key"""
+    match = re.match(rb'(\xef\xbb\xbf)?\s*\{(\s*)', data)
+    if not match:
+        raise ValueError("not a JSON object")
+    field = b'"version": "' + version.encode("utf-8") + b'"'
+    rest = data[match.end():]
+    if rest.startswith(b"}"):
+        return data[:match.end()] + field + rest
+    return data[:match.end()] + field + b"," + (match.group(2) or b" ") + rest
+
+
+def toml_version_span(data: bytes, tables: Tuple[bytes, ...]) -> Optional[Tuple[int, int]]:
+    """Span of `version = "..."` in the first of `tables` that has one"""
+    table = b""
+    for match in TOML_LINE_RE.finditer(data):
+        if match.group(1) is not None:
+            table = match.group(1)
+        elif table in tables:
+            return match.start(3), match.end(3)
+    return None
+
+
+def read_manifest(path: Path) -> Manifest:
+    """Read a manifest and locate its version"""
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        return Manifest(path, error=str(e))
+    if path.name == "package.json":
+        try:
+            json.loads(data)
+        except ValueError:
+            return Manifest(path, data, error="invalid JSON")
+        span = json_version_span(data)
+    else:
+        span = toml_version_span(data, TOML_VERSION_TABLES[path.name])
+    return Manifest(path, data, span)
+
+
+def read_all(paths: List[Path], jobs: int = 8) -> List[Manifest]:
+    """Read manifests in a thread pool (one worker per CPU at most), keeping their order"""
+    jobs = min(jobs, os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        return [read_manifest(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(read_manifest, paths))
+
+
+def read_manifests(project_root: Path, jobs: int = 8) -> List[Manifest]:
+    """Every manifest of the repository, read in parallel, in find_manifests order"""
+    return read_all(find_manifests(project_root), jobs)
+
+
+def stage_file(path: Path, data: bytes) -> str:
+    """Write and sync `data` to a temporary file next to `path`, with its mode"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+
+def write_atomically(files: Dict[Path, bytes], jobs: int = 8) -> None:
+    """
+    Replace several files' contents: all temporary files are written and
+    synced first (in parallel), then renamed over the originals. If any
+    of them fails, nothing is changed.
+    """
+    if not files:
+        return
+    with ThreadPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+        futures = {path: pool.submit(stage_file, path, data) for path, data in files.items()}
+    staged, error = [], None
+    for path, future in futures.items():
+        try:
+            staged.append((future.result(), path))
+        except OSError as e:
+            error = error or e
+    if error is not None:
+        for tmp, _ in staged:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        raise error
+    for tmp, path in staged:
+        os.replace(tmp, path)
+
+
+def set_versions(manifests: List[Manifest], new_version: str,
+                 add_to: Optional[Path] = None) -> List[Tuple[Manifest, Optional[str]]]:
+    """
+    Patch every manifest that has a version to `new_version` (and add one
+    to the package.json at `add_to` if it has none), written atomically
+    together. Returns (manifest, old version) of each file changed.
+    """
+    changed = [(m, m.version) for m in manifests
+               if m.error is None and (m.span is not None or m.path == add_to) and m.version != new_version]
+    write_atomically({m.path: m.patched(new_version) for m, _ in changed})
+    return changed
+
+
+def version_drift(manifests: List[Manifest], project_root: Path, expected: Optional[str] = None
+                  ) -> Tuple[Optional[str], List[Manifest]]:
+    """
+    (expected version, manifests at another version). The expected version
+    defaults to the root manifest's (package.json first), else the most
+    common one.
+    """
+    versioned = [m for m in manifests if m.version is not None]
+    if expected is None and versioned:
+        root = [m for m in versioned if m.path.parent == Path(project_root)]
+        if root:
+            expected = min(root, key=lambda m: MANIFEST_NAMES.index(m.path.name)).version
+        else:
+            counts: Dict[str, int] = {}
+            for m in versioned:
+                counts[m.version] = counts.get(m.version, 0) + 1
+            expected = max(counts, key=counts.get)
+    return expected, [m for m in versioned if m.version != expected]
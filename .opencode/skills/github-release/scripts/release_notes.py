@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Release notes for a range of versions, merged per heading
+
+`FROM..TO` selects the CHANGELOG.md sections after FROM up to and including
+TO, as `git log vFROM..vTO` would: in a newest-first changelog, the sections
+from TO's heading down to (not including) FROM's. Either end may be left
+out: `1.2.0..` is everything newer than 1.2.0, `..1.5.0` is 1.5.0 and all
+older releases.
+
+The endpoints are looked up in the version index (changelog_index.py), and
+the whole span is then read with one sequential mmap slice. Bullets are
+merged under their `### Added` / `### Changed` / ... headings in order of
+first appearance. Identical bullets are kept once, and unfilled
+"TODO:" template bullets and link reference lines are dropped.
+
+Usage:
+    release_notes.py <FROM..TO> [changelog_path] [--json]
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from changelog_index import ChangelogIndex, normalize_version
+
+# "[1.2.0]: https://github.com/owner/repo/compare/v1.1.0...v1.2.0"
+LINK_REFERENCE_RE = re.compile(r'^\[[^\]]+\]:\s')
+BULLET_RE = re.compile(r'^[-*+]\s')
+PLACEHOLDER_RE = re.compile(r'^[-*+]\s+TODO:')
+
+
+def parse_range(spec: str) -> Tuple[Optional[str], Optional[str]]:
+    """(FROM, TO) of "FROM..TO"; an empty end is None"""
+    if ".." not in spec:
+        raise ValueError(f"Invalid range: {spec} (expected FROM..TO)")
+    start, end = spec.split("..", 1)
+    if not start and not end:
+        raise ValueError(f"Invalid range: {spec} (expected FROM..TO)")
+    return start or None, end or None
+
+
+def range_sections(changelog_path: Path, from_version: Optional[str],
+                   to_version: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    (version, section body) for every release after `from_version` up to and
+    including `to_version`, in file order. Raises ValueError if an end is not
+    in the changelog or the ends are in the wrong order.
+    """
+    with ChangelogIndex.load(changelog_path) as index:
+        first = 0
+        if to_version is not None:
+            first = index.position(to_version)
+            if first is None:
+                raise ValueError(f"Version {to_version} not found in {changelog_path.name}")
+        last = len(index)
+        if from_version is not None:
+            last = index.position(from_version)
+            if last is None:
+                raise ValueError(f"Version {from_version} not found in {changelog_path.name}")
+        if last < first:
+            raise ValueError(f"{normalize_version(from_version)} is newer than "
+                             f"{normalize_version(to_version)} in {changelog_path.name}")
+        entries = [index.entry(i) for i in range(first, last)]
+        if not entries:
+            return []
+        # One sequential read covering every selected section
+        base = entries[0][1]
+        span = index.read_bytes(base, entries[-1][3])
+
+    return [
+        (version, span[body - base:end - base].decode("utf-8", "replace").replace("\r\n", "\n"))
+        for version, _, body, end in entries
+    ]
+
+
+def merge_sections(bodies: Iterable[str]) -> Dict[Optional[str], List[str]]:
+    """
+    Blocks (a bullet with its indented continuation lines, or a line of
+    text) per `###` heading, in order of first appearance, each identical
+    block once. Text before a section's first heading is under None.
+    """
+    merged: Dict[Optional[str], List[str]] = {}
+    seen: Dict[Optional[str], set] = {}
+
+    for body in bodies:
+        heading = None
+        block: List[str] = []
+
+        def flush():
+            if not block:
+                return
+            text = "\n".join(block)
+            block.clear()
+            if PLACEHOLDER_RE.match(text):
+                return
+            if text not in seen.setdefault(heading, set()):
+                seen[heading].add(text)
+                merged.setdefault(heading, []).append(text)
+
+        for line in body.split("\n"):
+            line = line.rstrip()
+            if line.startswith("### "):
+                flush()
+                heading = line[4:].strip()
+            elif not line.strip() or LINK_REFERENCE_RE.match(line):
+                flush()
+            elif block and line[:1] in (" ", "\t") and not BULLET_RE.match(line):
+                block.append(line)
+            else:
+                flush()
+                block.append(line)
+        flush()
+
+    return merged
+
+
+def format_notes(merged: Dict[Optional[str], List[str]]) -> str:
+    """Markdown for merged sections: loose text first, then each heading"""
+    parts = []
+    if merged.get(None):
+        parts.append("\n".join(merged[None]))
+    for heading, blocks in merged.items():
+        if heading is not None and blocks:
+            parts.append(f"### {heading}\n" + "\n".join(blocks))
+    return "\n\n".join(parts)
+
+
+def range_notes(changelog_path: Path, spec: str) -> Tuple[List[str], str]:
+    """(versions in the range, merged notes) for a "FROM..TO" range"""
+    from_version, to_version = parse_range(spec)
+    sections = range_sections(changelog_path, from_version, to_version)
+    return [version for version, _ in sections], format_notes(merge_sections(body for _, body in sections))
+
+
+def main():
+    """Main entry point"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    as_json = "--json" in sys.argv
+    if not args:
+        print("Usage: release_notes.py <FROM..TO> [changelog_path] [--json]")
+        sys.exit(1)
+
+    spec = args[0]
+    changelog_path = Path(args[1]) if len(args) > 1 else Path.cwd() / "CHANGELOG.md"
+
+    try:
+        from_version, to_version = parse_range(spec)
+        sections = range_sections(changelog_path, from_version, to_version)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    merged = merge_sections(body for _, body in sections)
+    if as_json:
+        print(json.dumps({
+            "range": spec,
+            "versions": [version for version, _ in sections],
+            "sections": {heading or "": blocks for heading, blocks in merged.items()},
+        }, indent=2))
+    else:
+        print(format_notes(merged))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,68 @@
 #!/usr/bin/env python3
 """
 Interactive release workflow for multi-agent-ff15
+
+Usage:
+    release_workflow.py                          interactive
+    release_workflow.py --yes --bump minor       headless, default answers
+    release_workflow.py --plan-file plan.json    headless, answers from a plan
+
+A plan file is a JSON object answering the workflow's questions; missing
+keys take their defaults (PLAN_DEFAULTS), as every question does with --yes:
+
+    {"bump": "minor", "repo": "owner/repo", "allow_dirty": false,
+     "commit": true, "push": true, "create_pr": true, "pr_base": "main",
+     "create_release": true, "publish": false, "api": false,
+     "notes_from_commits": true, "preid": "rc"}
+
+"bump" is a bump type (major, minor, patch, or premajor, preminor,
+prepatch, prerelease with "preid" as the prerelease identifier) or an
+explicit SemVer version.
+
+With notes_from_commits (the default) the new CHANGELOG entry is filled
+from the conventional commits since the previous tag (commit_notes.py), so
+there are no TODO sections to wait for; the TODO template is used when no
+commit qualifies.
+
+The bump, CHANGELOG, PR and release steps are imported and run in this
+process, and the pre-flight checks run concurrently. Per-phase timings are
+printed at the end.
 """
 
+import argparse
 import json
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional
 
+from bump_version import BUMP_TYPES, bump_version, get_current_version, parse_version, write_versions
+from commit_notes import commit_notes
+from create_pr import create_pr, release_pr_body
+from create_release import create_release
+from github_api import get_repo_info, open_client
+from update_changelog import create_initial_changelog, update_changelog
 
-def run_script(script_name: str, args: list[str], project_root: Path) -> bool:
-    """Run a Python script from the scripts directory"""
-    script_path = Path(__file__).parent / script_name
-    cmd = [sys.executable, str(script_path)] + args
-    
-    try:
-        result = subprocess.run(cmd, cwd=project_root)
-        return result.returncode == 0
-    except Exception as e:
-        print(f"❌ Error running {script_name}: {e}")
-        return False
+# Plan keys with the answer used in headless mode when a key is missing
+PLAN_DEFAULTS = {
+    "bump": None,
+    "repo": None,
+    "allow_dirty": False,
+    "commit": True,
+    "push": True,
+    "create_pr": True,
+    "pr_base": "main",
+    "create_release": True,
+    "publish": False,
+    "api": False,
+    "notes_from_commits": True,
+    "preid": "rc",
+}
+
+BUMP_CHOICES = {"1": "patch", "2": "minor", "3": "major", "4": "prerelease"}
 
 
 def check_git_status(project_root: Path) -> tuple[bool, str]:
@@ -31,13 +74,13 @@ def check_git_status(project_root: Path) -> tuple[bool, str]:
             capture_output=True,
             text=True
         )
-        
+
         if result.returncode != 0:
             return False, "Git command failed"
-        
+
         if result.stdout.strip():
             return False, "Working directory has uncommitted changes"
-        
+
         return True, "Clean"
     except FileNotFoundError:
         return False, "Git not found"
@@ -57,202 +100,315 @@ def get_current_branch(project_root: Path) -> str:
         return "unknown"
 
 
-def get_repo_info(project_root: Path) -> tuple[str, str]:
-    """Get GitHub repo owner and name from git remote"""
-    try:
-        result = subprocess.run(
-            ["git", "remote", "get-url", "origin"],
-            cwd=project_root,
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            return None, None
-        
-        url = result.stdout.strip()
-        
-        if url.endswith(".git"):
-            url = url[:-4]
-        
-        if "github.com" in url:
-            parts = url.split("github.com")[-1].strip(":/").split("/")
-            if len(parts) >= 2:
-                return parts[0], parts[1]
-        
-        return None, None
-    except:
-        return None, None
+def read_package_version(project_root: Path) -> str:
+    """Version of the root manifest (or the packages' common one), or 0.0.0"""
+    return get_current_version(project_root) or "0.0.0"
+
+
+def preflight(project_root: Path) -> dict:
+    """Run the independent pre-flight checks concurrently"""
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        status = pool.submit(check_git_status, project_root)
+        branch = pool.submit(get_current_branch, project_root)
+        repo = pool.submit(get_repo_info, project_root)
+        version = pool.submit(read_package_version, project_root)
+        return {
+            "status": status.result(),
+            "branch": branch.result(),
+            "repo": repo.result(),
+            "version": version.result(),
+        }
 
 
 def prompt_yes_no(question: str, default: bool = True) -> bool:
     """Prompt user for yes/no answer"""
     default_str = "Y/n" if default else "y/N"
     response = input(f"{question} [{default_str}]: ").strip().lower()
-    
+
     if not response:
         return default
-    
+
     return response in ["y", "yes"]
 
 
+def load_plan(plan_path: Path) -> dict:
+    """Load and validate a plan file"""
+    with open(plan_path) as f:
+        plan = json.load(f)
+    if not isinstance(plan, dict):
+        raise ValueError(f"{plan_path}: expected a JSON object")
+    unknown = set(plan) - set(PLAN_DEFAULTS)
+    if unknown:
+        raise ValueError(f"{plan_path}: unknown key(s): {', '.join(sorted(unknown))}")
+    return plan
+
+
+class Answers:
+    """Answers from the plan, else defaults when headless, else the keyboard."""
+
+    def __init__(self, plan: dict, headless: bool):
+        self.plan = plan
+        self.headless = headless
+
+    def confirm(self, key: Optional[str], question: str, default: bool = True) -> bool:
+        if key in self.plan:
+            answer = bool(self.plan[key])
+            print(f"{question} {'yes' if answer else 'no'} (plan)")
+            return answer
+        if self.headless:
+            print(f"{question} {'yes' if default else 'no'} (default)")
+            return default
+        return prompt_yes_no(question, default)
+
+    def value(self, key: str) -> Optional[str]:
+        return self.plan.get(key)
+
+
+@contextmanager
+def phase(name: str, timings: dict):
+    """Print a phase header and record how long the phase took"""
+    print(name)
+    print("-" * 60)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+        print()
+
+
+def print_timings(timings: dict) -> None:
+    print("Phase timings:")
+    for name, seconds in timings.items():
+        print(f"  {name:<32} {seconds * 1000:8.0f} ms")
+    print(f"  {'Total':<32} {sum(timings.values()) * 1000:8.0f} ms")
+
+
+def run_git(args: list[str], project_root: Path, answers: Answers) -> bool:
+    """Run a git command; in headless mode a failure ends the workflow"""
+    result = subprocess.run(["git"] + args, cwd=project_root)
+    if result.returncode != 0 and answers.headless:
+        print(f"❌ git {args[0]} failed")
+        sys.exit(1)
+    return result.returncode == 0
+
+
+def step_failed(step: str, answers: Answers, failed: list[str]) -> None:
+    """Report a failed step; in headless mode it ends the workflow, like run_git"""
+    print(f"❌ {step} failed")
+    if answers.headless:
+        sys.exit(1)
+    failed.append(step)
+
+
+def choose_bump(answers: Answers) -> str:
+    """Bump type or explicit version, from the plan or the menu"""
+    bump = answers.value("bump")
+    if bump:
+        print(f"Release type: {bump} (plan)")
+        return bump
+    if answers.headless:
+        print("❌ Headless mode needs a release type (--bump or \"bump\" in the plan file)")
+        sys.exit(1)
+
+    print("Select release type:")
+    print("  1. Patch (bug fixes)")
+    print("  2. Minor (new features)")
+    print("  3. Major (breaking changes)")
+    print("  4. Prerelease (next release candidate)")
+    print("  5. Custom version")
+    print()
+
+    bump_choice = input("Enter choice [1-5]: ").strip()
+    if bump_choice in BUMP_CHOICES:
+        return BUMP_CHOICES[bump_choice]
+    if bump_choice == "5":
+        return input("Enter custom version: ").strip()
+    print("❌ Invalid choice")
+    sys.exit(1)
+
+
 def main():
-    """Main interactive workflow"""
+    """Main release workflow"""
+    parser = argparse.ArgumentParser(description="Release workflow: version bump, CHANGELOG, commit, PR and release")
+    parser.add_argument("--yes", "-y", action="store_true",
+                        help="run without prompts, taking the default answer to each question")
+    parser.add_argument("--plan-file", type=Path, metavar="FILE",
+                        help="run without prompts, answering from this JSON plan (see module docstring)")
+    parser.add_argument("--bump", metavar="TYPE",
+                        help="major, minor, patch, premajor, preminor, prepatch, prerelease "
+                             "or an explicit version (overrides the plan)")
+    parser.add_argument("--preid", metavar="ID",
+                        help="prerelease identifier for the pre* bump types (default: rc)")
+    args = parser.parse_args()
+
+    try:
+        plan = load_plan(args.plan_file) if args.plan_file else {}
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid plan file: {e}")
+        sys.exit(1)
+    if args.bump:
+        plan["bump"] = args.bump
+    if args.preid:
+        plan["preid"] = args.preid
+    answers = Answers(plan, headless=args.yes or args.plan_file is not None)
+
     print("=" * 60)
     print("GitHub Release Workflow")
     print("=" * 60)
     print()
-    
+
     project_root = Path.cwd()
-    
+    timings: dict = {}
+    failed: list[str] = []
+
     # 1. Pre-flight Checks
-    print("Phase 1: Pre-flight Checks")
-    print("-" * 60)
-    
-    # Check git status
-    clean, msg = check_git_status(project_root)
-    if not clean:
-        print(f"⚠️  Git status: {msg}")
-        if not prompt_yes_no("Continue anyway?", default=False):
+    with phase("Phase 1: Pre-flight Checks", timings):
+        checks = preflight(project_root)
+
+        clean, msg = checks["status"]
+        if not clean:
+            print(f"⚠️  Git status: {msg}")
+            if not answers.confirm("allow_dirty", "Continue anyway?", default=False):
+                sys.exit(1)
+        else:
+            print(f"✓ Git status: {msg}")
+
+        current_branch = checks["branch"]
+        print(f"✓ Current branch: {current_branch}")
+
+        owner, repo_name = checks["repo"]
+        if answers.value("repo"):
+            repo_full = answers.value("repo")
+        elif owner and repo_name:
+            repo_full = f"{owner}/{repo_name}"
+        elif answers.headless:
+            print("❌ Could not determine the repository; set \"repo\" in the plan file")
             sys.exit(1)
-    else:
-        print(f"✓ Git status: {msg}")
-    
-    # Show current branch
-    current_branch = get_current_branch(project_root)
-    print(f"✓ Current branch: {current_branch}")
-    
-    # Get repo info
-    owner, repo_name = get_repo_info(project_root)
-    if owner and repo_name:
-        repo_full = f"{owner}/{repo_name}"
+        else:
+            repo_full = input("Enter repository (owner/repo): ").strip()
         print(f"✓ Repository: {repo_full}")
-    else:
-        repo_full = input("Enter repository (owner/repo): ").strip()
-    
-    print()
-    
-    # Check current version
-    package_path = project_root / "package.json"
-    current_version = "0.0.0"
-    if package_path.exists():
-        try:
-            with open(package_path) as f:
-                package = json.load(f)
-                current_version = package.get("version", "0.0.0")
-        except:
-            pass
-    
-    print(f"Current version: {current_version}")
-    print()
+
+        current_version = checks["version"]
+        print(f"Current version: {current_version}")
 
     # 2. Version Selection
-    print("Phase 2: Version Selection")
-    print("-" * 60)
-    
-    print("Select release type:")
-    print("  1. Patch (bug fixes)")
-    print("  2. Minor (new features)")
-    print("  3. Major (breaking changes)")
-    print("  4. Custom version")
-    print()
-    
-    bump_choice = input("Enter choice [1-4]: ").strip()
-    
-    if bump_choice == "1":
-        bump_type = "patch"
-    elif bump_choice == "2":
-        bump_type = "minor"
-    elif bump_choice == "3":
-        bump_type = "major"
-    elif bump_choice == "4":
-        bump_type = input("Enter custom version: ").strip()
-    else:
-        print("❌ Invalid choice")
-        sys.exit(1)
-    
-    # Simple logic to predict new version for display (actual bump handled by script)
-    # This is handled well enough by the prompt for confirmation in bump_version.py usually, 
-    # but let's just proceed.
-    
-    print()
-    if not prompt_yes_no("Proceed with version bump?"):
-        sys.exit(0)
+    with phase("Phase 2: Version Selection", timings):
+        bump_type = choose_bump(answers)
+        if bump_type in BUMP_TYPES:
+            try:
+                new_version = bump_version(current_version, bump_type,
+                                           answers.value("preid") or PLAN_DEFAULTS["preid"])
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+        else:
+            # Validate format; the normalized form drops a leading "v" ("v1.2.3" -> "1.2.3")
+            try:
+                new_version = str(parse_version(bump_type))
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+        print(f"New version: {new_version}")
+        if not answers.confirm(None, "Proceed with version bump?"):
+            sys.exit(0)
 
     # 3. Execution
-    print()
-    print("Phase 3: Execution")
-    print("-" * 60)
-    
-    # Bump version
-    print("Updating version...")
-    # Map choice 4 to custom version string if needed, but bump_version.py handles "patch"/"minor"/"major" OR "1.2.3"
-    # If bump_choice was 4, bump_type is "1.2.3". If 1, bump_type is "patch".
-    
-    if not run_script("bump_version.py", [bump_type, str(project_root)], project_root):
-        print("❌ Version bump failed")
-        sys.exit(1)
-        
-    # Read the NEW version to use in changelog
-    with open(package_path) as f:
-        package = json.load(f)
-        new_version = package.get("version")
-    
-    print()
-    
-    # Update CHANGELOG
-    print("Updating CHANGELOG...")
-    # Determine mode: if 0.0.0 -> unknown, maybe create? 
-    # Let's assume update unless CHANGELOG doesn't exist
-    changelog_mode = "update"
-    if not (project_root / "CHANGELOG.md").exists():
-        changelog_mode = "create"
-        print("Creating initial CHANGELOG.md...")
-    
-    if not run_script("update_changelog.py", [changelog_mode, new_version, repo_full, str(project_root)], project_root):
-        print("⚠️  CHANGELOG update failed")
-    
-    print()
-    input("⚠️  Please edit CHANGELOG.md to fill in release notes. Press Enter when done...")
-    print()
-    
-    # 4. Git Operations
-    print("Phase 4: Git Operations")
-    print("-" * 60)
-    
-    # Stage
-    print("Staging changes...")
-    subprocess.run(["git", "add", "package.json", "CHANGELOG.md"], cwd=project_root)
-    
-    # Commit
-    commit_msg = f"chore: release v{new_version}"
-    print(f"Committing: {commit_msg}")
-    if prompt_yes_no("Commit changes?"):
-        subprocess.run(["git", "commit", "-m", commit_msg], cwd=project_root)
-    
-    # Push
-    if prompt_yes_no("Push to remote?"):
-        subprocess.run(["git", "push"], cwd=project_root)
-        
-        # 5. GitHub Integration
+    with phase("Phase 3: Execution", timings):
+        print("Updating version...")
+        success, messages, manifest_paths = write_versions(project_root, new_version)
+        for msg in messages:
+            print(msg)
+        if not success:
+            print("❌ Version bump failed")
+            sys.exit(1)
         print()
-        print("Phase 5: GitHub Integration")
-        print("-" * 60)
-        
-        # PR
-        if current_branch != "main" and current_branch != "master":
-            if prompt_yes_no(f"Create PR ({current_branch} -> main)?"):
-                run_script("create_pr.py", [current_branch, "main", new_version, str(project_root)], project_root)
-        
-        # Release
-        if prompt_yes_no(f"Create GitHub Release (v{new_version})?"):
-            flags = []
-            if prompt_yes_no("Publish immediately (no draft)?", default=False):
-                flags.append("--publish")
-            
-            run_script("create_release.py", [new_version, str(project_root)] + flags, project_root)
 
+        print("Updating CHANGELOG...")
+        notes = None
+        if answers.plan.get("notes_from_commits", PLAN_DEFAULTS["notes_from_commits"]):
+            try:
+                notes = commit_notes(project_root, version=new_version)
+            except RuntimeError as e:
+                print(f"⚠️  Could not read commits: {e}")
+        if (project_root / "CHANGELOG.md").exists():
+            success, messages = update_changelog(project_root, new_version, repo_full, notes)
+        else:
+            print("Creating initial CHANGELOG.md...")
+            success, messages = create_initial_changelog(project_root, new_version, repo_full)
+        for msg in messages:
+            print(msg)
+        if not success:
+            step_failed("CHANGELOG update", answers, failed)
+
+    if not answers.headless:
+        if not notes:
+            input("⚠️  Please edit CHANGELOG.md to fill in release notes. Press Enter when done...")
+            print()
+        elif prompt_yes_no("Edit the generated CHANGELOG.md entry before committing?", default=False):
+            input("Press Enter when done...")
+            print()
+
+    # 4. Git Operations
+    with phase("Phase 4: Git Operations", timings):
+        print("Staging changes...")
+        # Only the manifests the bump rewrote
+        changed = [str(path.relative_to(project_root)) for path in manifest_paths]
+        if not run_git(["add", "CHANGELOG.md"] + changed, project_root, answers):
+            failed.append("git add")
+
+        commit_msg = f"chore: release v{new_version}"
+        print(f"Committing: {commit_msg}")
+        if answers.confirm("commit", "Commit changes?"):
+            if not run_git(["commit", "-m", commit_msg], project_root, answers):
+                failed.append("git commit")
+
+        pushed = answers.confirm("push", "Push to remote?")
+        if pushed:
+            pushed = run_git(["push"], project_root, answers)
+            if not pushed:
+                failed.append("git push")
+
+    # 5. GitHub Integration
+    if pushed:
+        with phase("Phase 5: GitHub Integration", timings):
+            client = None
+            if answers.value("api"):
+                client = open_client(project_root)
+                if client is None:
+                    print("❌ No GitHub token (set GITHUB_TOKEN or run gh auth login)")
+                    sys.exit(1)
+            try:
+                base = answers.value("pr_base") or PLAN_DEFAULTS["pr_base"]
+                if current_branch not in ("main", "master", base):
+                    if answers.confirm("create_pr", f"Create PR ({current_branch} -> {base})?"):
+                        success, message = create_pr(project_root, current_branch, base,
+                                                     f"Release v{new_version}",
+                                                     release_pr_body(new_version), client, repo_full)
+                        if success:
+                            print(f"✅ {message}")
+                        elif message == "PR already exists":
+                            print(f"✓ {message}")
+                        else:
+                            print(f"❌ {message}")
+                            step_failed("PR creation", answers, failed)
+
+                if answers.confirm("create_release", f"Create GitHub Release (v{new_version})?"):
+                    publish = answers.confirm("publish", "Publish immediately (no draft)?", default=False)
+                    success, message = create_release(project_root, new_version,
+                                                      draft=not publish, client=client, repo=repo_full)
+                    print(("✅ " if success else "❌ ") + message)
+                    if not success:
+                        step_failed("Release creation", answers, failed)
+            finally:
+                if client is not None:
+                    client.close()
+
+    print_timings(timings)
     print()
+    if failed:
+        print(f"❌ Workflow finished with failed steps: {', '.join(failed)}")
+        sys.exit(1)
     print("✅ Workflow complete!")
 
 
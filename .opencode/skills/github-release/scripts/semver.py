@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Semantic Versioning 2.0.0: parsing, precedence and bumps
+
+    >>> parse("1.4.0-rc.1+build.5")
+    Version(major=1, minor=4, patch=0, prerelease=('rc', '1'), build=('build', '5'))
+    >>> compare("1.0.0-alpha", "1.0.0-alpha.1")
+    -1
+    >>> bump("1.4.0-rc.1", "prerelease")
+    '1.4.0-rc.2'
+
+Precedence follows section 11 of the spec: major, minor and patch compare
+numerically; a prerelease sorts before its release; prerelease identifiers
+compare left to right, numeric ones numerically and below alphanumeric
+ones; build metadata is ignored. `sort_key` turns a version into a tuple
+with exactly that ordering, so lists sort with plain tuple comparisons.
+
+Bump types:
+- major, minor, patch: the next release. A prerelease is released as is
+  when the bump would not go past it (1.4.0-rc.1 + minor -> 1.4.0).
+- premajor, preminor, prepatch: the next release's first prerelease
+  (1.2.3 + preminor -> 1.3.0-rc.0).
+- prerelease: the next prerelease (1.4.0-rc.1 -> 1.4.0-rc.2), or the
+  first prerelease of the next patch for a release (1.2.3 -> 1.2.4-rc.0).
+  With a different `preid`, 1.4.0-beta.3 -> 1.4.0-rc.0.
+
+Usage:
+    semver.py parse <version>
+    semver.py compare <a> <b>
+    semver.py bump <version> <type> [--preid ID]
+    semver.py sort <version> ...
+"""
+
+import re
+import sys
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Tuple, Union
+
+# https://semver.org/#is-there-a-suggested-regular-expression-regex-to-check-a-semver-string
+SEMVER_RE = re.compile(
+    r'^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)'
+    r'(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?'
+    r'(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$'
+)
+
+RELEASE_BUMPS = ("major", "minor", "patch")
+PRERELEASE_BUMPS = ("premajor", "preminor", "prepatch", "prerelease")
+BUMP_TYPES = RELEASE_BUMPS + PRERELEASE_BUMPS
+
+DEFAULT_PREID = "rc"
+
+
+class Version(NamedTuple):
+    major: int
+    minor: int
+    patch: int
+    prerelease: Tuple[str, ...] = ()
+    build: Tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        text = f"{self.major}.{self.minor}.{self.patch}"
+        if self.prerelease:
+            text += "-" + ".".join(self.prerelease)
+        if self.build:
+            text += "+" + ".".join(self.build)
+        return text
+
+    @property
+    def is_prerelease(self) -> bool:
+        return bool(self.prerelease)
+
+
+VersionLike = Union[str, Version]
+
+
+@lru_cache(maxsize=4096)
+def parse(version: str) -> Version:
+    """Parse a SemVer string (a leading "v" is allowed); ValueError if invalid"""
+    match = SEMVER_RE.match(version[1:] if version[:1] in ("v", "V") else version)
+    if not match:
+        raise ValueError(f"Invalid version format: {version}")
+    major, minor, patch, prerelease, build = match.groups()
+    return Version(int(major), int(minor), int(patch),
+                   tuple(prerelease.split(".")) if prerelease else (),
+                   tuple(build.split(".")) if build else ())
+
+
+def is_valid(version: str) -> bool:
+    try:
+        parse(version)
+    except ValueError:
+        return False
+    return True
+
+
+def _version(version: VersionLike) -> Version:
+    return version if isinstance(version, Version) else parse(version)
+
+
+def sort_key(version: VersionLike) -> tuple:
+    """
+    Tuple ordered by SemVer precedence. A release gets (1,) after its
+    numbers and a prerelease (0, identifiers...), with numeric identifiers
+    as (0, n) and alphanumeric ones as (1, text); a shorter identifier list
+    that is a prefix of a longer one sorts first, as the spec requires.
+    """
+    v = _version(version)
+    return v.major, v.minor, v.patch, prerelease_key(v.prerelease)
+
+
+def prerelease_key(prerelease: Tuple[str, ...]) -> tuple:
+    """The last element of sort_key: (1,) for a release, else (0, identifiers...)"""
+    if not prerelease:
+        return (1,)
+    return (0,) + tuple((0, int(part)) if part.isdigit() else (1, part) for part in prerelease)
+
+
+def compare(a: VersionLike, b: VersionLike) -> int:
+    """-1, 0 or 1 as `a` has lower, equal or higher precedence than `b`"""
+    key_a, key_b = sort_key(a), sort_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+
+def sort_versions(versions: Iterable[VersionLike], reverse: bool = False) -> List[Version]:
+    """Versions ordered by precedence (each key computed once)"""
+    return [v for _, v in sorted(((sort_key(v), v) for v in map(_version, versions)),
+                                 key=lambda item: item[0], reverse=reverse)]
+
+
+def bump(version: VersionLike, bump_type: str, preid: str = DEFAULT_PREID) -> str:
+    """The version after a bump of `bump_type` (see the module docstring)"""
+    v = _version(version)
+    major, minor, patch, prerelease = v.major, v.minor, v.patch, v.prerelease
+
+    if bump_type == "major":
+        if prerelease and minor == 0 and patch == 0:
+            return f"{major}.0.0"
+        return f"{major + 1}.0.0"
+    if bump_type == "minor":
+        if prerelease and patch == 0:
+            return f"{major}.{minor}.0"
+        return f"{major}.{minor + 1}.0"
+    if bump_type == "patch":
+        if prerelease:
+            return f"{major}.{minor}.{patch}"
+        return f"{major}.{minor}.{patch + 1}"
+
+    if not preid or not SEMVER_RE.match(f"0.0.0-{preid}.0"):
+        raise ValueError(f"Invalid prerelease identifier: {preid}")
+    if bump_type == "premajor":
+        return f"{major + 1}.0.0-{preid}.0"
+    if bump_type == "preminor":
+        return f"{major}.{minor + 1}.0-{preid}.0"
+    if bump_type == "prepatch":
+        return f"{major}.{minor}.{patch + 1}-{preid}.0"
+    if bump_type == "prerelease":
+        if not prerelease:
+            return f"{major}.{minor}.{patch + 1}-{preid}.0"
+        if prerelease[0] != preid or len(prerelease) == 1:
+            return f"{major}.{minor}.{patch}-{preid}.0"
+        # Count up the last numeric identifier, else append one
+        parts = list(prerelease)
+        for i in range(len(parts) - 1, -1, -1):
+            if parts[i].isdigit():
+                parts[i] = str(int(parts[i]) + 1)
+                return f"{major}.{minor}.{patch}-{'.'.join(parts)}"
+        return f"{major}.{minor}.{patch}-{'.'.join(parts)}.0"
+
+    raise ValueError(f"Invalid bump type: {bump_type}. Use {', '.join(BUMP_TYPES)}")
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    preid = DEFAULT_PREID
+    if "--preid" in args:
+        i = args.index("--preid")
+        preid = args[i + 1] if i + 1 < len(args) else ""
+        del args[i:i + 2]
+
+    usage = ("Usage: semver.py parse <version> | compare <a> <b> | "
+             "bump <version> <type> [--preid ID] | sort <version> ...")
+    if not args:
+        print(usage)
+        sys.exit(1)
+
+    command, operands = args[0], args[1:]
+    try:
+        if command == "parse" and len(operands) == 1:
+            v = parse(operands[0])
+            print(f"major={v.major} minor={v.minor} patch={v.patch} "
+                  f"prerelease={'.'.join(v.prerelease)} build={'.'.join(v.build)}")
+        elif command == "compare" and len(operands) == 2:
+            print(compare(operands[0], operands[1]))
+        elif command == "bump" and len(operands) == 2:
+            print(bump(operands[0], operands[1], preid))
+        elif command == "sort" and operands:
+            for v in sort_versions(operands):
+                print(v)
+        else:
+            print(usage)
+            sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
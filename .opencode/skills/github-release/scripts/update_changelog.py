@@ -1,11 +1,31 @@
 #!/usr/bin/env python3
 """
 Create or update CHANGELOG.md for releases
+
+New entries are inserted without loading the changelog: only its head is
+scanned (up to the first version heading), and the result is written to a
+temporary file (head + entry + the remaining bytes, copied in large chunks)
+that atomically replaces the original, so a crash never leaves a truncated
+CHANGELOG.md.
+
+`update` fills the entry from the conventional commits since the previous
+tag (commit_notes.py); with --todo, or when no commit qualifies, it gets
+the TODO template to fill in by hand. The compare link starts at the
+previous version tag (version_tags.py), or at the top version heading in a
+repository without version tags.
 """
 
+import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+
+from changelog_index import VERSION_HEADING_RE
+from commit_notes import commit_notes
+from version_tags import previous_version
 
 
 INITIAL_TEMPLATE = """# Changelog
@@ -56,6 +76,15 @@ UPDATE_TEMPLATE = """
 [{version}]: https://github.com/{repo}/compare/v{prev_version}...v{version}
 """
 
+# Entry with sections generated from the commits (commit_notes.py)
+GENERATED_TEMPLATE = """
+## [{version}] - {date}
+
+{notes}
+
+[{version}]: https://github.com/{repo}/compare/v{prev_version}...v{version}
+"""
+
 
 def create_initial_changelog(project_root: Path, version: str, repo: str) -> tuple[bool, list[str]]:
     """Create initial CHANGELOG.md"""
@@ -80,8 +109,69 @@ def create_initial_changelog(project_root: Path, version: str, repo: str) -> tup
     return True, messages
 
 
-def update_changelog(project_root: Path, version: str, repo: str) -> tuple[bool, list[str]]:
-    """Update existing CHANGELOG.md with new version"""
+SCAN_CHUNK = 64 * 1024
+COPY_CHUNK = 1024 * 1024
+
+
+def scan_head(f) -> tuple[int, Optional[str], bytearray]:
+    """
+    Find where a new entry goes by reading the changelog only up to its
+    first version heading: right before that heading (so an Unreleased
+    section stays on top), or at the end if there is none.
+
+    Returns (insertion offset, previous version or None, bytes read so far).
+    """
+    head = bytearray()
+    scanned = 0
+    while True:
+        chunk = f.read(SCAN_CHUNK)
+        head += chunk
+        # Only complete lines can be matched, unless the file has ended
+        limit = len(head) if not chunk else head.rfind(b"\n") + 1
+        match = VERSION_HEADING_RE.search(head, scanned, limit)
+        if match:
+            return match.start(), match.group(1).decode("utf-8", "replace"), head
+        if not chunk:
+            return len(head), None, head
+        scanned = max(scanned, limit)
+
+
+def atomic_insert(path: Path, offset: int, data: bytes, head: bytearray, src) -> None:
+    """
+    Write path[:offset] + data + path[offset:] to a temporary file next to
+    `path` and rename it over the original. `head` holds the first bytes of
+    the file (at least `offset` of them) and `src` is the open original; the
+    rest is copied in COPY_CHUNK blocks without decoding.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(head[:offset])
+            out.write(data)
+            out.write(head[offset:])
+            shutil.copyfileobj(src, out, COPY_CHUNK)
+            out.flush()
+            os.fsync(out.fileno())
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def update_changelog(
+    project_root: Path,
+    version: str,
+    repo: str,
+    notes: Optional[str] = None
+) -> tuple[bool, list[str]]:
+    """
+    Update existing CHANGELOG.md with new version. `notes` (the entry's
+    `###` sections, e.g. from commit_notes.py) replace the TODO template.
+    """
     messages = []
     changelog_path = project_root / "CHANGELOG.md"
     
@@ -89,71 +179,58 @@ def update_changelog(project_root: Path, version: str, repo: str) -> tuple[bool,
         messages.append("❌ CHANGELOG.md not found. Use create mode instead.")
         return False, messages
     
-    with open(changelog_path) as f:
-        content = f.read()
-    
-    # Extract previous version from changelog
-    prev_version = None
-    for line in content.split("\n"):
-        if line.startswith("## [") and "]" in line:
-            # Extract version between brackets
-            start = line.index("[") + 1
-            end = line.index("]")
-            prev_version = line[start:end]
-            break
-    
-    if not prev_version:
-        messages.append("⚠️  Could not detect previous version from CHANGELOG.md")
-        prev_version = "0.0.0"
+    with open(changelog_path, "rb") as f:
+        insert_at, heading_version, head = scan_head(f)
     
-    # Generate new entry
-    new_entry = UPDATE_TEMPLATE.format(
-        version=version,
-        date=datetime.now().strftime("%Y-%m-%d"),
-        repo=repo,
-        prev_version=prev_version
-    )
+        # The highest version tag below the new one; the top heading if untagged
+        try:
+            prev_version = previous_version(project_root, version)
+        except ValueError:
+            prev_version = None
+        prev_version = prev_version or heading_version
+        if not prev_version:
+            messages.append("⚠️  Could not detect previous version from the tags or CHANGELOG.md")
+            prev_version = "0.0.0"
     
-    # Find insertion point (after "## [Unreleased]" if exists, or after first header)
-    lines = content.split("\n")
-    insert_index = -1
+        # Generate new entry
+        template = GENERATED_TEMPLATE if notes else UPDATE_TEMPLATE
+        new_entry = template.format(
+            version=version,
+            date=datetime.now().strftime("%Y-%m-%d"),
+            repo=repo,
+            prev_version=prev_version,
+            notes=(notes or "").strip()
+        ).strip() + "\n\n"
+        # Keep one blank line between the preceding text and the entry
+        before = head[max(0, insert_at - 4):insert_at].replace(b"\r", b"")[-2:]
+        if insert_at and before != b"\n\n":
+            new_entry = ("\n" if before.endswith(b"\n") else "\n\n") + new_entry
+        # Match the file's line endings
+        first_newline = head.find(b"\n")
+        if first_newline > 0 and head[first_newline - 1:first_newline] == b"\r":
+            new_entry = new_entry.replace("\n", "\r\n")
     
-    for i, line in enumerate(lines):
-        if line.startswith("## [") or line.startswith("## Unreleased"):
-            # Insert after this line
-            insert_index = i + 1
-            break
-        elif line.startswith("# ") and i > 0:
-            # Insert after changelog header
-            insert_index = i + 2  # Skip blank line
-            break
-    
-    if insert_index == -1:
-        # Fallback: append to end
-        insert_index = len(lines)
-    
-    # Insert new entry
-    lines.insert(insert_index, new_entry.strip())
-    
-    # Write back
-    with open(changelog_path, "w") as f:
-        f.write("\n".join(lines))
+        atomic_insert(changelog_path, insert_at, new_entry.encode("utf-8"), head, f)
     
     messages.append(f"✅ Updated CHANGELOG.md with version {version}")
-    messages.append("⚠️  Please edit CHANGELOG.md to fill in the TODO sections")
+    if notes:
+        messages.append("✓ Sections generated from the commits since the previous tag; review before committing")
+    else:
+        messages.append("⚠️  Please edit CHANGELOG.md to fill in the TODO sections")
     return True, messages
 
 
 def main():
     """Main entry point"""
-    if len(sys.argv) < 4:
-        print("Usage: update_changelog.py <create|update> <version> <repo> [project_root]")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) < 3:
+        print("Usage: update_changelog.py <create|update> <version> <repo> [project_root] [--todo]")
         sys.exit(1)
     
-    mode = sys.argv[1]
-    version = sys.argv[2]
-    repo = sys.argv[3]
-    project_root = Path(sys.argv[4]) if len(sys.argv) > 4 else Path.cwd()
+    mode = args[0]
+    version = args[1]
+    repo = args[2]
+    project_root = Path(args[3]) if len(args) > 3 else Path.cwd()
     
     if mode not in ["create", "update"]:
         print(f"❌ Invalid mode: {mode}. Use 'create' or 'update'")
@@ -162,7 +239,14 @@ def main():
     if mode == "create":
         success, messages = create_initial_changelog(project_root, version, repo)
     else:
-        success, messages = update_changelog(project_root, version, repo)
+        # Sections from conventional commits, unless --todo asks for the template
+        notes = None
+        if "--todo" not in sys.argv:
+            try:
+                notes = commit_notes(project_root, version=version)
+            except RuntimeError as e:
+                print(f"⚠️  Could not read commits: {e}")
+        success, messages = update_changelog(project_root, version, repo, notes)
     
     for msg in messages:
         print(msg)
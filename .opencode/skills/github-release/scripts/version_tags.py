@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Version tags of a repository, read straight from the git dir
+
+Tags are read without spawning git: `packed-refs` in one regex pass that
+also captures the version fields, plus the loose refs under `refs/tags/`
+(repositories using the reftable backend fall back to `git for-each-ref`).
+Each tag that is a SemVer version (optionally "v"-prefixed) gets its
+precedence key (semver.sort_key) built from the match groups, and the
+tags are sorted on those keys alone.
+
+The sorted keys of packed-refs are cached in .git/github-release/tags.bin
+together with the file's inode, mtime and size, so while it is unchanged
+(git rewrites it on `pack-refs`, fetches that prune and tag deletions) a
+run only loads the cache and reads the few loose tags.
+
+The previous version for a release is the highest version tag below it.
+For a final release prereleases are skipped, so v1.5.0's compare link
+starts at v1.4.x rather than at v1.5.0-rc.2.
+
+Usage:
+    version_tags.py [project_root]                       list, newest first
+    version_tags.py --previous VERSION [project_root]    previous version
+"""
+
+import marshal
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from github_api import cache_dir, git_common_dir
+from semver import SEMVER_RE, parse, prerelease_key, sort_key
+
+# A SemVer version with an optional "v" prefix, groups as in SEMVER_RE
+VERSION_BODY = r'[vV]?' + SEMVER_RE.pattern[1:-1]
+TAG_VERSION_RE = re.compile(r'^' + VERSION_BODY + r'$')
+
+# Version tags of packed-refs: (tag, major, minor, patch, prerelease, build).
+# Peeled "^<sha>" lines and other refs don't match.
+PACKED_TAG_RE = re.compile(r'^[0-9a-f]{40,64} refs/tags/(' + VERSION_BODY + r')\r?$', re.M)
+
+RELEASE_KEY = prerelease_key(())
+
+CACHE_FORMAT = 1
+
+# (precedence key, tag name)
+TagKey = Tuple[tuple, str]
+
+
+def tag_key(major: str, minor: str, patch: str, prerelease: Optional[str]) -> tuple:
+    """sort_key of a version from its matched fields"""
+    return (int(major), int(minor), int(patch),
+            prerelease_key(tuple(prerelease.split("."))) if prerelease else RELEASE_KEY)
+
+
+def parse_tags(names: Iterable[str]) -> List[TagKey]:
+    """(precedence key, tag) for each tag name that is a version, unsorted"""
+    keyed = []
+    for name in names:
+        match = TAG_VERSION_RE.match(name)
+        if match:
+            keyed.append((tag_key(*match.groups()[:4]), name))
+    return keyed
+
+
+def read_packed_tags(packed_refs: Path) -> List[TagKey]:
+    """The version tags of a packed-refs file, highest precedence first"""
+    try:
+        with open(packed_refs, "rb") as f:
+            text = f.read().decode("utf-8", "replace")
+    except OSError:
+        return []
+    keyed = [(tag_key(major, minor, patch, prerelease), name)
+             for name, major, minor, patch, prerelease, _ in PACKED_TAG_RE.findall(text)]
+    keyed.sort(reverse=True)
+    return keyed
+
+
+def packed_tags(git_dir: Path, cache: Optional[Path]) -> List[TagKey]:
+    """read_packed_tags through the cache, which is rewritten when packed-refs changed"""
+    packed_refs = git_dir / "packed-refs"
+    try:
+        st = os.stat(packed_refs)
+    except OSError:
+        return []
+    stamp = (CACHE_FORMAT, st.st_ino, st.st_mtime_ns, st.st_size)
+
+    if cache is not None:
+        try:
+            with open(cache, "rb") as f:
+                # One read; marshal.load() on the file object is many times slower
+                cached_stamp, keyed = marshal.loads(f.read())
+            if cached_stamp == stamp and isinstance(keyed, list):
+                return keyed
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    keyed = read_packed_tags(packed_refs)
+    if cache is not None:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=cache.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(marshal.dumps((stamp, keyed)))
+            os.replace(tmp, cache)
+        except OSError:
+            pass
+    return keyed
+
+
+def loose_tag_names(git_dir: Path) -> List[str]:
+    """Names of the loose tag refs under refs/tags/"""
+    tags_dir = git_dir / "refs" / "tags"
+    prefix = len(str(tags_dir)) + 1
+    return [os.path.join(directory, name)[prefix:].replace(os.sep, "/")
+            for directory, _, files in os.walk(tags_dir) for name in files]
+
+
+def tag_keys(project_root: Path, use_cache: bool = True) -> List[TagKey]:
+    """(precedence key, tag name) of every version tag, highest precedence first"""
+    git_dir = git_common_dir(project_root)
+    if git_dir is None:
+        return []
+
+    if (git_dir / "reftable").is_dir():
+        result = subprocess.run(
+            ["git", "for-each-ref", "--format=%(refname:strip=2)", "refs/tags"],
+            cwd=project_root,
+            capture_output=True,
+            text=True
+        )
+        keyed = parse_tags(result.stdout.split()) if result.returncode == 0 else []
+        keyed.sort(reverse=True)
+        return keyed
+
+    directory = cache_dir(project_root) if use_cache else None
+    keyed = packed_tags(git_dir, directory / "tags.bin" if directory else None)
+    loose = parse_tags(loose_tag_names(git_dir))
+    if loose:
+        # A tag can be both loose and packed; it is listed once
+        names = {name for _, name in loose}
+        keyed = [item for item in keyed if item[1] not in names] + loose
+        keyed.sort(reverse=True)
+    return keyed
+
+
+def tag_version(name: str) -> str:
+    """The version a version tag names ("v1.2.0" -> "1.2.0")"""
+    return name[1:] if name[:1] in ("v", "V") else name
+
+
+def version_tags(project_root: Path) -> List[Tuple[str, str]]:
+    """(version, tag name) of every version tag, highest precedence first"""
+    return [(tag_version(name), name) for _, name in tag_keys(project_root)]
+
+
+def previous_tag(project_root: Path, version: Optional[str] = None) -> Optional[str]:
+    """
+    Name of the highest version tag below `version` (the highest one
+    without `version`); prereleases only count when `version` is one
+    itself. None if there is no such tag. Raises ValueError if `version`
+    is not a SemVer version.
+    """
+    limit, with_prereleases = None, True
+    if version is not None:
+        target = parse(version)
+        limit, with_prereleases = sort_key(target), target.is_prerelease
+    for key, name in tag_keys(project_root):
+        if (limit is None or key < limit) and (with_prereleases or key[3] == RELEASE_KEY):
+            return name
+    return None
+
+
+def previous_version(project_root: Path, version: Optional[str] = None) -> Optional[str]:
+    """previous_tag as a version string ("v1.4.0" -> "1.4.0")"""
+    tag = previous_tag(project_root, version)
+    return tag_version(tag) if tag else None
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    before = None
+    if "--previous" in args:
+        i = args.index("--previous")
+        if i + 1 >= len(args):
+            print("Usage: version_tags.py [--previous VERSION] [project_root]")
+            sys.exit(1)
+        before = args[i + 1]
+        del args[i:i + 2]
+    project_root = Path(args[0]) if args else Path.cwd()
+
+    if before is not None:
+        try:
+            previous = previous_version(project_root, before)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if previous is None:
+            print(f"❌ No version tag below {before}")
+            sys.exit(1)
+        print(previous)
+        return
+
+    for version, name in version_tags(project_root):
+        print(f"{name}\t{version}")
+
+
+if __name__ == "__main__":
+    main()
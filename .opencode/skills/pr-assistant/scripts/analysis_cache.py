@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of categorized analyses for analyze_changes.py.
+
+Entries live under <git common dir>/pr-assistant/cache/ as JSON files named
+<merge-base>-<config hash>-<head>.json, so every entry for a branch (same
+merge-base and category config) can be listed without opening any of them.
+Reads refresh an entry's mtime, and writes evict the least recently used
+entries until the cache fits in `max_bytes`.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+CACHE_VERSION = 3
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class AnalysisCache:
+    """Size-bounded LRU store of analysis entries keyed by (merge-base, config, HEAD)."""
+
+    def __init__(self, git_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(git_dir) / 'pr-assistant' / 'cache'
+        self.max_bytes = max_bytes
+
+    def _path(self, merge_base: str, config: str, head: str) -> Path:
+        return self.root / f'{merge_base}-{config}-{head}.json'
+
+    def get(self, merge_base: str, config: str, head: str) -> Optional[Dict]:
+        """Load an entry and mark it as recently used."""
+        path = self._path(merge_base, config, head)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != CACHE_VERSION:
+            return None
+        return entry
+
+    def heads(self, merge_base: str, config: str) -> List[str]:
+        """HEADs cached for a merge-base and config, most recently used first."""
+        prefix = f'{merge_base}-{config}-'
+        found = []
+        try:
+            for item in os.scandir(self.root):
+                if item.name.startswith(prefix) and item.name.endswith('.json'):
+                    found.append((item.stat().st_mtime, item.name[len(prefix):-len('.json')]))
+        except OSError:
+            return []
+        return [head for _, head in sorted(found, reverse=True)]
+
+    def put(self, merge_base: str, config: str, head: str, entry: Dict) -> None:
+        """Store an entry atomically, then evict down to the size bound."""
+        data = json.dumps(dict(entry, version=CACHE_VERSION), separators=(',', ':'))
+        if len(data) <= self.max_bytes:
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp, self._path(merge_base, config, head))
+            except OSError:
+                return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the total size fits."""
+        entries = []
+        try:
+            for item in os.scandir(self.root):
+                if item.name.endswith('.json'):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
@@ -3,19 +3,102 @@
 Analyze git changes and categorize them for PR creation.
 
 Usage:
-    python analyze_changes.py [target_branch]
+    python analyze_changes.py [target_branch] [--backend git|native] [--categories FILE]
+                              [--stream] [--no-cache] [--cache-max-mb N]
+                              [--branches BRANCH ... [--jobs N]]
+                              [--max-seconds S] [--max-files N] [--max-read-mb N]
+                              [--classified-stats] [--per-commit] [--worktree | --staged]
+
+With --branches, every branch is analyzed against target_branch in a
+bounded worker pool and one document keyed by branch is printed, with the
+files changed on more than one branch listed under "overlapping_files".
+
+With --stream, output is NDJSON: one {"type": "file"} record per changed
+file as git reports it, then a {"type": "summary"} record.
+
+Categories come from `.opencode/pr-assistant.json` in the repository (or
+--categories); without a config the built-in CATEGORIES table is used.
+
+Results are cached under the git dir (analysis_cache.py) keyed by
+merge-base, HEAD and category config; when HEAD has only moved forward the
+cached result is updated with just the new commits.
+
+--worktree (HEAD vs. working tree, untracked files included) and --staged
+(HEAD vs. index) analyze uncommitted changes instead, as a pre-commit
+preview; there are no commits in that output.
+
+With --per-commit, "commit_changes" lists each commit's categorized files
+(from the same log pass, with --name-status).
+
+The native backend reads the object database in-process (git_objects.py)
+and falls back to the git CLI when the repository is not supported.
+
+Files marked linguist-generated, linguist-vendored or -diff in
+gitattributes are listed under "classified_files" instead of their
+category and left out of the line stats (unless --classified-stats).
+
+--max-seconds, --max-files and --max-read-mb bound the work done. When a
+budget runs out git is stopped and the (well-formed) output is marked
+"partial": true, with "skipped" counts of what was left out.
 
 Output: JSON with categorized changes and summary statistics
 """
 
+import argparse
+import concurrent.futures
+import functools
 import json
+import os
+import re
 import subprocess
 import sys
+import threading
+import time
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import git_objects
+from analysis_cache import DEFAULT_MAX_BYTES, AnalysisCache
+from category_matcher import CategoryMatcher, find_config, load_categories
+
+
+# Issue/PR references: "#12", "owner/repo#12" and "GH-12", optionally after
+# a GitHub closing keyword ("Fixes #12", "closes: owner/repo#3")
+ISSUE_REF_RE = re.compile(
+    r'(?:\b(?P<keyword>close[sd]?|fix(?:e[sd])?|resolve[sd]?)\s*:?\s+)?'
+    r'(?:(?<![\w/])(?P<repo>[\w.-]+/[\w.-]+)#|(?<![\w&#])#|\bGH-)(?P<number>\d+)\b',
+    re.IGNORECASE
+)
+
+# Above this many paths an incremental update re-diffs the whole range instead
+MAX_INCREMENTAL_PATHS = 2000
+
+# Above this many paths --worktree diffs everything instead of passing pathspecs
+MAX_PATHSPEC_PATHS = 2000
+
+# Bytes git inspects for NUL when deciding whether a file is binary
+BINARY_SNIFF_BYTES = 8000
+
+# gitattributes that move a file out of its category, in order of precedence
+CLASSIFY_ATTRIBUTES = (
+    ('linguist-generated', 'generated'),
+    ('linguist-vendored', 'vendored'),
+    ('diff', 'no_diff'),
+)
 
+# A `git log --name-status -z` status token ("M", "R100", ...); it never
+# contains a space, unlike the "<hash> <subject>" record of the next commit
+NAME_STATUS_RE = re.compile(r'\n?([A-Z])\d*')
 
-# Project-specific categories
+# Called with ('<hash> <subject>', [(status, filepath), ...]) for each commit
+CommitCallback = Callable[[str, List[Tuple[str, str]]], None]
+
+# Paths written to `git check-attr` per round trip; stays well below the
+# smallest pipe buffer so writing a batch can never block on git's output
+ATTR_BATCH_BYTES = 8192
+
+# Fallback categories for repositories without a config file
 CATEGORIES = {
     'backend': ['apis/', 'requirements.txt'],
     'frontend': ['ui/src/', 'ui/package.json', 'ui/quasar.config.js', 'ui/eslint.config.js'],
@@ -46,6 +129,12 @@ def get_current_branch() -> str:
     return output
 
 
+def get_repo_root() -> str:
+    """Top-level directory of the working tree ('.' if unknown)."""
+    output, returncode = run_command(['git', 'rev-parse', '--show-toplevel'])
+    return output if returncode == 0 and output else '.'
+
+
 def get_changed_files(target_branch: str) -> List[Tuple[str, str]]:
     """
     Get list of changed files with their status.
@@ -72,19 +161,17 @@ def get_changed_files(target_branch: str) -> List[Tuple[str, str]]:
     return changes
 
 
-def categorize_file(filepath: str) -> str:
-    """Categorize a file based on its path."""
-    for category, patterns in CATEGORIES.items():
-        for pattern in patterns:
-            if pattern.endswith('/'):
-                # Directory pattern
-                if filepath.startswith(pattern):
-                    return category
-            else:
-                # File or extension pattern
-                if filepath == pattern or filepath.endswith(pattern):
-                    return category
-    return 'other'
+@functools.lru_cache(maxsize=None)
+def get_matcher(config_path: Optional[str] = None) -> CategoryMatcher:
+    """Compile the category rules once (default: the repo's config, else CATEGORIES)."""
+    path = config_path or find_config()
+    categories = load_categories(path) if path else None
+    return CategoryMatcher(CATEGORIES if categories is None else categories)
+
+
+def categorize_file(filepath: str, matcher: Optional[CategoryMatcher] = None) -> str:
+    """Categorize a file based on its path (first matching rule wins)."""
+    return (matcher or get_matcher()).match(filepath)
 
 
 def get_commit_messages(target_branch: str) -> List[str]:
@@ -99,17 +186,39 @@ def get_commit_messages(target_branch: str) -> List[str]:
     return [line.strip() for line in output.split('\n') if line.strip()]
 
 
+def scan_issue_references(message: str, closing: set, mentioned: set) -> None:
+    """
+    Add the references in one message to `closing` or `mentioned`. Local
+    issues are recorded as "12", other repositories as "owner/repo#12".
+    """
+    for match in ISSUE_REF_RE.finditer(message):
+        number = match.group('number')
+        ref = f"{match.group('repo')}#{number}" if match.group('repo') else number
+        (closing if match.group('keyword') else mentioned).add(ref)
+
+
+def sort_references(refs) -> List[str]:
+    """Local issue numbers first (numerically), then cross-repo references."""
+    def key(ref: str):
+        repo, _, number = ref.rpartition('#')
+        return (repo, int(number))
+    return sorted(refs, key=key)
+
+
+def references_result(closing: set, mentioned: set) -> Dict[str, List[str]]:
+    """Closing and (purely) mentioning references, sorted."""
+    return {
+        'closing': sort_references(closing),
+        'mentioned': sort_references(mentioned - closing),
+    }
+
+
 def extract_issue_references(messages: List[str]) -> List[str]:
     """Extract issue references from commit messages."""
-    import re
-    pattern = r'#(\d+)'
-    issues = set()
-
+    closing, mentioned = set(), set()
     for msg in messages:
-        matches = re.findall(pattern, msg)
-        issues.update(matches)
-
-    return sorted(issues, key=int)
+        scan_issue_references(msg, closing, mentioned)
+    return sort_references(closing | mentioned)
 
 
 def get_diff_stats(target_branch: str) -> Dict[str, int]:
@@ -139,6 +248,780 @@ def get_diff_stats(target_branch: str) -> Dict[str, int]:
     return stats
 
 
+class Budget:
+    """
+    Limits for one analysis: wall-clock seconds, changed files and bytes
+    read from git (None: unlimited). Once a limit is hit `exceeded` names
+    it, the git readers stop and the result is reported as partial, with
+    `skipped` counting the files, per-file line stats and commits left out.
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_files: Optional[int] = None,
+                 max_bytes: Optional[int] = None, start: Optional[float] = None):
+        self.start = time.monotonic() if start is None else start
+        self.deadline = None if max_seconds is None else self.start + max_seconds
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.files = 0
+        self.bytes_read = 0
+        self.exceeded: Optional[str] = None
+        self.skipped = {'files': 0, 'line_stats': 0, 'commits': 0}
+
+    def fresh(self) -> 'Budget':
+        """A budget with the same limits and deadline but nothing spent."""
+        budget = Budget(max_files=self.max_files, max_bytes=self.max_bytes, start=self.start)
+        budget.deadline = self.deadline
+        return budget
+
+    def stop(self, reason: str) -> None:
+        """Record the first limit that was hit."""
+        if self.exceeded is None:
+            self.exceeded = reason
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether no more git output may be read (time or bytes ran out)."""
+        if self.exceeded in ('time', 'bytes'):
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop('time')
+            return True
+        return False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None without one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def read(self, size: int) -> bool:
+        """Account for `size` bytes of git output; False if over budget."""
+        self.bytes_read += size
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            self.stop('bytes')
+        return not self.exhausted
+
+    def take_file(self) -> bool:
+        """Admit one more changed file; False (and counted as skipped) once full."""
+        if self.max_files is not None and self.files >= self.max_files:
+            self.stop('files')
+            self.skipped['files'] += 1
+            return False
+        self.files += 1
+        return True
+
+    def report(self) -> Dict:
+        """The 'partial' flag, budget usage and skipped counts for the output."""
+        return {
+            'partial': self.exceeded is not None,
+            'budget': {
+                'exceeded': self.exceeded,
+                'elapsed_ms': round((time.monotonic() - self.start) * 1000),
+                'bytes_read': self.bytes_read,
+            },
+            'skipped': dict(self.skipped),
+        }
+
+
+def iter_z_records(stream: BinaryIO, chunk_size: int = 65536,
+                   budget: Optional[Budget] = None) -> Iterator[str]:
+    """
+    Yield NUL-terminated records from a binary stream as they arrive,
+    stopping (without the cut-off chunk) once `budget` runs out.
+
+    github-release/scripts/commit_notes.py has a copy without `budget`
+    (skills don't import from each other); keep the two in sync.
+    """
+    read = getattr(stream, 'read1', stream.read)
+    pending = b''
+    while True:
+        chunk = read(chunk_size)
+        if not chunk or (budget is not None and not budget.read(len(chunk))):
+            break
+        # Decode and split everything up to the last NUL in one go; the
+        # tail is carried over so multi-byte characters are never cut
+        complete, sep, pending = (pending + chunk).rpartition(b'\0')
+        if sep:
+            yield from complete.decode('utf-8', errors='replace').split('\0')
+    if pending and (budget is None or budget.exceeded is None):
+        yield pending.decode('utf-8', errors='replace')
+
+
+def git_z(args: List[str], budget: Optional[Budget] = None) -> Iterator[str]:
+    """
+    Run a git command with `-z` output and stream its records. With a
+    budget, nothing is started once it is exhausted, and git is killed at
+    the deadline even while it is still computing and not writing output.
+    """
+    if budget is not None and budget.exhausted:
+        return
+    try:
+        proc = subprocess.Popen(
+            ['git'] + args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        return
+
+    timer = None
+    remaining = budget.remaining() if budget is not None else None
+    if remaining is not None:
+        def expire():
+            budget.stop('time')
+            proc.kill()
+        timer = threading.Timer(max(remaining, 0), expire)
+        timer.daemon = True
+        timer.start()
+
+    try:
+        yield from iter_z_records(proc.stdout, budget=budget)
+    finally:
+        if timer is not None:
+            timer.cancel()
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def attribute_class(values: Dict[str, str]) -> str:
+    """Classification for one path's check-attr values ('' if none applies)."""
+    for attribute, kind in CLASSIFY_ATTRIBUTES:
+        value = values.get(attribute, 'unspecified')
+        if attribute == 'diff':
+            # "-diff" (and the "binary" macro) unset the diff attribute
+            if value == 'unset':
+                return kind
+        elif value not in ('unspecified', 'unset', 'false'):
+            return kind
+    return ''
+
+
+class AttributeClassifier:
+    """
+    One `git check-attr --stdin -z` session shared by every lookup. Paths
+    are sent in batches of at most ATTR_BATCH_BYTES and their answers read
+    back before the next batch, so the pipes never deadlock and callers can
+    classify incrementally. Attributes come from the checked-out tree.
+    Paths are relative to the repository root, so git runs from there.
+    """
+
+    def __init__(self):
+        self.names = [attribute for attribute, _ in CLASSIFY_ATTRIBUTES]
+        try:
+            self.proc = subprocess.Popen(
+                ['git', 'check-attr', '--stdin', '-z'] + self.names,
+                cwd=get_repo_root(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+            self.records = iter_z_records(self.proc.stdout)
+        except OSError:
+            self.proc = None
+
+    def classify(self, paths: List[str]) -> List[str]:
+        """Classification of each path, in order ('' for unclassified)."""
+        kinds: List[str] = []
+        start = 0
+        while start < len(paths) and self.proc is not None:
+            batch, size = [], 0
+            for path in paths[start:]:
+                encoded = path.encode('utf-8', errors='surrogateescape') + b'\0'
+                if batch and size + len(encoded) > ATTR_BATCH_BYTES:
+                    break
+                batch.append(encoded)
+                size += len(encoded)
+            start += len(batch)
+            try:
+                self.proc.stdin.write(b''.join(batch))
+                self.proc.stdin.flush()
+                for _ in batch:
+                    # Output per path: <path> NUL <attribute> NUL <value> NUL, per attribute
+                    values = {}
+                    for _ in self.names:
+                        next(self.records)
+                        attribute = next(self.records)
+                        values[attribute] = next(self.records)
+                    kinds.append(attribute_class(values))
+            except (OSError, StopIteration):
+                # Not a repository or git went away: leave the rest unclassified
+                self.close()
+        return kinds + [''] * (len(paths) - len(kinds))
+
+    def close(self) -> None:
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.stdout.close()
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc = None
+
+    def __enter__(self) -> 'AttributeClassifier':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def classify_records(files: List[Dict]) -> None:
+    """Set each file record's 'classification' with one check-attr session."""
+    if not files:
+        return
+    with AttributeClassifier() as classifier:
+        kinds = classifier.classify([record['file'] for record in files])
+    for record, kind in zip(files, kinds):
+        record['classification'] = kind
+
+
+def resolve_range(target_branch: str, head: str = 'HEAD') -> Optional[Dict[str, str]]:
+    """
+    Resolve HEAD, the target, their merge-base, the branch name and the
+    git common dir at once. Returns None if the target cannot be resolved.
+    """
+    output, returncode = run_command([
+        'git', 'rev-parse', f'{target_branch}...{head}',
+        '--abbrev-ref', head, '--git-common-dir'
+    ])
+
+    lines = output.split('\n')
+    if returncode != 0 or len(lines) < 4:
+        return None
+
+    # Output: <head>, <target>, ^<merge-base>..., <branch name>, <common dir>
+    bases = [line[1:] for line in lines[2:-2] if line.startswith('^')]
+    branch = lines[-2]
+
+    return {
+        'head': lines[0],
+        'target': lines[1],
+        'merge_base': bases[0] if bases else '',
+        'branch': '' if branch == 'HEAD' else branch,
+        'git_dir': lines[-1],
+    }
+
+
+def resolve_ranges(target_branch: str, heads: List[str]) -> Dict[str, Optional[Dict[str, str]]]:
+    """
+    resolve_range for many branches, computing every merge-base in a single
+    rev-parse. If any branch fails to resolve, each is resolved on its own
+    so only the bad ones map to None.
+    """
+    output, returncode = run_command(
+        ['git', 'rev-parse'] + [f'{target_branch}...{head}' for head in heads] + ['--git-common-dir']
+    )
+    lines = output.split('\n')
+    if returncode != 0 or len(lines) < 2 * len(heads) + 1:
+        return {head: resolve_range(target_branch, head) for head in heads}
+
+    # Each range prints <head>, <target>, then its ^<merge-base> lines
+    git_dir = lines.pop()
+    ranges: List[List[str]] = []
+    for line in lines:
+        if line.startswith('^'):
+            ranges[-1].append(line[1:])
+        elif ranges and len(ranges[-1]) == 1:
+            ranges[-1].append(line)
+        else:
+            ranges.append([line])
+
+    return {
+        head: {
+            'head': shas[0],
+            'target': shas[1],
+            'merge_base': shas[2] if len(shas) > 2 else '',
+            'branch': head,
+            'git_dir': git_dir,
+        }
+        for head, shas in zip(heads, ranges)
+    }
+
+
+def new_line_stats() -> Dict[str, int]:
+    """Zeroed line statistics for one category."""
+    return {'files': 0, 'insertions': 0, 'deletions': 0, 'binary': 0}
+
+
+def add_line_stats(totals: Dict[str, int], insertions: int, deletions: int, binary: bool) -> None:
+    """Add one file's line counts to a new_line_stats() dict."""
+    totals['files'] += 1
+    totals['insertions'] += insertions
+    totals['deletions'] += deletions
+    totals['binary'] += binary
+
+
+def iter_diff_records(records: Iterator[str], stats: Dict[str, int],
+                      on_numstat: Optional[Callable[[str, int, int, bool], None]] = None,
+                      budget: Optional[Budget] = None) -> Iterator[Tuple[str, str, str]]:
+    """
+    Parse `git diff -z --raw --numstat` output in a single pass, yielding
+    (status, filepath, rename source or '') for each raw record as it
+    arrives and adding the numstat records to `stats` ({'files',
+    'insertions', 'deletions'}). If given, `on_numstat(filepath,
+    insertions, deletions, binary)` is called for every numstat record;
+    git prints those after all raw records, in the same order.
+
+    Files past the budget's file limit are counted as skipped, not
+    yielded; reading stops at their numstat records so git is not left
+    computing line counts nobody will use.
+    """
+    records = iter(records)
+    kept = 0
+    numstat_seen = 0
+
+    for record in records:
+        if record.startswith(':'):
+            # Raw: ":<mode> <mode> <sha> <sha> <status>" NUL <path> [NUL <new path>]
+            status = record.rsplit(' ', 1)[-1][:1]
+            filepath = source = next(records, '')
+            if status in ('R', 'C'):
+                filepath = next(records, filepath)
+            if budget is not None and not budget.take_file():
+                continue
+            kept += 1
+            yield status, filepath, source if filepath != source else ''
+        elif record:
+            if budget is not None and numstat_seen >= kept:
+                break
+            numstat_seen += 1
+            # Numstat: "<added>\t<deleted>\t<path>", or an empty path
+            # followed by the old and new paths for renames and copies
+            parts = record.split('\t', 2)
+            if len(parts) != 3:
+                continue
+            added, deleted, filepath = parts
+            if not filepath:
+                next(records, None)
+                filepath = next(records, '')
+            # Binary files report "-" for both counts
+            binary = added == '-'
+            added = int(added) if added.isdigit() else 0
+            deleted = int(deleted) if deleted.isdigit() else 0
+            stats['files'] += 1
+            stats['insertions'] += added
+            stats['deletions'] += deleted
+            if on_numstat is not None:
+                on_numstat(filepath, added, deleted, binary)
+
+    if budget is not None:
+        budget.skipped['line_stats'] += kept - numstat_seen
+
+
+def parse_diff_records(records: Iterator[str],
+                       numstat: Optional[Dict[str, Tuple[int, int, bool]]] = None,
+                       budget: Optional[Budget] = None) -> Tuple[List[Tuple[str, str]], Dict[str, int]]:
+    """
+    Parse `git diff -z --raw --numstat` output in a single pass.
+    Returns: ([(status, filepath), ...], {'files', 'insertions', 'deletions'})
+    and fills `numstat`, if given, with (insertions, deletions, binary) per path.
+    """
+    stats = {'files': 0, 'insertions': 0, 'deletions': 0}
+
+    def record_numstat(filepath: str, added: int, deleted: int, binary: bool) -> None:
+        numstat[filepath] = (added, deleted, binary)
+
+    changes = [
+        (status, filepath)
+        for status, filepath, _ in iter_diff_records(
+            records, stats, record_numstat if numstat is not None else None, budget)
+    ]
+    return changes, stats
+
+
+def iter_range_diff(revs: Dict[str, str], paths: Optional[Iterable[str]] = None,
+                    budget: Optional[Budget] = None) -> Iterator[str]:
+    """Stream the raw + numstat diff records between the merge-base and HEAD."""
+    args = [
+        'diff', '-z', '--raw', '--numstat', '--no-ext-diff',
+        revs['merge_base'], revs['head']
+    ]
+    if paths is not None:
+        args += ['--'] + [f':(top,literal){path}' for path in paths]
+    return git_z(args, budget)
+
+
+def iter_log_commits(records: Iterator[str]) -> Iterator[Tuple[str, str, List[Tuple[str, str]]]]:
+    """
+    Parse `git log -z --format=%h %s%x00%B [--name-status]` output one
+    commit at a time: (oneline, message, [(status, filepath), ...]). Only
+    the current commit's files are held, so memory is bounded by the
+    largest commit.
+    """
+    records = iter(records)
+    record = next(records, None)
+    while record is not None:
+        oneline, message = record, next(records, '')
+        files = []
+        record = next(records, None)
+        while record is not None:
+            m = NAME_STATUS_RE.fullmatch(record)
+            if not m:
+                break
+            status = m.group(1)
+            filepath = next(records, '')
+            if status in ('R', 'C'):
+                filepath = next(records, filepath)
+            files.append((status, filepath))
+            record = next(records, None)
+        yield oneline, message, files
+
+
+def scan_range_commits(revs: Dict[str, str], exclude: Iterable[str] = (),
+                       budget: Optional[Budget] = None, on_commit: Optional[CommitCallback] = None
+                       ) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    One streamed `git log -z` pass over target..HEAD (minus `exclude`).
+    Returns the '<hash> <subject>' lines and the issue references found in
+    the full messages; message bodies are scanned and dropped one at a time.
+    With `on_commit`, the same pass adds --name-status and hands each
+    commit's files to it as the commit is parsed.
+    """
+    args = ['log', '-z', '--format=%h %s%x00%B']
+    if on_commit is not None:
+        args.append('--name-status')
+    records = git_z(args + [revs['head'], f"^{revs['target']}"] + [f'^{rev}' for rev in exclude], budget)
+
+    commits = []
+    closing, mentioned = set(), set()
+    for oneline, message, files in iter_log_commits(records):
+        commits.append(oneline.strip())
+        scan_issue_references(message, closing, mentioned)
+        if on_commit is not None:
+            on_commit(commits[-1], files)
+
+    if budget is not None and budget.exhausted:
+        # Counting the commits left out is a cheap graph walk, no messages
+        output, returncode = run_command([
+            'git', 'rev-list', '--count', revs['head'], f"^{revs['target']}"
+        ] + [f'^{rev}' for rev in exclude])
+        if returncode == 0 and output.isdigit():
+            budget.skipped['commits'] += max(int(output) - len(commits), 0)
+
+    return commits, references_result(closing, mentioned)
+
+
+def get_changed_files_native(target_branch: str) -> List[Tuple[str, str]]:
+    """Same as get_changed_files, but diffs the commit trees in-process."""
+    repo = git_objects.Repository.discover()
+    head = repo.resolve('HEAD')
+    base = repo.merge_base(repo.resolve(target_branch), head)
+    if base is None:
+        return []
+    return [(change.status, change.path) for change in repo.changed_files(base, head)]
+
+
+def collect_changes_native(target_branch: str, head_ref: str = 'HEAD',
+                           repo: Optional[git_objects.Repository] = None,
+                           budget: Optional[Budget] = None,
+                           on_commit: Optional[CommitCallback] = None) -> Dict:
+    """
+    collect_changes without spawning git. Raises GitObjectError if unsupported.
+    A shared `repo` keeps its object caches (and is left open) across calls.
+    The budget's time and file limits apply; nothing is read from git pipes.
+    """
+    owned = repo is None
+    repo = repo or git_objects.Repository.discover()
+    try:
+        head = repo.resolve(head_ref)
+        target = repo.resolve(target_branch)
+        base = repo.merge_base(target, head)
+
+        changes, stats = [], {'files': 0, 'insertions': 0, 'deletions': 0}
+        numstat: Dict[str, Tuple[int, int, bool]] = {}
+        for change in (repo.changed_files(base, head) if base else []):
+            if budget is not None:
+                if budget.exhausted:
+                    break
+                if not budget.take_file():
+                    continue
+            changes.append((change.status, change.path))
+            insertions, deletions, binary = repo.line_stats(change)
+            numstat[change.path] = (insertions, deletions, binary)
+            stats['files'] += 1
+            stats['insertions'] += insertions
+            stats['deletions'] += deletions
+
+        commits = []
+        closing, mentioned = set(), set()
+        shas = repo.commits_between(head, target)
+        for index, sha in enumerate(shas):
+            if budget is not None and budget.exhausted:
+                budget.skipped['commits'] += len(shas) - index
+                break
+            _, parents, _, raw_message = repo.commit(sha)
+            commits.append(f'{sha.hex()[:7]} {git_objects.commit_subject(raw_message)}')
+            scan_issue_references(raw_message.decode('utf-8', errors='replace'), closing, mentioned)
+            if on_commit is not None:
+                # Like git log, merges list no files
+                files = ([(change.status, change.path) for change in repo.changed_files(parents[0], sha)]
+                         if len(parents) == 1 else [])
+                on_commit(commits[-1], files)
+
+        return {
+            'current_branch': repo.current_branch() if head_ref == 'HEAD' else head_ref,
+            'changes': changes,
+            'stats': stats,
+            'numstat': numstat,
+            'commits': commits,
+            'references': references_result(closing, mentioned),
+        }
+    finally:
+        if owned:
+            repo.close()
+
+
+def collect_changes(target_branch: str, backend: str = 'git', budget: Optional[Budget] = None,
+                    on_commit: Optional[CommitCallback] = None) -> Dict:
+    """
+    Collect branch name, changed files, diff stats (in total and per file,
+    under 'numstat') and commits with one
+    rev-parse, one diff and one log instead of re-resolving the range per call.
+    With backend='native' the object database is read in-process instead,
+    falling back to git when that fails.
+    """
+    if backend == 'native':
+        try:
+            return collect_changes_native(target_branch, budget=budget, on_commit=on_commit)
+        except (git_objects.GitObjectError, OSError) as e:
+            print(f"Native backend unavailable ({e}), falling back to git", file=sys.stderr)
+
+    return collect_range(resolve_range(target_branch), budget, on_commit)
+
+
+def collect_range(revs: Optional[Dict[str, str]], budget: Optional[Budget] = None,
+                  on_commit: Optional[CommitCallback] = None) -> Dict:
+    """collect_changes for an already resolved range (None: unresolvable target)."""
+    if revs is None:
+        return {
+            'current_branch': get_current_branch(),
+            'changes': [],
+            'stats': {'files': 0, 'insertions': 0, 'deletions': 0},
+            'numstat': {},
+            'commits': [],
+            'references': references_result(set(), set()),
+        }
+
+    changes, stats = [], {'files': 0, 'insertions': 0, 'deletions': 0}
+    numstat: Dict[str, Tuple[int, int, bool]] = {}
+    if revs['merge_base']:
+        changes, stats = parse_diff_records(iter_range_diff(revs, budget=budget), numstat, budget)
+
+    commits, references = scan_range_commits(revs, budget=budget, on_commit=on_commit)
+    return {
+        'current_branch': revs['branch'],
+        'changes': changes,
+        'stats': stats,
+        'numstat': numstat,
+        'commits': commits,
+        'references': references,
+    }
+
+
+def worktree_status(xy: str) -> str:
+    """HEAD-vs-working-tree status letter for a porcelain v2 XY code."""
+    index, worktree = xy
+    if worktree == 'D':
+        return 'D'
+    return index if index != '.' else worktree
+
+
+def count_file_lines(path: str) -> Tuple[int, bool]:
+    """(line count, binary) for a file, read in chunks; what numstat would add."""
+    lines, last, binary = 0, b'\n', False
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                if not lines and b'\0' in chunk[:BINARY_SNIFF_BYTES]:
+                    binary = True
+                    break
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+    except OSError:
+        return 0, False
+    if binary:
+        return 0, True
+    return lines + (last != b'\n'), False
+
+
+def collect_worktree(staged: bool = False, budget: Optional[Budget] = None) -> Dict:
+    """
+    collect_changes for uncommitted work. --staged diffs the index against
+    HEAD and never looks at the working tree. Otherwise one `git status
+    --porcelain=v2 -z` lists the changed and untracked files (only entries
+    whose stat data changed get hashed) along with the branch, and one
+    numstat diff of HEAD against the working tree, limited to those paths,
+    counts their lines; untracked files are counted in Python.
+    """
+    stats = {'files': 0, 'insertions': 0, 'deletions': 0}
+    numstat: Dict[str, Tuple[int, int, bool]] = {}
+
+    def record_numstat(filepath: str, added: int, deleted: int, binary: bool) -> None:
+        numstat[filepath] = (added, deleted, binary)
+
+    if staged:
+        changes = [
+            (status, filepath)
+            for status, filepath, _ in iter_diff_records(
+                git_z(['diff', '--cached', '-z', '--raw', '--numstat', '--no-ext-diff'], budget),
+                stats, record_numstat, budget)
+        ]
+        return {
+            'current_branch': get_current_branch(),
+            'changes': changes,
+            'stats': stats,
+            'numstat': numstat,
+            'commits': [],
+            'references': references_result(set(), set()),
+        }
+
+    branch = ''
+    changes: List[Tuple[str, str]] = []
+    tracked: List[str] = []
+    untracked: List[str] = []
+    records = iter(git_z(['status', '--porcelain=v2', '-z', '--branch', '--untracked-files=all'], budget))
+    for record in records:
+        kind = record[:2]
+        if record.startswith('# branch.head '):
+            head = record[len('# branch.head '):]
+            branch = '' if head == '(detached)' else head
+            continue
+        if kind == '1 ':
+            # 1 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <path>
+            fields = record.split(' ', 8)
+            status, filepath = worktree_status(fields[1]), fields[8]
+        elif kind == '2 ':
+            # 2 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <X><score> <path> NUL <origPath>
+            fields = record.split(' ', 9)
+            status, filepath = worktree_status(fields[1]), fields[9]
+            tracked.append(next(records, ''))
+        elif kind == 'u ':
+            status, filepath = 'U', record.split(' ', 10)[10]
+        elif kind == '? ':
+            status, filepath = 'A', record[2:]
+        else:
+            continue
+        if budget is not None and not budget.take_file():
+            continue
+        changes.append((status, filepath))
+        (untracked if kind == '? ' else tracked).append(filepath)
+
+    if tracked and (budget is None or not budget.exhausted):
+        args = ['diff', '-z', '--numstat', '--no-ext-diff', 'HEAD']
+        if len(tracked) <= MAX_PATHSPEC_PATHS:
+            args += ['--'] + [f':(top,literal){path}' for path in tracked]
+        for _ in iter_diff_records(git_z(args, budget), stats, record_numstat):
+            pass
+
+    if untracked:
+        root = get_repo_root()
+        for filepath in untracked:
+            if budget is not None and budget.exhausted:
+                budget.skipped['line_stats'] += len(untracked) - sum(1 for path in untracked if path in numstat)
+                break
+            lines, binary = count_file_lines(os.path.join(root, filepath))
+            record_numstat(filepath, lines, 0, binary)
+            stats['files'] += 1
+            stats['insertions'] += lines
+
+    return {
+        'current_branch': branch,
+        'changes': changes,
+        'stats': stats,
+        'numstat': numstat,
+        'commits': [],
+        'references': references_result(set(), set()),
+    }
+
+
+def stream_analysis(target_branch: str, matcher: CategoryMatcher, out: TextIO,
+                    budget: Optional[Budget] = None, classified_stats: bool = False,
+                    per_commit: bool = False) -> None:
+    """
+    Write one NDJSON record per changed file while git is still producing
+    the diff, then a summary record. Records go out in small batches, as
+    check-attr classifies them; beyond that only per-category counters and
+    the classified paths are kept, so memory stays flat however many files
+    the diff has. Line counts arrive after the file list, so they only
+    appear per category, in the summary. With `per_commit`, a
+    {"type": "commit"} record per commit follows the file records.
+    """
+    revs = resolve_range(target_branch)
+    stats = {'files': 0, 'insertions': 0, 'deletions': 0}
+    category_counts: Dict[str, int] = defaultdict(int)
+    classified_counts: Dict[str, int] = defaultdict(int)
+    category_stats: Dict[str, Dict[str, int]] = defaultdict(new_line_stats)
+    # Only classified paths are remembered, to keep their lines out of the stats
+    classified: Dict[str, str] = {}
+    pending: List[Tuple[str, str]] = []
+    pending_bytes = 0
+    total_files = 0
+
+    def flush(classifier: AttributeClassifier) -> None:
+        nonlocal pending_bytes
+        for (status, filepath), kind in zip(pending, classifier.classify([path for _, path in pending])):
+            record = {'type': 'file', 'status': status, 'file': filepath, 'category': matcher.match(filepath)}
+            if kind:
+                record['classification'] = classified[filepath] = kind
+                classified_counts[kind] += 1
+            else:
+                category_counts[record['category']] += 1
+            out.write(json.dumps(record) + '\n')
+        pending.clear()
+        pending_bytes = 0
+
+    if revs and revs['merge_base']:
+        with AttributeClassifier() as classifier:
+            def count_lines(filepath: str, insertions: int, deletions: int, binary: bool) -> None:
+                # Numstat follows the last raw record: classify what is still pending first
+                if pending:
+                    flush(classifier)
+                if filepath in classified and not classified_stats:
+                    stats['insertions'] -= insertions
+                    stats['deletions'] -= deletions
+                    return
+                add_line_stats(category_stats[matcher.match(filepath)], insertions, deletions, binary)
+
+            for status, filepath, _ in iter_diff_records(iter_range_diff(revs, budget=budget), stats,
+                                                         count_lines, budget):
+                total_files += 1
+                pending.append((status, filepath))
+                pending_bytes += len(filepath) + 1
+                if pending_bytes >= ATTR_BATCH_BYTES:
+                    flush(classifier)
+            if pending:
+                flush(classifier)
+
+    def write_commit(oneline: str, files: List[Tuple[str, str]]) -> None:
+        out.write(json.dumps({'type': 'commit', **commit_breakdown(oneline, files, matcher)}) + '\n')
+
+    commit_messages, references = (
+        scan_range_commits(revs, budget=budget, on_commit=write_commit if per_commit else None) if revs
+        else ([], references_result(set(), set())))
+
+    summary = {
+        'type': 'summary',
+        'current_branch': revs['branch'] if revs else get_current_branch(),
+        'target_branch': target_branch,
+        'pr_type': infer_pr_type(category_counts, commit_messages),
+        'stats': stats,
+        'commits': commit_messages,
+        'issue_references': sort_references(references['closing'] + references['mentioned']),
+        'closing_references': references['closing'],
+        'mentioned_references': references['mentioned'],
+        'category_counts': dict(category_counts),
+        'classified_counts': dict(classified_counts),
+        'category_stats': dict(category_stats),
+        'total_files': total_files
+    }
+    if budget is not None:
+        summary.update(budget.report())
+    out.write(json.dumps(summary) + '\n')
+
+
 def infer_pr_type(changes_by_category: Dict[str, List], commit_messages: List[str]) -> str:
     """Infer PR type from changes and commits."""
     # Check commit messages for keywords
@@ -160,39 +1043,450 @@ def infer_pr_type(changes_by_category: Dict[str, List], commit_messages: List[st
     return 'feature'
 
 
-def main():
-    target_branch = sys.argv[1] if len(sys.argv) > 1 else 'main'
-
-    current_branch = get_current_branch()
-    changed_files = get_changed_files(target_branch)
-    commit_messages = get_commit_messages(target_branch)
-    issue_refs = extract_issue_references(commit_messages)
-    diff_stats = get_diff_stats(target_branch)
-
-    # Categorize changes
+def build_result(target_branch: str, current_branch: str, files: List[Dict],
+                 stats: Dict[str, int], commit_messages: List[str],
+                 references: Dict[str, List[str]], classified_stats: bool = False) -> Dict:
+    """
+    Assemble the analysis JSON from categorized file records. Records with
+    line counts ('insertions', 'deletions', 'binary') keep them per file and
+    are rolled up into 'category_stats'. Records with a 'classification'
+    go to 'classified_files' instead of their category, and their lines are
+    taken out of the stats unless `classified_stats` is set.
+    """
     changes_by_category = defaultdict(list)
-    for status, filepath in changed_files:
-        category = categorize_file(filepath)
-        changes_by_category[category].append({
-            'status': status,
-            'file': filepath
-        })
+    classified_files = defaultdict(list)
+    category_stats: Dict[str, Dict[str, int]] = defaultdict(new_line_stats)
+    stats = dict(stats)
+    for record in files:
+        file_info = {'status': record['status'], 'file': record['file']}
+        kind = record.get('classification')
+        counted = not kind or classified_stats
+        if 'insertions' in record:
+            file_info['insertions'] = record['insertions']
+            file_info['deletions'] = record['deletions']
+            file_info['binary'] = record['binary']
+            if counted:
+                add_line_stats(category_stats[record['category']],
+                               record['insertions'], record['deletions'], record['binary'])
+            else:
+                stats['insertions'] -= record['insertions']
+                stats['deletions'] -= record['deletions']
+        if kind:
+            file_info['category'] = record['category']
+            classified_files[kind].append(file_info)
+        else:
+            changes_by_category[record['category']].append(file_info)
 
     # Infer PR type
     pr_type = infer_pr_type(changes_by_category, commit_messages)
 
-    # Build result
-    result = {
+    return {
         'current_branch': current_branch,
         'target_branch': target_branch,
         'pr_type': pr_type,
-        'stats': diff_stats,
+        'stats': stats,
         'commits': commit_messages,
-        'issue_references': issue_refs,
+        'issue_references': sort_references(references['closing'] + references['mentioned']),
+        'closing_references': references['closing'],
+        'mentioned_references': references['mentioned'],
         'changes_by_category': dict(changes_by_category),
-        'total_files': len(changed_files)
+        'classified_files': dict(classified_files),
+        'category_stats': dict(category_stats),
+        'total_files': len(files)
     }
 
+
+def commit_breakdown(oneline: str, files: List[Tuple[str, str]], matcher: CategoryMatcher) -> Dict:
+    """One commit's files grouped by category, shaped like changes_by_category."""
+    sha, _, subject = oneline.partition(' ')
+    changes_by_category = defaultdict(list)
+    for status, filepath in files:
+        changes_by_category[matcher.match(filepath)].append({'status': status, 'file': filepath})
+    return {'commit': sha, 'subject': subject, 'changes_by_category': dict(changes_by_category)}
+
+
+def commit_collector(matcher: CategoryMatcher) -> Tuple[List[Dict], CommitCallback]:
+    """A list and an on_commit callback that appends each commit's breakdown to it."""
+    breakdowns: List[Dict] = []
+
+    def on_commit(oneline: str, files: List[Tuple[str, str]]) -> None:
+        breakdowns.append(commit_breakdown(oneline, files, matcher))
+
+    return breakdowns, on_commit
+
+
+def collect_file_records(revs: Dict[str, str], matcher: CategoryMatcher,
+                         paths: Optional[Iterable[str]] = None,
+                         budget: Optional[Budget] = None) -> List[Dict]:
+    """Categorized per-file records for merge_base..HEAD, optionally limited to `paths`."""
+    stats = {'files': 0, 'insertions': 0, 'deletions': 0}
+    by_path: Dict[str, Dict] = {}
+
+    def record_numstat(filepath: str, insertions: int, deletions: int, binary: bool) -> None:
+        record = by_path.get(filepath)
+        if record is not None:
+            record.update(insertions=insertions, deletions=deletions, binary=binary)
+
+    files = []
+    for status, filepath, source in iter_diff_records(iter_range_diff(revs, paths, budget), stats,
+                                                      record_numstat, budget):
+        record = {'status': status, 'file': filepath, 'source': source, 'category': matcher.match(filepath),
+                  'insertions': 0, 'deletions': 0, 'binary': False}
+        files.append(record)
+        by_path[filepath] = record
+    return files
+
+
+def is_ancestor(ancestor: str, descendant: str) -> bool:
+    """Whether `ancestor` is reachable from `descendant`."""
+    _, returncode = run_command(['git', 'merge-base', '--is-ancestor', ancestor, descendant])
+    return returncode == 0
+
+
+def update_file_records(files: List[Dict], prior_head: str, revs: Dict[str, str],
+                        matcher: CategoryMatcher, budget: Optional[Budget] = None) -> Optional[List[Dict]]:
+    """
+    Bring the file records of merge_base..prior_head up to HEAD by re-diffing
+    only the paths touched since prior_head, plus rename candidates. Returns
+    None when so many paths changed that a full diff is cheaper, or when the
+    budget ran out before the touched paths were known.
+    """
+    records = iter(git_z(['diff', '-z', '--name-status', '--no-renames', prior_head, revs['head']], budget))
+    touched = {path: status for status, path in zip(records, records)}
+    if budget is not None and budget.exhausted:
+        return None
+    if not touched:
+        return list(files)
+
+    # A new add or delete may pair up with an earlier one as a rename
+    pairs_possible = any(status in ('A', 'D') for status in touched.values())
+    paths = set(touched)
+    for record in files:
+        pair = {record['file'], record['source']} - {''}
+        if (pairs_possible and record['status'] in ('A', 'D', 'R')) or not pair.isdisjoint(touched):
+            paths |= pair
+    if len(paths) > MAX_INCREMENTAL_PATHS:
+        return None
+
+    fresh = collect_file_records(revs, matcher, sorted(paths), budget)
+    kept = [r for r in files if r['file'] not in paths and r['source'] not in paths]
+    return sorted(kept + fresh, key=lambda r: r['file'].encode('utf-8'))
+
+
+def analyze_cached(target_branch: str, revs: Optional[Dict[str, str]], matcher: CategoryMatcher,
+                   cache_max_bytes: int = DEFAULT_MAX_BYTES, budget: Optional[Budget] = None,
+                   classified_stats: bool = False,
+                   on_commit: Optional[CommitCallback] = None) -> Optional[Dict]:
+    """
+    Analyze a resolved range through the on-disk cache. An exact
+    (merge-base, HEAD, config) hit is returned as is; if a cached HEAD is an
+    ancestor of HEAD, only the new commits are diffed and merged in.
+    Partial (over budget) results are not stored, and neither are
+    classifications, since attributes come from the working tree. Per-commit
+    breakdowns (`on_commit`) are not cached: the range's log is re-read.
+    Returns None if there is no merge-base to key on.
+    """
+    if revs is None or not revs['merge_base']:
+        return None
+
+    cache = AnalysisCache(Path(revs['git_dir']), cache_max_bytes)
+    base, head, config = revs['merge_base'], revs['head'], matcher.fingerprint[:16]
+
+    entry = cache.get(base, config, head)
+    if entry is None:
+        for prior_head in cache.heads(base, config)[:3]:
+            if prior_head == head or not is_ancestor(prior_head, head):
+                continue
+            prior = cache.get(base, config, prior_head)
+            files = update_file_records(prior['files'], prior_head, revs, matcher, budget) if prior else None
+            if files is not None:
+                commits, references = scan_range_commits(revs, [prior_head], budget)
+                entry = {
+                    'files': files,
+                    'commits': commits + prior['commits'],
+                    'references': references_result(
+                        set(references['closing'] + prior['references']['closing']),
+                        set(references['mentioned'] + prior['references']['mentioned'])),
+                }
+            break
+
+        if entry is None:
+            files = collect_file_records(revs, matcher, budget=budget)
+            commits, references = scan_range_commits(revs, budget=budget, on_commit=on_commit)
+            on_commit = None
+            entry = {
+                'files': files,
+                'commits': commits,
+                'references': references,
+            }
+        if budget is None or budget.exceeded is None:
+            cache.put(base, config, head, entry)
+
+    if on_commit is not None:
+        # Only a full log pass saw every commit's files; its commits are current too
+        commits, references = scan_range_commits(revs, budget=budget, on_commit=on_commit)
+        entry = dict(entry, commits=commits, references=references)
+
+    files = entry['files']
+    if budget is not None and budget.max_files is not None and len(files) > budget.max_files:
+        # Cached and incrementally updated results obey the file limit too
+        budget.stop('files')
+        budget.skipped['files'] += len(files) - budget.max_files
+        files = files[:budget.max_files]
+    files = [dict(record) for record in files]
+    classify_records(files)
+    stats = {
+        'files': len(files),
+        'insertions': sum(record['insertions'] for record in files),
+        'deletions': sum(record['deletions'] for record in files),
+    }
+    return build_result(target_branch, revs['branch'], files, stats,
+                        entry['commits'], entry['references'], classified_stats)
+
+
+def analyze_range(target_branch: str, revs: Optional[Dict[str, str]], matcher: CategoryMatcher,
+                  use_cache: bool = False, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                  budget: Optional[Budget] = None, classified_stats: bool = False,
+                  per_commit: bool = False) -> Dict:
+    """Analyze an already resolved range with the git backend."""
+    commit_changes, on_commit = commit_collector(matcher) if per_commit else (None, None)
+    result = None
+    if use_cache:
+        result = analyze_cached(target_branch, revs, matcher, cache_max_bytes, budget,
+                                classified_stats, on_commit)
+    if result is None:
+        result = result_from_collected(target_branch, collect_range(revs, budget, on_commit),
+                                       matcher, classified_stats)
+    if commit_changes is not None:
+        result['commit_changes'] = commit_changes
+    if budget is not None:
+        result.update(budget.report())
+    return result
+
+
+def result_from_collected(target_branch: str, collected: Dict, matcher: CategoryMatcher,
+                          classified_stats: bool = False) -> Dict:
+    """Categorize and classify the output of collect_changes into the analysis JSON."""
+    numstat = collected.get('numstat', {})
+    files = []
+    for status, filepath in collected['changes']:
+        insertions, deletions, binary = numstat.get(filepath, (0, 0, False))
+        files.append({'status': status, 'file': filepath, 'category': categorize_file(filepath, matcher),
+                      'insertions': insertions, 'deletions': deletions, 'binary': binary})
+    classify_records(files)
+    return build_result(target_branch, collected['current_branch'], files,
+                        collected['stats'], collected['commits'], collected['references'],
+                        classified_stats)
+
+
+def analyze(target_branch: str, matcher: Optional[CategoryMatcher] = None,
+            backend: str = 'git', use_cache: bool = False,
+            cache_max_bytes: int = DEFAULT_MAX_BYTES, budget: Optional[Budget] = None,
+            classified_stats: bool = False, per_commit: bool = False) -> Dict:
+    """Collect and categorize the changes of HEAD against `target_branch`."""
+    matcher = matcher or get_matcher()
+    if backend == 'native':
+        commit_changes, on_commit = commit_collector(matcher) if per_commit else (None, None)
+        result = result_from_collected(target_branch, collect_changes(target_branch, backend, budget, on_commit),
+                                       matcher, classified_stats)
+        if commit_changes is not None:
+            result['commit_changes'] = commit_changes
+        if budget is not None:
+            result.update(budget.report())
+        return result
+    return analyze_range(target_branch, resolve_range(target_branch), matcher,
+                         use_cache, cache_max_bytes, budget, classified_stats, per_commit)
+
+
+def analyze_worktree(matcher: Optional[CategoryMatcher] = None, staged: bool = False,
+                     budget: Optional[Budget] = None, classified_stats: bool = False) -> Dict:
+    """Collect and categorize uncommitted changes (see collect_worktree)."""
+    matcher = matcher or get_matcher()
+    result = result_from_collected('HEAD', collect_worktree(staged, budget), matcher, classified_stats)
+    result['mode'] = 'staged' if staged else 'worktree'
+    if budget is not None:
+        result.update(budget.report())
+    return result
+
+
+def find_overlaps(results: Dict[str, Dict]) -> List[Dict]:
+    """Files changed on more than one branch, with the branches and statuses involved."""
+    touched: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for branch, result in results.items():
+        groups = list(result['changes_by_category'].values()) + list(result.get('classified_files', {}).values())
+        for files in groups:
+            for file_info in files:
+                touched[file_info['file']].append((branch, file_info['status']))
+
+    return [
+        {
+            'file': filepath,
+            'branches': [branch for branch, _ in entries],
+            'statuses': {branch: status for branch, status in entries},
+        }
+        for filepath, entries in sorted(touched.items())
+        if len(entries) > 1
+    ]
+
+
+def analyze_branches(target_branch: str, branches: List[str], matcher: Optional[CategoryMatcher] = None,
+                     backend: str = 'git', jobs: int = 4, use_cache: bool = False,
+                     cache_max_bytes: int = DEFAULT_MAX_BYTES, budget: Optional[Budget] = None,
+                     classified_stats: bool = False, per_commit: bool = False) -> Dict:
+    """
+    Analyze several branches against one target. All merge-bases come from
+    one rev-parse, branches pointing at the same commit are analyzed once,
+    and the per-branch diffs and logs run in a pool of `jobs` workers. The
+    native backend instead shares one Repository (and its object caches)
+    and runs the branches one after another. With a budget, every branch
+    gets its own file and byte limits and all share the deadline.
+    """
+    matcher = matcher or get_matcher()
+    branches = list(dict.fromkeys(branches))
+    results: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+
+    repo = None
+    if backend == 'native':
+        try:
+            repo = git_objects.Repository.discover()
+        except (git_objects.GitObjectError, OSError) as e:
+            print(f"Native backend unavailable ({e}), falling back to git", file=sys.stderr)
+
+    if repo is not None:
+        try:
+            for branch in branches:
+                try:
+                    branch_budget = budget.fresh() if budget is not None else None
+                    commit_changes, on_commit = commit_collector(matcher) if per_commit else (None, None)
+                    results[branch] = result_from_collected(
+                        target_branch, collect_changes_native(target_branch, branch, repo, branch_budget, on_commit),
+                        matcher, classified_stats)
+                    if commit_changes is not None:
+                        results[branch]['commit_changes'] = commit_changes
+                    if branch_budget is not None:
+                        results[branch].update(branch_budget.report())
+                except (git_objects.GitObjectError, OSError) as e:
+                    errors[branch] = str(e)
+        finally:
+            repo.close()
+    else:
+        ranges = resolve_ranges(target_branch, branches)
+        by_head: Dict[str, List[str]] = defaultdict(list)
+        for branch in branches:
+            revs = ranges[branch]
+            if revs is None:
+                errors[branch] = f'cannot resolve {target_branch}...{branch}'
+            else:
+                by_head[revs['head']].append(branch)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {
+                pool.submit(analyze_range, target_branch, ranges[names[0]], matcher,
+                            use_cache, cache_max_bytes, budget.fresh() if budget is not None else None,
+                            classified_stats, per_commit): names
+                for names in by_head.values()
+            }
+            for future in concurrent.futures.as_completed(futures):
+                names = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.update((name, str(e)) for name in names)
+                    continue
+                for name in names:
+                    results[name] = dict(result, current_branch=name)
+
+    ordered = {branch: results[branch] for branch in branches if branch in results}
+    combined = {
+        'target_branch': target_branch,
+        'branches': ordered,
+        'overlapping_files': find_overlaps(ordered),
+        'errors': errors,
+    }
+    if budget is not None:
+        combined['partial'] = any(result.get('partial') for result in ordered.values())
+    return combined
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze git changes and categorize them for PR creation')
+    parser.add_argument('target_branch', nargs='?', default='main')
+    parser.add_argument('--backend', choices=['git', 'native'], default='git',
+                        help='read history through the git CLI (default) or in-process')
+    parser.add_argument('--categories', metavar='FILE',
+                        help='category config (default: .opencode/pr-assistant.json)')
+    parser.add_argument('--stream', action='store_true',
+                        help='emit NDJSON records as git produces them (constant memory)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the analysis cache under the git dir')
+    parser.add_argument('--branches', nargs='+', metavar='BRANCH',
+                        help='analyze these branches (instead of HEAD) concurrently')
+    parser.add_argument('--jobs', type=int, default=4,
+                        help='worker count for --branches (default: %(default)s)')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='size bound of the analysis cache (default: %(default)s MiB)')
+    parser.add_argument('--max-seconds', type=float,
+                        help='stop after this much wall-clock time and report a partial result')
+    parser.add_argument('--max-files', type=int,
+                        help='include at most this many changed files (per branch)')
+    parser.add_argument('--max-read-mb', type=float,
+                        help='read at most this much git output (per branch)')
+    parser.add_argument('--classified-stats', action='store_true',
+                        help='count generated/vendored/-diff files in the line stats')
+    parser.add_argument('--per-commit', action='store_true',
+                        help="also list each commit's categorized files (commit_changes)")
+    uncommitted = parser.add_mutually_exclusive_group()
+    uncommitted.add_argument('--worktree', action='store_true',
+                             help='analyze uncommitted changes (HEAD vs. working tree, incl. untracked)')
+    uncommitted.add_argument('--staged', action='store_true',
+                             help='analyze staged changes (HEAD vs. index)')
+    args = parser.parse_args()
+    if args.stream and args.backend == 'native':
+        parser.error('--stream reads git output incrementally and needs --backend git')
+    if args.stream and args.branches:
+        parser.error('--stream analyzes HEAD only and cannot be combined with --branches')
+    if (args.worktree or args.staged) and (args.stream or args.branches or args.backend == 'native'):
+        parser.error('--worktree/--staged cannot be combined with --stream, --branches or --backend native')
+    target_branch = args.target_branch
+    budget = None
+    if args.max_seconds is not None or args.max_files is not None or args.max_read_mb is not None:
+        # Without limits the output keeps its shape: no partial/budget/skipped keys
+        budget = Budget(
+            max_seconds=args.max_seconds,
+            max_files=args.max_files,
+            max_bytes=int(args.max_read_mb * 1024 * 1024) if args.max_read_mb is not None else None,
+        )
+
+    try:
+        matcher = get_matcher(args.categories)
+    except (OSError, ValueError) as e:
+        print(f"Error: invalid category config: {e}", file=sys.stderr)
+        return 1
+
+    if args.worktree or args.staged:
+        result = analyze_worktree(matcher, args.staged, budget, args.classified_stats)
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if args.stream:
+        stream_analysis(target_branch, matcher, sys.stdout, budget, args.classified_stats, args.per_commit)
+        return 0
+
+    if args.branches:
+        result = analyze_branches(target_branch, args.branches, matcher, args.backend, args.jobs,
+                                  use_cache=not args.no_cache,
+                                  cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                                  budget=budget, classified_stats=args.classified_stats,
+                                  per_commit=args.per_commit)
+        print(json.dumps(result, indent=2))
+        return 0
+
+    result = analyze(target_branch, matcher, args.backend,
+                     use_cache=not args.no_cache,
+                     cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                     budget=budget, classified_stats=args.classified_stats,
+                     per_commit=args.per_commit)
     print(json.dumps(result, indent=2))
     return 0
 
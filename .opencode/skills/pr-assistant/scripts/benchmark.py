@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the PR assistant scripts.
+
+Usage:
+    python benchmark.py collect [--files N] [--runs N]
+    python benchmark.py categorize [--paths N] [--rules N]
+    python benchmark.py stream [--files N ...]
+
+`collect` builds a throwaway repository with a synthetic branch and times
+the git collection paths against it; `categorize` times path categorization
+on synthetic paths; `stream` compares peak Python memory of the full JSON
+output with --stream for growing diffs. Output: JSON with results per variant.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import analyze_changes
+from category_matcher import CategoryMatcher
+
+
+def make_synthetic_repo(root: Path, files: int) -> None:
+    """
+    Create a repository whose `feature` branch adds, modifies and deletes
+    `files` paths relative to `main`, using a single git fast-import.
+    """
+    env = dict(os.environ, GIT_AUTHOR_NAME='bench', GIT_AUTHOR_EMAIL='bench@example.com',
+               GIT_COMMITTER_NAME='bench', GIT_COMMITTER_EMAIL='bench@example.com')
+    subprocess.run(['git', 'init', '-q', '-b', 'main', str(root)], check=True, env=env)
+
+    def blob(text: str) -> bytes:
+        data = text.encode()
+        return b'data %d\n%s\n' % (len(data), data)
+
+    def commit(ref: str, mark: int, message: str, parent: int = 0) -> bytes:
+        msg = message.encode()
+        header = b'commit %s\nmark :%d\ncommitter bench <bench@example.com> 0 +0000\ndata %d\n%s\n' % (
+            ref.encode(), mark, len(msg), msg)
+        if parent:
+            header += b'from :%d\n' % parent
+        return header
+
+    # Base commit: the files the branch will modify or delete
+    stream = [commit('refs/heads/main', 1, 'base')]
+    for i in range(files // 2):
+        stream.append(b'M 100644 inline src/mod%03d/file%05d.py\n' % (i % 100, i) + blob(f'v1 {i}\n'))
+    stream.append(b'\n')
+
+    # Feature branch: modify a quarter, delete a quarter, add the other half
+    stream.append(commit('refs/heads/feature', 2, 'Change half of the files', parent=1))
+    for i in range(files // 2):
+        path = b'src/mod%03d/file%05d.py' % (i % 100, i)
+        if i % 2:
+            stream.append(b'D ' + path + b'\n')
+        else:
+            stream.append(b'M 100644 inline ' + path + b'\n' + blob(f'v1 {i}\nv2\n'))
+    for i in range(files - files // 2):
+        stream.append(b'M 100644 inline docs/new%05d.md\n' % i + blob(f'doc {i}\n'))
+    stream.append(b'\n')
+
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=root, input=b''.join(stream),
+                   check=True, env=env)
+    subprocess.run(['git', 'checkout', '-q', 'feature'], cwd=root, check=True, env=env)
+
+
+def time_runs(fn: Callable[[], object], runs: int) -> Dict[str, float]:
+    """Time a callable over several runs (best and mean, in ms)."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'best_ms': round(min(timings), 2), 'mean_ms': round(sum(timings) / len(timings), 2)}
+
+
+def count_git_spawns(fn: Callable[[], object]) -> int:
+    """Count the git processes a callable starts."""
+    original = subprocess.Popen.__init__
+    spawned: List[object] = []
+
+    def counting_init(self, args, *rest, **kwargs):
+        if args and args[0] == 'git':
+            spawned.append(args)
+        original(self, args, *rest, **kwargs)
+
+    subprocess.Popen.__init__ = counting_init
+    try:
+        fn()
+    finally:
+        subprocess.Popen.__init__ = original
+    return len(spawned)
+
+
+def legacy_collect(target: str) -> None:
+    """The four-call path: branch, name-status, log and shortstat."""
+    analyze_changes.get_current_branch()
+    analyze_changes.get_changed_files(target)
+    analyze_changes.get_commit_messages(target)
+    analyze_changes.get_diff_stats(target)
+
+
+def bench_collect(args: argparse.Namespace) -> Dict:
+    """Compare the legacy per-call collection with collect_changes (git and native)."""
+    variants = {
+        'legacy': lambda: legacy_collect('main'),
+        'collector': lambda: analyze_changes.collect_changes('main'),
+        'native': lambda: analyze_changes.collect_changes('main', backend='native'),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_synthetic_repo(Path(tmp), args.files)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            results = {}
+            for name, fn in variants.items():
+                results[name] = {
+                    'git_processes': count_git_spawns(fn),
+                    **time_runs(fn, args.runs),
+                }
+        finally:
+            os.chdir(cwd)
+
+    return {'benchmark': 'collect', 'files': args.files, 'runs': args.runs, 'results': results}
+
+
+def peak_memory(fn: Callable[[], object]) -> Dict[str, float]:
+    """Peak traced Python memory (KiB) and wall time of a callable."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'peak_kib': round(peak / 1024, 1), 'ms': round(elapsed * 1000, 2)}
+
+
+class NullWriter:
+    """Text sink that discards output, so only the producer's memory is measured."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def bench_stream(args: argparse.Namespace) -> Dict:
+    """Peak memory of the full JSON document vs NDJSON streaming per diff size."""
+    matcher = analyze_changes.get_matcher()
+    results = {}
+
+    for files in args.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_synthetic_repo(Path(tmp), files)
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                results[files] = {
+                    'full': peak_memory(lambda: json.dumps(
+                        analyze_changes.analyze('main', matcher), indent=2)),
+                    'stream': peak_memory(lambda: analyze_changes.stream_analysis(
+                        'main', matcher, NullWriter())),
+                }
+            finally:
+                os.chdir(cwd)
+
+    return {'benchmark': 'stream', 'results': results}
+
+
+def legacy_categorize(filepath: str, categories: Dict[str, List[str]]) -> str:
+    """The original nested loop over every category and pattern."""
+    for category, patterns in categories.items():
+        for pattern in patterns:
+            if pattern.endswith('/'):
+                if filepath.startswith(pattern):
+                    return category
+            else:
+                if filepath == pattern or filepath.endswith(pattern):
+                    return category
+    return 'other'
+
+
+def make_rules(count: int, rng: random.Random) -> Dict[str, List[str]]:
+    """A config of `count` directory, file name and extension rules in 20 categories."""
+    categories: Dict[str, List[str]] = {f'cat{i:02d}': [] for i in range(20)}
+    names = list(categories)
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            pattern = f'pkg{i:03d}/src/'
+        elif kind == 1:
+            pattern = f'config{i:03d}.json'
+        else:
+            pattern = f'.ext{i:03d}'
+        categories[names[rng.randrange(len(names))]].append(pattern)
+    return categories
+
+
+def make_paths(count: int, rules: int, rng: random.Random) -> List[str]:
+    """Synthetic repository paths, roughly half of them matching some rule."""
+    paths = []
+    for _ in range(count):
+        n = rng.randrange(rules)
+        depth = '/'.join(f'd{rng.randrange(50)}' for _ in range(rng.randrange(1, 5)))
+        kind = rng.randrange(4)
+        if kind == 0:
+            paths.append(f'pkg{n - n % 3:03d}/src/{depth}/file{n}.py')
+        elif kind == 1:
+            paths.append(f'{depth}/config{n - n % 3 + 1:03d}.json')
+        elif kind == 2:
+            paths.append(f'{depth}/file{n}.ext{n - n % 3 + 2:03d}')
+        else:
+            paths.append(f'{depth}/unmatched{n}.txt')
+    return paths
+
+
+def bench_categorize(args: argparse.Namespace) -> Dict:
+    """Compare the legacy nested loop with the compiled CategoryMatcher."""
+    rng = random.Random(42)
+    rules = make_rules(args.rules, rng)
+    paths = make_paths(args.paths, args.rules, rng)
+
+    start = time.perf_counter()
+    matcher = CategoryMatcher(rules)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    results = {}
+    outputs = {}
+    for name, fn in (('legacy', lambda p: legacy_categorize(p, rules)), ('compiled', matcher.match)):
+        start = time.perf_counter()
+        outputs[name] = [fn(path) for path in paths]
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            'total_ms': round(elapsed * 1000, 2),
+            'ns_per_path': round(elapsed * 1e9 / len(paths), 1),
+        }
+    results['compiled']['compile_ms'] = round(compile_ms, 2)
+
+    return {
+        'benchmark': 'categorize',
+        'paths': args.paths,
+        'rules': args.rules,
+        'identical': outputs['legacy'] == outputs['compiled'],
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PR assistant scripts')
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+
+    collect = sub.add_parser('collect', help='git collection: legacy calls vs single collector vs native reader')
+    collect.add_argument('--files', type=int, default=10000)
+    collect.add_argument('--runs', type=int, default=5)
+    collect.set_defaults(func=bench_collect)
+
+    categorize = sub.add_parser('categorize', help='path categorization: nested loop vs compiled matcher')
+    categorize.add_argument('--paths', type=int, default=500000)
+    categorize.add_argument('--rules', type=int, default=200)
+    categorize.set_defaults(func=bench_categorize)
+
+    stream = sub.add_parser('stream', help='peak memory: full JSON vs --stream')
+    stream.add_argument('--files', type=int, nargs='+', default=[10000, 40000])
+    stream.set_defaults(func=bench_stream)
+
+    args = parser.parse_args()
+    print(json.dumps(args.func(args), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Path-category matching for analyze_changes.py.
+
+Categories are read from a per-repo config file (`.opencode/pr-assistant.json`,
+key "categories") and compiled once into:
+- a segment trie for directory prefixes ("apis/", "ui/src/**"),
+- a reversed-character trie for file names and suffixes ("README.md", "*.md"),
+- one combined regex for any remaining globs,
+so a lookup costs O(path length) however many rules there are. Rules keep
+their config order and the first matching rule wins.
+
+Pattern semantics:
+    "dir/"          path starts with dir/
+    "name"          path equals or ends with name
+    "*.ext", "a/*"  glob; `*` and `?` stay within one path segment, `**`
+                    crosses segments, and globs without a '/' match the
+                    file name in any directory
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+
+CONFIG_PATH = Path('.opencode') / 'pr-assistant.json'
+
+GLOB_CHARS = frozenset('*?[')
+
+# Trie nodes are dicts keyed by segment/character; this key holds the rule
+# indices ending there, in rule order
+RULE = None
+
+NO_MATCH = float('inf')
+
+
+def find_config(start: Optional[Path] = None) -> Optional[Path]:
+    """Find the repo's PR assistant config, searching up to the repository root."""
+    path = Path(start or os.getcwd()).resolve()
+    for candidate in (path, *path.parents):
+        config = candidate / CONFIG_PATH
+        if config.is_file():
+            return config
+        if (candidate / '.git').exists():
+            break
+    return None
+
+
+def load_config(config_path: Path) -> Dict:
+    """Load the PR assistant config file."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f'{config_path}: expected a JSON object')
+    return config
+
+
+def load_categories(config_path: Path) -> Optional[Dict[str, List[str]]]:
+    """Load and validate the "categories" table from a config file (None if absent)."""
+    categories = load_config(config_path).get('categories')
+    if categories is None:
+        return None
+    if not isinstance(categories, dict) or not all(
+        isinstance(patterns, list) and all(isinstance(p, str) and p for p in patterns)
+        for patterns in categories.values()
+    ):
+        raise ValueError(f'{config_path}: "categories" must map names to lists of patterns')
+    return categories
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a glob into a regex for the full path."""
+    anchored = '/' in pattern
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ('' if anchored else '(?:.*/)?') + ''.join(out)
+
+
+class CategoryMatcher:
+    """Compiled first-match-wins path categorizer."""
+
+    def __init__(self, categories: Dict[str, List[str]], default: str = 'other'):
+        self.categories = {name: list(patterns) for name, patterns in categories.items()}
+        self.default = default
+        self.rule_categories: List[str] = []
+        self._prefixes: Dict = {}
+        self._suffixes: Dict = {}
+        # (rule index, regex) of the glob rules
+        self._glob_rules: List[Tuple[int, str]] = []
+        self._first_glob = NO_MATCH
+
+        for category, patterns in self.categories.items():
+            for pattern in patterns:
+                index = len(self.rule_categories)
+                self.rule_categories.append(category)
+
+                if pattern.endswith('/') and not GLOB_CHARS & set(pattern):
+                    # "dir/": every segment of dir must match
+                    self._insert(self._prefixes, pattern[:-1].split('/'), index)
+                elif pattern.endswith('/**') and not GLOB_CHARS & set(pattern[:-3]):
+                    self._insert(self._prefixes, pattern[:-3].split('/'), index)
+                elif not GLOB_CHARS & set(pattern):
+                    self._insert(self._suffixes, reversed(pattern), index)
+                elif (pattern.startswith('*') and '/' not in pattern
+                      and not GLOB_CHARS & set(pattern[1:])):
+                    # "*.ext" is the same as the plain suffix ".ext"
+                    self._insert(self._suffixes, reversed(pattern[1:]), index)
+                else:
+                    self._glob_rules.append((index, glob_to_regex(pattern)))
+                    self._first_glob = min(self._first_glob, index)
+
+        self._globs = self._combine(self._glob_rules)
+
+    @staticmethod
+    def _insert(trie: Dict, keys, index: int) -> None:
+        node = trie
+        for key in keys:
+            node = node.setdefault(key, {})
+        # Patterns that normalize to the same key ("docs/", "docs/**") all
+        # keep their index; the earliest one takes precedence in match_rule
+        node.setdefault(RULE, []).append(index)
+
+    @staticmethod
+    def _combine(glob_rules: List[Tuple[int, str]]) -> Optional[Pattern]:
+        """One alternation of the globs; the group name of a match is r<index>."""
+        if not glob_rules:
+            return None
+        return re.compile('|'.join(f'(?P<r{index}>{regex})' for index, regex in glob_rules))
+
+    def match_rule(self, path: str) -> Optional[int]:
+        """Index of the first rule matching `path`, or None."""
+        node = self._suffixes
+        best = node[RULE][0] if RULE in node else NO_MATCH
+        for char in reversed(path):
+            node = node.get(char)
+            if node is None:
+                break
+            rules = node.get(RULE)
+            if rules is not None and rules[0] < best:
+                best = rules[0]
+
+        node = self._prefixes
+        segments = path.split('/')
+        for segment in segments[:len(segments) - 1]:
+            node = node.get(segment)
+            if node is None:
+                break
+            rules = node.get(RULE)
+            if rules is not None and rules[0] < best:
+                best = rules[0]
+
+        if self._first_glob < best:
+            m = self._globs.fullmatch(path)
+            if m and int(m.lastgroup[1:]) < best:
+                best = int(m.lastgroup[1:])
+
+        return None if best is NO_MATCH else best
+
+    def matched_rules(self, paths: Iterable[str], wanted: Collection[int]) -> Set[int]:
+        """
+        Which of the `wanted` rules match at least one of `paths`, not just
+        the first rule per path. The globs still wanted are tried as one
+        combined regex; when one matches, it is dropped from the regex and
+        the path is tried again. So each path costs the two trie walks and
+        one regex match, plus one recompile per glob that matched, and the
+        scan ends once every wanted rule matched.
+        """
+        pending = set(wanted)
+        matched: Set[int] = set()
+        glob_rules = [(index, regex) for index, regex in self._glob_rules if index in pending]
+        globs = self._combine(glob_rules)
+
+        for path in paths:
+            if not pending:
+                break
+            found = []
+            node = self._suffixes
+            found.extend(node.get(RULE, ()))
+            for char in reversed(path):
+                node = node.get(char)
+                if node is None:
+                    break
+                found.extend(node.get(RULE, ()))
+
+            node = self._prefixes
+            segments = path.split('/')
+            for segment in segments[:len(segments) - 1]:
+                node = node.get(segment)
+                if node is None:
+                    break
+                found.extend(node.get(RULE, ()))
+
+            while globs is not None:
+                m = globs.fullmatch(path)
+                if m is None:
+                    break
+                index = int(m.lastgroup[1:])
+                found.append(index)
+                glob_rules = [rule for rule in glob_rules if rule[0] != index]
+                globs = self._combine(glob_rules)
+
+            for index in found:
+                if index in pending:
+                    pending.discard(index)
+                    matched.add(index)
+        return matched
+
+    def match(self, path: str) -> str:
+        """Category for `path`, or the default category."""
+        rule = self.match_rule(path)
+        return self.default if rule is None else self.rule_categories[rule]
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of the rule table, for cache keys."""
+        canonical = json.dumps([self.categories, self.default], separators=(',', ':'))
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
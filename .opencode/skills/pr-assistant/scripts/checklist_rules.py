@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Checklist rules for generate_pr_body.py.
+
+Rules are read from the per-repo config (`.opencode/pr-assistant.json`, key
+"checklist"), falling back to DEFAULT_RULES. Each rule is an object:
+
+    {"item": "Database migration tested",   checklist text (required)
+     "categories": ["database"],            some file in one of these categories changed
+     "paths": ["supabase/migrations/"],     some changed file matches one of these
+     "unless_paths": ["**/test_*.py"]}      no changed file matches any of these
+
+Every condition given must hold; a rule with only "item" always applies.
+Patterns use the category syntax (see category_matcher.py) but match
+case-insensitively, so "*test*" also covers TEST_utils.py and TESTS/.
+
+Rules are compiled once. Per analysis, rules whose categories did not change
+are dropped first. One matcher, built with the rules, holds every distinct
+pattern, and a single pass over the changed files records which of the
+remaining rules' patterns occur (see CategoryMatcher.matched_rules: the
+globs are tried as one combined regex, globs that matched are dropped from
+it, and the pass stops once all patterns did). Rules are then decided from
+that set, so evaluation is O(files + rules) instead of rescanning the files
+for every rule.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from category_matcher import CategoryMatcher, load_config
+
+# File or directory names containing "test" (in any case)
+TEST_PATTERNS = ['*test*', '**/*test*/**']
+
+DEFAULT_RULES: List[Dict] = [
+    {'item': 'Self-reviewed the code'},
+    {'item': 'No breaking changes (or documented)'},
+    {'item': 'Backend tests added/updated', 'categories': ['backend']},
+    {'item': 'API documentation updated', 'categories': ['backend']},
+    {'item': 'UI/UX reviewed', 'categories': ['frontend']},
+    {'item': 'Browser compatibility checked', 'categories': ['frontend']},
+    {'item': 'Database migration tested', 'categories': ['database']},
+    {'item': 'Rollback plan documented', 'categories': ['database']},
+    {'item': 'Documentation is clear and accurate', 'categories': ['docs']},
+    {'item': '⚠️ Tests need to be added', 'categories': ['backend', 'frontend'],
+     'unless_paths': TEST_PATTERNS},
+]
+
+RULE_KEYS = ('categories', 'paths', 'unless_paths')
+
+
+def load_rules(config_path: Path) -> Optional[List[Dict]]:
+    """Load and validate the "checklist" rules from a config file (None if absent)."""
+    rules = load_config(config_path).get('checklist')
+    if rules is None:
+        return None
+    if not isinstance(rules, list):
+        raise ValueError(f'{config_path}: "checklist" must be a list of rules')
+    for rule in rules:
+        if not isinstance(rule, dict) or not isinstance(rule.get('item'), str) or not rule['item']:
+            raise ValueError(f'{config_path}: every checklist rule needs an "item" string')
+        unknown = set(rule) - {'item', *RULE_KEYS}
+        if unknown:
+            raise ValueError(f'{config_path}: unknown checklist rule key(s): {", ".join(sorted(unknown))}')
+        for key in RULE_KEYS:
+            values = rule.get(key, [])
+            if not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+                raise ValueError(f'{config_path}: checklist "{key}" must be a list of strings')
+    return rules
+
+
+class ChecklistRules:
+    """Compiled checklist rules."""
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = [dict(rule) for rule in rules]
+        # Distinct patterns across all rules, by first appearance
+        ids: Dict[str, int] = {}
+        self._compiled = []
+        for rule in self.rules:
+            pattern_ids = {}
+            for key in ('paths', 'unless_paths'):
+                pattern_ids[key] = [ids.setdefault(p.lower(), len(ids)) for p in rule.get(key, [])]
+            self._compiled.append((
+                rule['item'],
+                frozenset(rule['categories']) if 'categories' in rule else None,
+                pattern_ids['paths'] if 'paths' in rule else None,
+                pattern_ids['unless_paths'],
+            ))
+        self.patterns: List[str] = list(ids)
+        # Each pattern is its own category, so rule index == pattern index
+        self._matcher = CategoryMatcher({str(index): [pattern] for index, pattern in enumerate(self.patterns)})
+
+    def matched_patterns(self, paths: Iterable[str], wanted: Iterable[int]) -> Set[int]:
+        """Which of the `wanted` patterns match at least one path, with the one matcher over all patterns."""
+        return self._matcher.matched_rules(paths, set(wanted))
+
+    def evaluate(self, analysis: Dict) -> List[str]:
+        """Checklist items that apply to an analysis, in rule order."""
+        changes = analysis.get('changes_by_category', {})
+        categories = {category for category, files in changes.items() if files}
+        candidates = [rule for rule in self._compiled if rule[1] is None or rule[1] & categories]
+        wanted = {index for _, _, paths, unless_paths in candidates for index in (paths or []) + unless_paths}
+        matched = self.matched_patterns((path.lower() for path in iter_changed_paths(analysis)), wanted)
+
+        items = []
+        for item, _, paths, unless_paths in candidates:
+            if paths is not None and not any(index in matched for index in paths):
+                continue
+            if any(index in matched for index in unless_paths):
+                continue
+            items.append(item)
+        return items
+
+
+def iter_changed_paths(analysis: Dict) -> Iterator[str]:
+    """Every changed path of an analysis, including generated/vendored files."""
+    for files in analysis.get('changes_by_category', {}).values():
+        for file_info in files:
+            yield file_info['file']
+    for files in analysis.get('classified_files', {}).values():
+        for file_info in files:
+            yield file_info['file']
@@ -4,14 +4,49 @@ Generate PR body from template and analysis data.
 
 Usage:
     python generate_pr_body.py <template_file> <analysis_json_file> [output_file]
+                               [--max-changes-chars N]
 
 If output_file is not specified, prints to stdout.
+
+When the per-file changes list would exceed --max-changes-chars, directories
+are collapsed into summary lines and the most significant ones expanded
+again while the budget allows (GitHub rejects bodies over 65,536 chars).
+
+Templates mark generated sections with `<!-- AUTO_<NAME> -->` placeholders.
+Each name maps to a generator in SECTION_GENERATORS (register more with
+@section); a template is compiled once into literal and placeholder
+segments, only the generators it uses are run, and the body is built with
+a single join. Placeholders without a generator are left as they are.
 """
 
+import argparse
+import functools
+import heapq
 import json
+import re
 import sys
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
+
+from category_matcher import find_config
+from checklist_rules import DEFAULT_RULES, ChecklistRules, load_rules
+
+PLACEHOLDER_RE = re.compile(r'<!--\s*AUTO_([A-Z0-9_]+)\s*-->')
+
+# Default size budget of the changes breakdown, leaving room for the rest of
+# the body under GitHub's 65,536-character limit
+CHANGES_MAX_CHARS = 50000
+
+# Section generators by placeholder name (<!-- AUTO_<NAME> -->)
+SECTION_GENERATORS: Dict[str, Callable[[Dict], str]] = {}
+
+
+def section(name: str) -> Callable:
+    """Register the decorated function as the generator for <!-- AUTO_<name> -->."""
+    def register(generator: Callable[[Dict], str]) -> Callable[[Dict], str]:
+        SECTION_GENERATORS[name] = generator
+        return generator
+    return register
 
 
 def load_template(template_path: str) -> str:
@@ -26,6 +61,7 @@ def load_analysis(analysis_path: str) -> Dict:
         return json.load(f)
 
 
+@section('SUMMARY')
 def generate_summary(analysis: Dict) -> str:
     """Generate summary section from commits and changes."""
     commits = analysis.get('commits', [])
@@ -54,11 +90,16 @@ def generate_summary(analysis: Dict) -> str:
     return '\n'.join(summary_lines)
 
 
-def generate_changes_breakdown(analysis: Dict) -> str:
-    """Generate changes breakdown by category."""
+@section('CHANGES')
+def generate_changes_breakdown(analysis: Dict, max_chars: int = CHANGES_MAX_CHARS) -> str:
+    """
+    Generate changes breakdown by category, then generated/vendored files.
+    Beyond `max_chars`, directories are collapsed (see collapse_groups).
+    """
     changes = analysis.get('changes_by_category', {})
+    classified = analysis.get('classified_files', {})
 
-    if not changes:
+    if not changes and not classified:
         return "No changes detected."
 
     lines = []
@@ -70,6 +111,9 @@ def generate_changes_breakdown(analysis: Dict) -> str:
         'devops': '🚀',
         'docs': '📝',
         'config': '⚙️',
+        'agents': '🤖',
+        'skills': '🧰',
+        'plugins': '🔌',
         'other': '📦'
     }
 
@@ -83,106 +127,346 @@ def generate_changes_breakdown(analysis: Dict) -> str:
         'other': 'Other'
     }
 
-    for category, files in sorted(changes.items()):
+    status_icons = {
+        'A': '➕',
+        'M': '✏️',
+        'D': '➖',
+        'R': '🔄'
+    }
+
+    classification_names = {
+        'generated': 'generated',
+        'vendored': 'vendored',
+        'no_diff': 'not diffable'
+    }
+
+    # With line statistics, the categories with the most churn come first
+    category_stats = analysis.get('category_stats', {})
+    ordered = sorted(changes.items(), key=lambda item: (-category_churn(category_stats.get(item[0])), item[0]))
+
+    # (heading, [(file_info, line), ...]) per section
+    groups: List[Tuple[str, List[Tuple[Dict, str]]]] = []
+
+    for category, files in ordered:
         icon = category_icons.get(category, '📦')
         name = category_names.get(category, category.capitalize())
-        lines.append(f"\n### {icon} {name}")
+        heading = f"\n### {icon} {name}"
+        stats = category_stats.get(category)
+        if stats:
+            binary = f", {stats['binary']} binary" if stats['binary'] else ''
+            heading += f" ({format_line_stats(stats)}{binary})"
 
+        entries = []
         for file_info in files:
-            status = file_info['status']
-            filepath = file_info['file']
+            status_icon = status_icons.get(file_info['status'], '•')
+
+            line = f"- {status_icon} `{file_info['file']}`"
+            if file_info.get('binary'):
+                line += " (binary)"
+            elif 'insertions' in file_info:
+                line += f" ({format_line_stats(file_info)})"
+            entries.append((file_info, line))
+        groups.append((heading, entries))
+
+    # Lockfiles, build output and the like: listed, but not counted above
+    if classified:
+        entries = []
+        for kind, files in sorted(classified.items()):
+            label = classification_names.get(kind, kind)
+            for file_info in files:
+                status_icon = status_icons.get(file_info['status'], '•')
+                entries.append((file_info, f"- {status_icon} `{file_info['file']}` ({label})"))
+        groups.append(("\n### 🗃️ Generated & Vendored", entries))
+
+    full_size = sum(len(heading) + 1 + sum(len(line) + 1 for _, line in entries) for heading, entries in groups)
+    if full_size <= max_chars:
+        for heading, entries in groups:
+            lines.append(heading)
+            lines.extend(line for _, line in entries)
+        return '\n'.join(lines)
+
+    return collapse_groups(groups, max_chars)
+
+
+class PathNode:
+    """A directory in the changes tree, with totals for everything below it."""
+
+    __slots__ = ('path', 'items', 'children', 'files', 'insertions', 'deletions',
+                 'own', 'own_insertions', 'own_deletions', 'line', 'files_line')
+
+    def __init__(self, path: str):
+        self.path = path
+        # Subdirectories (PathNode) and file lines (str) in path order
+        self.items: List = []
+        self.children: Dict[str, 'PathNode'] = {}
+        self.files = self.insertions = self.deletions = 0
+        # Files directly in this directory
+        self.own = self.own_insertions = self.own_deletions = 0
+        self.line = ''
+        self.files_line = ''
+
+    @property
+    def priority(self) -> Tuple[int, int]:
+        """Heap key: most lines changed first, then most files."""
+        return (-(self.insertions + self.deletions), -self.files)
+
+    def expansion(self) -> Tuple[int, int]:
+        """
+        Characters added by replacing this directory's line with all of its
+        items, and with its subdirectories plus one line for its own files.
+        """
+        dirs = sum(len(child.line) + 1 for child in self.children.values())
+        files = sum(len(item) + 1 for item in self.items if isinstance(item, str))
+        own = len(self.files_line) + 1 if self.own else 0
+        return dirs + files - len(self.line) - 1, dirs + own - len(self.line) - 1
+
+
+def build_path_tree(entries: List[Tuple[Dict, str]]) -> PathNode:
+    """
+    Build the directory tree of a section in one pass over its files,
+    adding each file's counts to every directory above it. Items keep the
+    order of `entries`, as the uncollapsed list does; nothing is sorted.
+    """
+    root = PathNode('')
+    nodes = [root]
+    for file_info, line in entries:
+        insertions = file_info.get('insertions', 0)
+        deletions = file_info.get('deletions', 0)
+        node = root
+        node.files += 1
+        node.insertions += insertions
+        node.deletions += deletions
+        for directory in file_info['file'].split('/')[:-1]:
+            child = node.children.get(directory)
+            if child is None:
+                child = node.children[directory] = PathNode(f'{node.path}{directory}/')
+                node.items.append(child)
+                nodes.append(child)
+            node = child
+            node.files += 1
+            node.insertions += insertions
+            node.deletions += deletions
+        node.items.append(line)
+        node.own += 1
+        node.own_insertions += insertions
+        node.own_deletions += deletions
+
+    has_stats = any('insertions' in file_info for file_info, _ in entries)
+
+    def summary(files: int, insertions: int, deletions: int) -> str:
+        text = f"{files} file{'s' if files != 1 else ''}"
+        if has_stats:
+            text += f", +{format_count(insertions)}/-{format_count(deletions)}"
+        return text
+
+    for node in nodes:
+        totals = summary(node.files, node.insertions, node.deletions)
+        own = summary(node.own, node.own_insertions, node.own_deletions)
+        if node.path:
+            node.line = f"- 📁 `{node.path}` ({totals})"
+            node.files_line = f"- 📄 `{node.path}*` ({own})"
+        else:
+            node.line = f"- 📁 {totals}"
+            node.files_line = f"- 📄 top level ({own})"
+    return root
+
+
+def collapse_groups(groups: List[Tuple[str, List[Tuple[Dict, str]]]], max_chars: int) -> str:
+    """
+    Render sections with every directory collapsed into one summary line,
+    then expand the most significant directories first (most lines changed,
+    then most files) as long as the result stays within `max_chars`. A
+    directory whose own files don't fit is still opened up to its
+    subdirectories, with its files summarized on one line.
+    Building the trees is linear in the number of files, and each directory
+    is considered for expansion once.
+    """
+    note = "_Large change set: directories are collapsed to fit the PR body._"
+    used = len(note) + 1
+    roots = []
+    heap: List[Tuple[Tuple[int, int], int, PathNode]] = []
+    for heading, entries in groups:
+        root = build_path_tree(entries)
+        roots.append((heading, root))
+        used += len(heading) + 1 + len(root.line) + 1
+        heapq.heappush(heap, (root.priority, len(roots), root))
+
+    # id(node) -> True when fully expanded, False when its files stay summarized
+    expanded: Dict[int, bool] = {}
+    tiebreak = len(roots)
+    while heap:
+        _, _, node = heapq.heappop(heap)
+        full_cost, dirs_cost = node.expansion()
+        if used + full_cost <= max_chars:
+            used += full_cost
+            expanded[id(node)] = True
+        elif node.children and used + dirs_cost <= max_chars:
+            used += dirs_cost
+            expanded[id(node)] = False
+        else:
+            continue
+        for child in node.children.values():
+            tiebreak += 1
+            heapq.heappush(heap, (child.priority, tiebreak, child))
+
+    lines = [note]
+    for heading, root in roots:
+        lines.append(heading)
+        # Depth-first in path order, without recursion
+        stack = [root]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                lines.append(item)
+                continue
+            full = expanded.get(id(item))
+            if full is None:
+                lines.append(item.line)
+            elif full:
+                stack.extend(reversed(item.items))
+            else:
+                if item.own:
+                    stack.append(item.files_line)
+                stack.extend(reversed(item.children.values()))
+
+    return '\n'.join(lines)
+
+
+def format_count(n: int) -> str:
+    """Compact line count: 950, 3.2k, 1.4M."""
+    if n < 1000:
+        return str(n)
+    if n < 1000000:
+        return f"{n / 1000:.1f}".rstrip('0').rstrip('.') + 'k'
+    return f"{n / 1000000:.1f}".rstrip('0').rstrip('.') + 'M'
 
-            status_icon = {
-                'A': '➕',
-                'M': '✏️',
-                'D': '➖',
-                'R': '🔄'
-            }.get(status, '•')
 
-            lines.append(f"- {status_icon} `{filepath}`")
+def category_churn(stats: Dict) -> int:
+    """Lines touched in a category (0 without statistics)."""
+    return stats['insertions'] + stats['deletions'] if stats else 0
+
+
+def format_line_stats(stats: Dict) -> str:
+    """Format insertions and deletions as '+12 -3'."""
+    return f"+{stats['insertions']} -{stats['deletions']}"
+
+
+@section('COMMITS')
+def generate_commit_breakdown(analysis: Dict) -> str:
+    """Generate one line per commit with the categories it touched (needs --per-commit)."""
+    commit_changes = analysis.get('commit_changes', [])
+
+    if not commit_changes:
+        return "No per-commit data (run analyze_changes.py with --per-commit)."
+
+    lines = []
+    for commit in commit_changes:
+        touched = ', '.join(
+            f"{category} ({len(files)})"
+            for category, files in sorted(commit['changes_by_category'].items())
+        )
+        lines.append(f"- `{commit['commit']}` {commit['subject']}" + (f" — {touched}" if touched else ""))
 
     return '\n'.join(lines)
 
 
+def format_reference(ref: str) -> str:
+    """'12' -> '#12'; cross-repo references ('owner/repo#12') are kept as is."""
+    return ref if '#' in ref else f"#{ref}"
+
+
+@section('ISSUES')
 def generate_related_issues(analysis: Dict) -> str:
-    """Generate related issues section."""
-    issue_refs = analysis.get('issue_references', [])
+    """Generate related issues section (closing references get a keyword so GitHub closes them)."""
+    if 'closing_references' not in analysis:
+        issue_refs = analysis.get('issue_references', [])
+        if not issue_refs:
+            return "None"
+        return ', '.join([format_reference(issue) for issue in issue_refs])
 
-    if not issue_refs:
-        return "None"
+    closing = analysis.get('closing_references', [])
+    mentioned = analysis.get('mentioned_references', [])
 
-    return ', '.join([f"#{issue}" for issue in issue_refs])
+    if not closing and not mentioned:
+        return "None"
 
+    lines = [f"Closes {format_reference(ref)}" for ref in closing]
+    if mentioned:
+        lines.append("Related: " + ', '.join(format_reference(ref) for ref in mentioned))
 
-def generate_checklist(analysis: Dict) -> str:
-    """Generate appropriate checklist items based on changes."""
-    changes = analysis.get('changes_by_category', {})
-    checklist = []
+    return '\n'.join(lines)
 
-    # Always include basic items
-    checklist.append("- [ ] Self-reviewed the code")
-    checklist.append("- [ ] No breaking changes (or documented)")
 
-    # Add category-specific items
-    if 'backend' in changes:
-        checklist.append("- [ ] Backend tests added/updated")
-        checklist.append("- [ ] API documentation updated")
+@functools.lru_cache(maxsize=None)
+def get_checklist_rules(config_path: Optional[str] = None) -> ChecklistRules:
+    """Compile the checklist rules once (default: the repo's config, else DEFAULT_RULES)."""
+    path = config_path or find_config()
+    rules = load_rules(Path(path)) if path else None
+    return ChecklistRules(DEFAULT_RULES if rules is None else rules)
 
-    if 'frontend' in changes:
-        checklist.append("- [ ] UI/UX reviewed")
-        checklist.append("- [ ] Browser compatibility checked")
 
-    if 'database' in changes:
-        checklist.append("- [ ] Database migration tested")
-        checklist.append("- [ ] Rollback plan documented")
+@section('CHECKLIST')
+def generate_checklist(analysis: Dict) -> str:
+    """Generate checklist items from the checklist rules that apply to the changes."""
+    return '\n'.join(f"- [ ] {item}" for item in get_checklist_rules().evaluate(analysis))
 
-    if 'docs' in changes:
-        checklist.append("- [ ] Documentation is clear and accurate")
 
-    # Check for test files
-    has_tests = any(
-        'test' in file_info['file'].lower()
-        for files in changes.values()
-        for file_info in files
-    )
+class CompiledTemplate:
+    """A template split into literal text and placeholder segments."""
 
-    if not has_tests and ('backend' in changes or 'frontend' in changes):
-        checklist.append("- [ ] ⚠️ Tests need to be added")
+    def __init__(self, template: str):
+        # re.split with one group alternates literal, name, literal, ...
+        self.segments = PLACEHOLDER_RE.split(template)
+        self.markers = [m.group(0) for m in PLACEHOLDER_RE.finditer(template)]
+        self.names = set(self.segments[1::2])
 
-    return '\n'.join(checklist)
+    def render(self, analysis: Dict, generators: Dict[str, Callable[[Dict], str]] = SECTION_GENERATORS) -> str:
+        """Run each used generator once and join the segments."""
+        content = {name: generators[name](analysis) for name in self.names if name in generators}
+        parts = list(self.segments)
+        for index, marker in enumerate(self.markers):
+            parts[2 * index + 1] = content.get(parts[2 * index + 1], marker)
+        return ''.join(parts)
 
 
-def fill_template(template: str, analysis: Dict) -> str:
-    """Fill template with generated content."""
-    replacements = {
-        '<!-- AUTO_SUMMARY -->': generate_summary(analysis),
-        '<!-- AUTO_CHANGES -->': generate_changes_breakdown(analysis),
-        '<!-- AUTO_ISSUES -->': generate_related_issues(analysis),
-        '<!-- AUTO_CHECKLIST -->': generate_checklist(analysis),
-    }
+@functools.lru_cache(maxsize=32)
+def compile_template(template: str) -> CompiledTemplate:
+    """Compile a template, reusing an earlier compilation of the same content."""
+    return CompiledTemplate(template)
 
-    result = template
-    for placeholder, content in replacements.items():
-        result = result.replace(placeholder, content)
 
-    return result
+def fill_template(template: str, analysis: Dict,
+                  generators: Dict[str, Callable[[Dict], str]] = SECTION_GENERATORS) -> str:
+    """Fill template with generated content."""
+    return compile_template(template).render(analysis, generators)
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python generate_pr_body.py <template_file> <analysis_json_file> [output_file]", file=sys.stderr)
-        return 1
-
-    template_file = sys.argv[1]
-    analysis_file = sys.argv[2]
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
+    parser = argparse.ArgumentParser(description='Generate PR body from template and analysis data')
+    parser.add_argument('template_file')
+    parser.add_argument('analysis_json_file')
+    parser.add_argument('output_file', nargs='?')
+    parser.add_argument('--max-changes-chars', type=int, default=CHANGES_MAX_CHARS,
+                        help='collapse directories in the changes list beyond this size (default: %(default)s)')
+    args = parser.parse_args()
+    output_file = args.output_file
 
     # Load inputs
-    template = load_template(template_file)
-    analysis = load_analysis(analysis_file)
+    template = load_template(args.template_file)
+    analysis = load_analysis(args.analysis_json_file)
+
+    # Load the checklist config up front, so only its errors are reported as such
+    if 'CHECKLIST' in compile_template(template).names:
+        try:
+            get_checklist_rules()
+        except (OSError, ValueError) as e:
+            print(f"Error: invalid checklist config: {e}", file=sys.stderr)
+            return 1
 
     # Generate PR body
-    pr_body = fill_template(template, analysis)
+    generators = dict(SECTION_GENERATORS)
+    generators['CHANGES'] = lambda data: generate_changes_breakdown(data, args.max_changes_chars)
+    pr_body = fill_template(template, analysis, generators)
 
     # Output
     if output_file:
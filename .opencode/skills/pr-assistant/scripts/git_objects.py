@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""
+In-process reader for git repositories.
+
+Reads loose objects and packfiles directly (packs are mmap'd and located
+through the .idx fanout tables) so analyze_changes.py can diff two commits
+without spawning git. Anything this reader does not understand raises
+GitObjectError, and callers fall back to the git CLI. Line counts of
+changes too large to diff quickly in Python also come from git.
+"""
+
+import difflib
+import hashlib
+import heapq
+import mmap
+import os
+import re
+import struct
+import subprocess
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+TYPE_IDS = {b'commit': OBJ_COMMIT, b'tree': OBJ_TREE, b'blob': OBJ_BLOB, b'tag': OBJ_TAG}
+
+MODE_TREE = 0o040000
+MODE_GITLINK = 0o160000
+
+# Same lookup order as `git rev-parse <name>`
+REF_RULES = ('{}', 'refs/{}', 'refs/tags/{}', 'refs/heads/{}', 'refs/remotes/{}', 'refs/remotes/{}/HEAD')
+
+SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+# Objects kept per pack for delta resolution and repeated tree reads,
+# bounded by count and by total size; larger objects are not cached
+PACK_CACHE_SIZE = 256
+PACK_CACHE_BYTES = 32 * 1024 * 1024
+PACK_CACHE_MAX_OBJECT = 4 * 1024 * 1024
+
+# difflib is quadratic in the worst case: changed regions with more
+# (old lines x new lines) than this are counted by `git diff --numstat`
+LINE_DIFF_MAX_CELLS = 4_000_000
+
+
+class GitObjectError(Exception):
+    """Raised when the repository cannot be read in-process."""
+
+
+class TreeChange(NamedTuple):
+    """A changed path between two trees. Modes and shas are None on the missing side."""
+    status: str
+    path: str
+    old_mode: Optional[int]
+    old_sha: Optional[bytes]
+    new_mode: Optional[int]
+    new_sha: Optional[bytes]
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode a little-endian base-128 size as used in delta headers."""
+    result = shift = 0
+    while True:
+        c = data[pos]
+        pos += 1
+        result |= (c & 0x7f) << shift
+        shift += 7
+        if not c & 0x80:
+            return result, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Apply a git pack delta to its base object."""
+    src_size, pos = _varint(delta, 0)
+    dst_size, pos = _varint(delta, pos)
+    if src_size != len(base):
+        raise GitObjectError('delta base size mismatch')
+
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copy from base: bits 0-3 select offset bytes, bits 4-6 size bytes
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise GitObjectError('invalid delta opcode')
+
+    if len(out) != dst_size:
+        raise GitObjectError('delta result size mismatch')
+    return bytes(out)
+
+
+class PackFile:
+    """A packfile and its version 2 index, both memory-mapped."""
+
+    def __init__(self, idx_path: Path):
+        with open(idx_path, 'rb') as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.idx[:8] != b'\xfftOc\x00\x00\x00\x02':
+            raise GitObjectError(f'unsupported pack index: {idx_path.name}')
+
+        with open(idx_path.with_suffix('.pack'), 'rb') as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.fanout = struct.unpack_from('>256I', self.idx, 8)
+        count = self.fanout[255]
+        self.sha_table = 8 + 256 * 4
+        # Each object has a 20-byte sha and a 4-byte CRC before the offsets
+        self.offset_table = self.sha_table + 24 * count
+        self.large_offset_table = self.offset_table + 4 * count
+        self.cache: Dict[int, Tuple[int, bytes]] = {}
+        self.cache_bytes = 0
+
+    def find(self, sha: bytes) -> Optional[int]:
+        """Return the pack offset of an object, or None if it is not in this pack."""
+        first = sha[0]
+        lo = self.fanout[first - 1] if first else 0
+        hi = self.fanout[first]
+        idx, table = self.idx, self.sha_table
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = table + mid * 20
+            current = idx[pos:pos + 20]
+            if current < sha:
+                lo = mid + 1
+            elif current > sha:
+                hi = mid
+            else:
+                offset, = struct.unpack_from('>I', idx, self.offset_table + 4 * mid)
+                if offset & 0x80000000:
+                    offset, = struct.unpack_from(
+                        '>Q', idx, self.large_offset_table + 8 * (offset & 0x7fffffff))
+                return offset
+        return None
+
+    def read_at(self, offset: int, repo: 'Repository') -> Tuple[int, bytes]:
+        """Read the object at `offset`, resolving delta chains."""
+        cached = self.cache.get(offset)
+        if cached is not None:
+            return cached
+
+        pack = self.pack
+        c = pack[offset]
+        pos = offset + 1
+        obj_type = (c >> 4) & 7
+        size = c & 0x0f
+        shift = 4
+        while c & 0x80:
+            c = pack[pos]
+            pos += 1
+            size |= (c & 0x7f) << shift
+            shift += 7
+
+        if obj_type == OBJ_OFS_DELTA:
+            c = pack[pos]
+            pos += 1
+            distance = c & 0x7f
+            while c & 0x80:
+                c = pack[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (c & 0x7f)
+            base_type, base = self.read_at(offset - distance, repo)
+            result = (base_type, apply_delta(base, self._inflate(pos, size)))
+        elif obj_type == OBJ_REF_DELTA:
+            base_type, base = repo.read_object(pack[pos:pos + 20])
+            result = (base_type, apply_delta(base, self._inflate(pos + 20, size)))
+        elif obj_type in (OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG):
+            result = (obj_type, self._inflate(pos, size))
+        else:
+            raise GitObjectError(f'unknown pack object type {obj_type}')
+
+        size = len(result[1])
+        if size <= PACK_CACHE_MAX_OBJECT:
+            while self.cache and (len(self.cache) >= PACK_CACHE_SIZE
+                                  or self.cache_bytes + size > PACK_CACHE_BYTES):
+                evicted = self.cache.pop(next(iter(self.cache)))
+                self.cache_bytes -= len(evicted[1])
+            self.cache[offset] = result
+            self.cache_bytes += size
+        return result
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        """Inflate a zlib stream of unknown compressed length starting at `pos`."""
+        inflater = zlib.decompressobj()
+        step = max(size, 4096)
+        parts = []
+        while not inflater.eof:
+            chunk = self.pack[pos:pos + step]
+            if not chunk:
+                raise GitObjectError('truncated pack object')
+            parts.append(inflater.decompress(chunk))
+            pos += step
+        data = b''.join(parts)
+        if len(data) != size:
+            raise GitObjectError('pack object size mismatch')
+        return data
+
+    def close(self) -> None:
+        self.idx.close()
+        self.pack.close()
+
+
+class Repository:
+    """Read-only view of a repository's refs and objects (SHA-1, files ref backend)."""
+
+    def __init__(self, git_dir: Path):
+        self.git_dir = git_dir
+        commondir = git_dir / 'commondir'
+        self.common_dir = (git_dir / commondir.read_text().strip()).resolve() if commondir.is_file() else git_dir
+        self._check_format()
+
+        objects = self.common_dir / 'objects'
+        self.object_dirs = [objects]
+        alternates = objects / 'info' / 'alternates'
+        if alternates.is_file():
+            for line in alternates.read_text().splitlines():
+                if line.strip() and not line.startswith('#'):
+                    self.object_dirs.append((objects / line.strip()).resolve())
+
+        self._packs: Optional[List[PackFile]] = None
+        self._packed_refs: Optional[Dict[str, str]] = None
+        self._commits: Dict[bytes, Tuple[bytes, List[bytes], int, bytes]] = {}
+
+    @classmethod
+    def discover(cls, start: Optional[Path] = None) -> 'Repository':
+        """Find the repository containing `start` (default: the working directory)."""
+        if os.environ.get('GIT_DIR'):
+            raise GitObjectError('GIT_DIR is set')
+
+        path = Path(start or os.getcwd()).resolve()
+        for candidate in (path, *path.parents):
+            dotgit = candidate / '.git'
+            if dotgit.is_dir():
+                return cls(dotgit)
+            if dotgit.is_file():
+                content = dotgit.read_text().strip()
+                if not content.startswith('gitdir:'):
+                    raise GitObjectError(f'invalid gitfile: {dotgit}')
+                return cls((candidate / content[len('gitdir:'):].strip()).resolve())
+        raise GitObjectError('not a git repository')
+
+    def _check_format(self) -> None:
+        """Reject repositories using extensions this reader does not implement."""
+        config = self.common_dir / 'config'
+        if not config.is_file():
+            return
+        for line in config.read_text(errors='replace').splitlines():
+            key, _, value = line.strip().lower().partition('=')
+            key, value = key.strip(), value.strip()
+            if key == 'objectformat' and value != 'sha1':
+                raise GitObjectError(f'unsupported object format: {value}')
+            if key == 'refstorage' and value != 'files':
+                raise GitObjectError(f'unsupported ref storage: {value}')
+
+    # Objects
+
+    @property
+    def packs(self) -> List[PackFile]:
+        if self._packs is None:
+            self._packs = [
+                PackFile(idx)
+                for objects in self.object_dirs
+                for idx in sorted((objects / 'pack').glob('*.idx'))
+                if idx.with_suffix('.pack').is_file()
+            ]
+        return self._packs
+
+    def read_object(self, sha: bytes) -> Tuple[int, bytes]:
+        """Return (type, data) for a 20-byte object id."""
+        try:
+            return self._read_object(sha)
+        except GitObjectError:
+            raise
+        except (zlib.error, struct.error, IndexError, KeyError, ValueError) as e:
+            raise GitObjectError(f'corrupt object {sha.hex()}: {e}') from e
+
+    def _read_object(self, sha: bytes) -> Tuple[int, bytes]:
+        for pack in self.packs:
+            offset = pack.find(sha)
+            if offset is not None:
+                return pack.read_at(offset, self)
+
+        hexsha = sha.hex()
+        for objects in self.object_dirs:
+            try:
+                raw = zlib.decompress((objects / hexsha[:2] / hexsha[2:]).read_bytes())
+            except FileNotFoundError:
+                continue
+            header, _, data = raw.partition(b'\0')
+            type_name, _, _ = header.partition(b' ')
+            return TYPE_IDS[type_name], data
+
+        raise GitObjectError(f'object not found: {hexsha}')
+
+    def read_typed(self, sha: bytes, expected: int) -> bytes:
+        obj_type, data = self.read_object(sha)
+        if obj_type != expected:
+            raise GitObjectError(f'{sha.hex()} is not of type {expected}')
+        return data
+
+    def close(self) -> None:
+        for pack in self._packs or []:
+            pack.close()
+        self._packs = None
+
+    # Refs
+
+    def _packed(self) -> Dict[str, str]:
+        if self._packed_refs is None:
+            self._packed_refs = {}
+            packed = self.common_dir / 'packed-refs'
+            if packed.is_file():
+                for line in packed.read_text().splitlines():
+                    if line and line[0] not in '#^':
+                        sha, _, name = line.partition(' ')
+                        self._packed_refs[name] = sha
+        return self._packed_refs
+
+    def read_ref(self, name: str, depth: int = 0) -> Optional[str]:
+        """Resolve a full ref name (following symbolic refs) to a hex sha."""
+        if depth > 5:
+            raise GitObjectError(f'symbolic ref loop at {name}')
+
+        value = None
+        # Per-worktree refs (HEAD) live in the git dir, shared ones in the common dir
+        for base in (self.git_dir, self.common_dir):
+            path = base / name
+            if path.is_file():
+                value = path.read_text().strip()
+                break
+        if value is None:
+            value = self._packed().get(name)
+        if value is None:
+            return None
+        if value.startswith('ref: '):
+            return self.read_ref(value[5:], depth + 1)
+        return value
+
+    def current_branch(self) -> str:
+        """Name of the checked-out branch, or '' when HEAD is detached."""
+        head = (self.git_dir / 'HEAD').read_text().strip()
+        if head.startswith('ref: refs/heads/'):
+            return head[len('ref: refs/heads/'):]
+        return ''
+
+    def resolve(self, rev: str) -> bytes:
+        """Resolve a ref name or full hex sha to a commit id, peeling tags."""
+        if SHA_RE.fullmatch(rev):
+            sha = rev
+        else:
+            for rule in REF_RULES:
+                name = rule.format(rev)
+                # Only pseudo-refs such as HEAD may live outside refs/
+                if name == rev and not (name.startswith('refs/') or name.isupper()):
+                    continue
+                sha = self.read_ref(name)
+                if sha:
+                    break
+            else:
+                raise GitObjectError(f'cannot resolve {rev}')
+
+        oid = bytes.fromhex(sha)
+        obj_type, data = self.read_object(oid)
+        while obj_type == OBJ_TAG:
+            oid = bytes.fromhex(data[7:47].decode())  # "object <sha>"
+            obj_type, data = self.read_object(oid)
+        if obj_type != OBJ_COMMIT:
+            raise GitObjectError(f'{rev} does not point to a commit')
+        return oid
+
+    # Commits
+
+    def commit(self, sha: bytes) -> Tuple[bytes, List[bytes], int, bytes]:
+        """Return (tree, parents, committer timestamp, message) for a commit."""
+        cached = self._commits.get(sha)
+        if cached is not None:
+            return cached
+
+        data = self.read_typed(sha, OBJ_COMMIT)
+        header, _, message = data.partition(b'\n\n')
+        tree, parents, timestamp = b'', [], 0
+        for line in header.split(b'\n'):
+            if line.startswith(b'tree '):
+                tree = bytes.fromhex(line[5:].decode())
+            elif line.startswith(b'parent '):
+                parents.append(bytes.fromhex(line[7:].decode()))
+            elif line.startswith(b'committer '):
+                timestamp = int(line.rsplit(b' ', 2)[1])
+
+        result = (tree, parents, timestamp, message)
+        self._commits[sha] = result
+        return result
+
+    def merge_base(self, one: bytes, two: bytes) -> Optional[bytes]:
+        """
+        Best common ancestor of two commits, painting down from both by
+        commit date like `git merge-base`. Returns the newest if several.
+        """
+        if one == two:
+            return one
+
+        PARENT1, PARENT2, STALE, RESULT = 1, 2, 4, 8
+        flags = {one: PARENT1, two: PARENT2}
+        queue = [(-self.commit(one)[2], 0, one), (-self.commit(two)[2], 1, two)]
+        counter = 2
+        results = []
+
+        while any(not flags[sha] & STALE for _, _, sha in queue):
+            _, _, sha = heapq.heappop(queue)
+            paint = flags[sha] & (PARENT1 | PARENT2 | STALE)
+            if paint & (PARENT1 | PARENT2) == PARENT1 | PARENT2:
+                if not flags[sha] & RESULT:
+                    flags[sha] |= RESULT
+                    results.append(sha)
+                paint |= STALE
+            for parent in self.commit(sha)[1]:
+                if flags.get(parent, 0) & paint == paint:
+                    continue
+                flags[parent] = flags.get(parent, 0) | paint
+                heapq.heappush(queue, (-self.commit(parent)[2], counter, parent))
+                counter += 1
+
+        bases = [sha for sha in results if not flags[sha] & STALE]
+        if not bases:
+            return None
+        return max(bases, key=lambda sha: self.commit(sha)[2])
+
+    def commits_between(self, head: bytes, exclude: bytes) -> List[bytes]:
+        """Commits reachable from `head` but not `exclude`, newest first (`git log exclude..head`)."""
+        UNINTERESTING = 1
+        flags = {head: 0, exclude: UNINTERESTING}
+        queue = [(-self.commit(head)[2], 0, head), (-self.commit(exclude)[2], 1, exclude)]
+        counter = 2
+        walked = []
+
+        while any(not flags[sha] & UNINTERESTING for _, _, sha in queue):
+            _, _, sha = heapq.heappop(queue)
+            uninteresting = flags[sha] & UNINTERESTING
+            if not uninteresting:
+                walked.append(sha)
+            for parent in self.commit(sha)[1]:
+                if parent in flags and (flags[parent] & UNINTERESTING or not uninteresting):
+                    continue
+                flags[parent] = flags.get(parent, 0) | uninteresting
+                heapq.heappush(queue, (-self.commit(parent)[2], counter, parent))
+                counter += 1
+
+        # Commits reached before an uninteresting path caught up are dropped here
+        return [sha for sha in walked if not flags[sha] & UNINTERESTING]
+
+    # Trees
+
+    def tree(self, sha: bytes) -> List[Tuple[bytes, bytes, int, bytes]]:
+        """Parse a tree into (sort key, name, mode, sha) entries in git's order."""
+        data = self.read_typed(sha, OBJ_TREE)
+        entries = []
+        pos, end = 0, len(data)
+        while pos < end:
+            space = data.index(b' ', pos)
+            nul = data.index(b'\0', space)
+            mode = int(data[pos:space], 8)
+            name = data[space + 1:nul]
+            # Trees sort as if their name ended with '/'
+            key = name + b'/' if mode == MODE_TREE else name
+            entries.append((key, name, mode, data[nul + 1:nul + 21]))
+            pos = nul + 21
+        return entries
+
+    def diff_trees(self, old: Optional[bytes], new: Optional[bytes],
+                   prefix: bytes = b'') -> Iterator[TreeChange]:
+        """Walk two trees in parallel, skipping subtrees whose hashes are equal."""
+        if old == new:
+            return
+        a = self.tree(old) if old else []
+        b = self.tree(new) if new else []
+        i = j = 0
+
+        while i < len(a) or j < len(b):
+            if j >= len(b) or (i < len(a) and a[i][0] < b[j][0]):
+                _, name, mode, sha = a[i]
+                i += 1
+                if mode == MODE_TREE:
+                    yield from self.diff_trees(sha, None, prefix + name + b'/')
+                else:
+                    yield _change('D', prefix + name, mode, sha, None, None)
+            elif i >= len(a) or b[j][0] < a[i][0]:
+                _, name, mode, sha = b[j]
+                j += 1
+                if mode == MODE_TREE:
+                    yield from self.diff_trees(None, sha, prefix + name + b'/')
+                else:
+                    yield _change('A', prefix + name, None, None, mode, sha)
+            else:
+                _, name, old_mode, old_sha = a[i]
+                _, _, new_mode, new_sha = b[j]
+                i += 1
+                j += 1
+                if old_sha == new_sha and old_mode == new_mode:
+                    continue
+                if old_mode == MODE_TREE:
+                    yield from self.diff_trees(old_sha, new_sha, prefix + name + b'/')
+                else:
+                    # Regular file <-> symlink <-> submodule is a type change
+                    status = 'M' if old_mode >> 12 == new_mode >> 12 else 'T'
+                    yield _change(status, prefix + name, old_mode, old_sha, new_mode, new_sha)
+
+    def changed_files(self, base: bytes, head: bytes) -> List[TreeChange]:
+        """
+        Changes between two commits, with exact renames (same blob deleted
+        and added) paired up. Inexact renames are reported as D + A.
+        """
+        changes = list(self.diff_trees(self.commit(base)[0], self.commit(head)[0]))
+
+        deleted: Dict[bytes, List[int]] = {}
+        for index, change in enumerate(changes):
+            if change.status == 'D' and change.old_mode != MODE_GITLINK:
+                deleted.setdefault(change.old_sha, []).append(index)
+        if not deleted:
+            return changes
+
+        empty = blob_id(b'')
+        renamed = set()
+        for index, change in enumerate(changes):
+            if change.status == 'A' and change.new_sha != empty and deleted.get(change.new_sha):
+                source = changes[deleted[change.new_sha].pop(0)]
+                renamed.add(source.path)
+                changes[index] = change._replace(status='R', old_mode=source.old_mode,
+                                                 old_sha=source.old_sha)
+        return [c for c in changes if not (c.status == 'D' and c.path in renamed)]
+
+    def line_stats(self, change: TreeChange) -> Tuple[int, int, bool]:
+        """
+        (insertions, deletions, binary) for a change. Counts come from a
+        line diff in Python and can differ slightly from git's heuristics;
+        changed regions above LINE_DIFF_MAX_CELLS are left to git.
+        """
+        if MODE_GITLINK in (change.old_mode, change.new_mode):
+            # git shows a submodule bump as one "Subproject commit" line swap
+            return int(change.new_sha is not None), int(change.old_sha is not None), False
+
+        old = self.read_typed(change.old_sha, OBJ_BLOB) if change.old_sha else b''
+        new = self.read_typed(change.new_sha, OBJ_BLOB) if change.new_sha else b''
+        if b'\0' in old[:8000] or b'\0' in new[:8000]:
+            return 0, 0, True
+        if old == new:
+            return 0, 0, False
+
+        a, b = _lines(old), _lines(new)
+        # Trim the common head and tail before handing the middle to difflib
+        start = 0
+        while start < len(a) and start < len(b) and a[start] == b[start]:
+            start += 1
+        end_a, end_b = len(a), len(b)
+        while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+            end_a -= 1
+            end_b -= 1
+        a, b = a[start:end_a], b[start:end_b]
+        if not a or not b:
+            return len(b), len(a), False
+        if len(a) * len(b) > LINE_DIFF_MAX_CELLS:
+            return self._git_numstat(change.old_sha, change.new_sha)
+
+        matched = sum(block.size for block in
+                      difflib.SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks())
+        return len(b) - matched, len(a) - matched, False
+
+    def _git_numstat(self, old_sha: bytes, new_sha: bytes) -> Tuple[int, int, bool]:
+        """line_stats of two blobs from `git diff --numstat`."""
+        try:
+            result = subprocess.run(
+                ['git', '--git-dir', str(self.git_dir), 'diff', '--numstat',
+                 old_sha.hex(), new_sha.hex()],
+                capture_output=True, text=True)
+        except OSError as e:
+            raise GitObjectError(f'git diff failed: {e}') from e
+        fields = result.stdout.split('\t')
+        if result.returncode != 0 or len(fields) < 3:
+            raise GitObjectError(f'git diff failed: {result.stderr.strip()}')
+        if fields[0] == '-':
+            return 0, 0, True
+        return int(fields[0]), int(fields[1]), False
+
+
+def _change(status: str, path: bytes, old_mode: Optional[int], old_sha: Optional[bytes],
+            new_mode: Optional[int], new_sha: Optional[bytes]) -> TreeChange:
+    return TreeChange(status, path.decode('utf-8', errors='replace'),
+                      old_mode, old_sha, new_mode, new_sha)
+
+
+def _lines(data: bytes) -> List[bytes]:
+    """Split on '\n' only; an unterminated last line differs from a terminated one."""
+    lines = data.split(b'\n')
+    last = lines.pop()
+    if last:
+        lines.append(last + b'\0')
+    return lines
+
+
+def blob_id(data: bytes) -> bytes:
+    """Object id git would assign to a blob with this content."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).digest()
+
+
+def commit_subject(message: bytes) -> str:
+    """The `%s` placeholder: the first paragraph of a message on one line."""
+    paragraph = message.decode('utf-8', errors='replace').lstrip('\n').split('\n\n', 1)[0]
+    return ' '.join(line.strip() for line in paragraph.splitlines())
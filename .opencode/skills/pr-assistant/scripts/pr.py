@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+PR pipeline in one process: analyze changes, render the body, create the PR.
+
+Usage:
+    python pr.py [target_branch] [--template FILE] [--output FILE]
+                 [--create --title TITLE [--draft] [--reviewer R ...] [--label L ...]]
+                 [--worktree | --staged] [analysis options]
+
+Without --create the rendered body is printed (or written to --output) for
+review; --create opens the PR with `gh` once the draft has been approved.
+
+The steps are importable, so the analysis is handed to the renderer as a
+dict instead of through a JSON file and a second interpreter:
+
+    import pr
+    analysis = pr.analyze('main')
+    body = pr.render_body(analysis)
+    url = pr.create_pr(body, title='Add export', base='main')
+
+analyze_changes.py and generate_pr_body.py remain as the command line
+front ends of the same functions.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import analyze_changes
+import generate_pr_body
+from analysis_cache import DEFAULT_MAX_BYTES
+from analyze_changes import Budget
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / 'assets' / 'templates'
+
+# PR types with their own template; other types use the feature template
+TEMPLATE_TYPES = ('feature', 'bugfix', 'docs')
+
+
+class PRError(Exception):
+    """Raised when `gh` fails to create the pull request."""
+
+
+def analyze(target_branch: str = 'main', categories: Optional[str] = None, backend: str = 'git',
+            use_cache: bool = True, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+            budget: Optional[Budget] = None, classified_stats: bool = False,
+            per_commit: bool = False, worktree: bool = False, staged: bool = False) -> Dict:
+    """
+    Analyze the current branch against `target_branch` (or, with `worktree`
+    or `staged`, the uncommitted changes) and return the analysis dict that
+    analyze_changes.py prints as JSON.
+    """
+    matcher = analyze_changes.get_matcher(categories)
+    if worktree or staged:
+        return analyze_changes.analyze_worktree(matcher, staged, budget, classified_stats)
+    return analyze_changes.analyze(target_branch, matcher, backend,
+                                   use_cache=use_cache, cache_max_bytes=cache_max_bytes,
+                                   budget=budget, classified_stats=classified_stats,
+                                   per_commit=per_commit)
+
+
+def template_for(analysis: Dict) -> Path:
+    """The bundled template for the analysis' PR type."""
+    pr_type = analysis.get('pr_type')
+    name = pr_type if pr_type in TEMPLATE_TYPES else 'feature'
+    return TEMPLATES_DIR / f'pr-template-{name}.md'
+
+
+def render_body(analysis: Dict, template: Optional[str] = None,
+                max_changes_chars: int = generate_pr_body.CHANGES_MAX_CHARS) -> str:
+    """
+    Render the PR body for an analysis. `template` is the template text;
+    by default the bundled template for the analysis' PR type is used.
+    """
+    if template is None:
+        template = generate_pr_body.load_template(str(template_for(analysis)))
+    generators = generate_pr_body.SECTION_GENERATORS
+    if max_changes_chars != generate_pr_body.CHANGES_MAX_CHARS:
+        generators = dict(generators)
+        generators['CHANGES'] = lambda data: generate_pr_body.generate_changes_breakdown(data, max_changes_chars)
+    return generate_pr_body.fill_template(template, analysis, generators)
+
+
+def create_pr(body: str, title: str, base: str, head: Optional[str] = None, draft: bool = False,
+              reviewers: Iterable[str] = (), labels: Iterable[str] = (),
+              cwd: Optional[str] = None) -> str:
+    """
+    Create the pull request with `gh pr create` and return its URL. The
+    body is passed on stdin, so its size is not bound by the argument limit.
+    """
+    cmd = ['gh', 'pr', 'create', '--title', title, '--base', base, '--body-file', '-']
+    if head:
+        cmd += ['--head', head]
+    if draft:
+        cmd.append('--draft')
+    for reviewer in reviewers:
+        cmd += ['--reviewer', reviewer]
+    for label in labels:
+        cmd += ['--label', label]
+
+    try:
+        result = subprocess.run(cmd, input=body, capture_output=True, text=True, cwd=cwd)
+    except FileNotFoundError:
+        raise PRError('GitHub CLI (gh) is not installed')
+    if result.returncode != 0:
+        raise PRError(result.stderr.strip() or f'gh exited with status {result.returncode}')
+    return result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze changes, render the PR body and optionally create the PR')
+    parser.add_argument('target_branch', nargs='?', default='main')
+    parser.add_argument('--template', metavar='FILE',
+                        help='PR template (default: bundled template for the inferred PR type)')
+    parser.add_argument('--output', metavar='FILE', help='write the body here instead of stdout')
+    parser.add_argument('--max-changes-chars', type=int, default=generate_pr_body.CHANGES_MAX_CHARS,
+                        help='collapse directories in the changes list beyond this size (default: %(default)s)')
+    parser.add_argument('--create', action='store_true',
+                        help='create the PR with gh (only after the draft was approved)')
+    parser.add_argument('--title', help='PR title (required with --create)')
+    parser.add_argument('--draft', action='store_true', help='create the PR as a draft')
+    parser.add_argument('--reviewer', action='append', default=[], metavar='USER')
+    parser.add_argument('--label', action='append', default=[], metavar='LABEL')
+    parser.add_argument('--backend', choices=['git', 'native'], default='git',
+                        help='read history through the git CLI (default) or in-process')
+    parser.add_argument('--categories', metavar='FILE',
+                        help='category config (default: .opencode/pr-assistant.json)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the analysis cache under the git dir')
+    parser.add_argument('--max-seconds', type=float,
+                        help='stop after this much wall-clock time and use a partial result')
+    parser.add_argument('--max-files', type=int, help='include at most this many changed files')
+    parser.add_argument('--classified-stats', action='store_true',
+                        help='count generated/vendored/-diff files in the line stats')
+    parser.add_argument('--per-commit', action='store_true',
+                        help='analyze each commit too (for <!-- AUTO_COMMITS -->)')
+    uncommitted = parser.add_mutually_exclusive_group()
+    uncommitted.add_argument('--worktree', action='store_true',
+                             help='preview uncommitted changes (HEAD vs. working tree)')
+    uncommitted.add_argument('--staged', action='store_true', help='preview staged changes (HEAD vs. index)')
+    args = parser.parse_args()
+    if args.create and not args.title:
+        parser.error('--create needs --title')
+    if args.create and (args.worktree or args.staged):
+        parser.error('--create opens a PR for committed changes and cannot be combined with --worktree/--staged')
+    if (args.worktree or args.staged) and args.backend == 'native':
+        parser.error('--worktree/--staged cannot be combined with --backend native')
+
+    # Only loading the configs is guarded, so git and IO errors of the
+    # analysis and rendering are not reported as invalid config
+    try:
+        analyze_changes.get_matcher(args.categories)
+    except (OSError, ValueError) as e:
+        print(f"Error: invalid category config: {e}", file=sys.stderr)
+        return 1
+
+    analysis = analyze(args.target_branch, args.categories, args.backend,
+                       use_cache=not args.no_cache,
+                       budget=Budget(max_seconds=args.max_seconds, max_files=args.max_files),
+                       classified_stats=args.classified_stats, per_commit=args.per_commit,
+                       worktree=args.worktree, staged=args.staged)
+
+    template_file = args.template or str(template_for(analysis))
+    template = generate_pr_body.load_template(template_file)
+    if 'CHECKLIST' in generate_pr_body.compile_template(template).names:
+        try:
+            generate_pr_body.get_checklist_rules()
+        except (OSError, ValueError) as e:
+            print(f"Error: invalid checklist config: {e}", file=sys.stderr)
+            return 1
+    body = render_body(analysis, template, args.max_changes_chars)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(body)
+        print(f"PR body written to: {args.output}", file=sys.stderr)
+    elif not args.create:
+        print(body)
+
+    if args.create:
+        try:
+            url = create_pr(body, args.title, args.target_branch, draft=args.draft,
+                            reviewers=args.reviewer, labels=args.label)
+        except PRError as e:
+            print(f"Error: failed to create PR: {e}", file=sys.stderr)
+            return 1
+        print(url)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())